@@ -0,0 +1,465 @@
+"""
+Title              : Chromatizer Benchmarks
+Description        : Stage benchmarks and microbenchmarks for the audio and LED output hot paths
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import sys, json, socket, timeit, argparse, platform, tempfile, itertools, numpy as np
+from time import perf_counter, strftime
+from dsp import melProjection, spectrumPlan, melFilterBank, melFrequencies, blur
+from scipy.ndimage import gaussian_filter1d
+from outputs import espEncoder, ddpEncoder, e131Encoder, MAX_PIXELS_PER_PACKET
+from engine import chromaEngine, audioRing, defaultPreferences, expFilter, expFilterBank, starField, starLifeMap, speedMap, RAINBOW_STEP, gammaDefault
+from palette import hueWheel, colorCorrection
+from offline import iterRender
+
+SAMPLE_RATE = 44100
+# Parameters swept by the stage suite, the first value of each is the base configuration
+SWEEP = {'noPixels': [150, 300, 600, 1000],
+         'noFFT': [32, 64, 128],
+         'audioRoll': [2, 4, 8],
+         'tgtFPS': [80, 40, 120],
+         'pipelineDtype': ['float64', 'float32']}
+STAGES = ['analysis', 'melSmoothing', 'scrollDisplay', 'energyDisplay', 'spectrumDisplay', 'stripTwinkle', 'stripRainbow', 'sendToESP', 'espEncode']
+
+def timeCall(func, number=2000, repeat=5):
+    """Best of repeat runs, in microseconds per call"""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+def sineSweep(seconds, sampleRate=SAMPLE_RATE, fLow=40.0, fHigh=16000.0):
+    """Logarithmic sine sweep from fLow to fHigh"""
+    t = np.arange(int(seconds * sampleRate)) / sampleRate
+    rate = np.log(fHigh / fLow) / seconds
+    return 0.5 * np.sin(2 * np.pi * fLow * (np.exp(rate * t) - 1) / rate)
+
+def pinkNoise(seconds, sampleRate=SAMPLE_RATE, seed=0):
+    """White noise shaped to a 1/f power spectrum"""
+    noSamples = int(seconds * sampleRate)
+    spectrum = np.fft.rfft(np.random.default_rng(seed).standard_normal(noSamples))
+    spectrum[1:] /= np.sqrt(np.arange(1, spectrum.size))
+    spectrum[0] = 0
+    noise = np.fft.irfft(spectrum, n=noSamples)
+    return 0.5 * noise / np.max(np.abs(noise))
+
+def drumLoop(seconds, sampleRate=SAMPLE_RATE, bpm=120, seed=0):
+    """Kick on every beat, snare on 2 and 4, closed hats on eighths"""
+    rng = np.random.default_rng(seed)
+    noSamples = int(seconds * sampleRate)
+    loop = np.zeros(noSamples)
+    beatLen = int(sampleRate * 60 / bpm)
+    t = np.arange(beatLen) / sampleRate
+    kick = np.sin(2 * np.pi * (50 * t + 70 * 0.03 * (1 - np.exp(-t / 0.03)))) * np.exp(-t / 0.12)
+    snare = (0.6 * rng.standard_normal(beatLen) + 0.4 * np.sin(2 * np.pi * 180 * t)) * np.exp(-t / 0.08)
+    hat = np.diff(rng.standard_normal(beatLen + 1)) * 0.3 * np.exp(-t / 0.02)
+    for beat, start in enumerate(range(0, noSamples, beatLen)):
+        end = min(start + beatLen, noSamples)
+        loop[start:end] += kick[:end - start]
+        if beat % 2:
+            loop[start:end] += snare[:end - start]
+        for hatStart in (start, start + beatLen // 2):
+            hatEnd = min(hatStart + beatLen, noSamples)
+            loop[hatStart:hatEnd] += hat[:max(0, hatEnd - hatStart)]
+    return 0.8 * loop / np.max(np.abs(loop))
+
+SIGNALS = {'sweep': sineSweep, 'pink': pinkNoise, 'drums': drumLoop}
+
+def latencyStats(samples):
+    samples = np.asarray(samples) * 1e6
+    return {'calls': int(samples.size), 'mean_us': float(np.mean(samples)), 'p50_us': float(np.percentile(samples, 50)),
+            'p95_us': float(np.percentile(samples, 95)), 'max_us': float(np.max(samples))}
+
+def benchStages(config, signal, noFrames=400):
+    """Per call latency of every render and output stage for one configuration, fed with a synthetic signal
+
+    sendToESP submits to a sender thread that writes to a local socket,
+    espEncode times the packet encoder on its own.
+    """
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    preferences = dict(defaultPreferences)
+    preferences.update(config)
+    preferences.update({'activeDevice': 'ESP 8266', 'espUDPIP': '127.0.0.1', 'espUDPPort': receiver.getsockname()[1], 'espOutputMap': '', 'noStars': max(10, config['noPixels'] // 15)})
+    ce = chromaEngine(preferences, prefFile=tempfile.gettempdir() + '/chromatizer-bench/preferences.json', liveOutput=False)
+    ce.refreshAnalysis(SAMPLE_RATE)
+    ce.audioRing = audioRing(ce.noFrames, preferences['audioRoll'], preferences['tgtFPS'])
+    ce.displayFunction = ce.sendToESP
+    ce.configureOutput()
+    encoder = espEncoder(preferences['noPixels'])
+
+    audio = (SIGNALS[signal](noFrames * ce.noFrames / SAMPLE_RATE + 1) * 2**15).astype(np.int16)
+    melFrame = []
+    ce.audioStripDisplay = melFrame.append
+    timings = {stage: [] for stage in STAGES}
+    displays = {'scrollDisplay': ce.scrollDisplay, 'energyDisplay': ce.energyDisplay, 'spectrumDisplay': ce.spectrumDisplay}
+
+    def timed(stage, func, *args):
+        start = perf_counter()
+        result = func(*args)
+        timings[stage].append(perf_counter() - start)
+        return result
+
+    for frameNo in range(noFrames):
+        ce.audioRing.write(audio[frameNo * ce.noFrames : (frameNo + 1) * ce.noFrames])
+        melValues = timed('analysis', ce.analyseAudio, ce.audioRing.window())
+        melFrame.clear()
+        timed('melSmoothing', ce.renderMel, melValues)
+        for stage, display in displays.items():
+            timed(stage, display, melFrame[0])
+        timed('stripTwinkle', ce.stripTwinkle)
+        timed('stripRainbow', ce.stripRainbow)
+        timed('sendToESP', ce.sendToESP)
+        timed('espEncode', encoder.encode, ce.outputPixels(False))
+
+    ce.closeActions()
+    receiver.close()
+    return [dict(config=config, signal=signal, stage=stage, **latencyStats(timings[stage])) for stage in STAGES]
+
+def sweepConfigs(fullGrid=False):
+    """One parameter at a time around the base configuration, or every combination with fullGrid"""
+    base = {key: values[0] for key, values in SWEEP.items()}
+    if fullGrid:
+        return [dict(zip(SWEEP.keys(), combo)) for combo in itertools.product(*SWEEP.values())]
+    configs = [base]
+    for key, values in SWEEP.items():
+        for value in values[1:]:
+            configs.append(dict(base, **{key: value}))
+    return configs
+
+def runSuite(signals=tuple(SIGNALS), fullGrid=False, noFrames=400):
+    results = []
+    for config in sweepConfigs(fullGrid):
+        for signal in signals:
+            results += benchStages(config, signal, noFrames)
+    return {'timestamp': strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'platform': platform.platform(), 'noFrames': noFrames, 'results': results}
+
+def resultKey(result):
+    return (json.dumps(result['config'], sort_keys=True), result['signal'], result['stage'])
+
+def compareSuites(baseline, current):
+    """p50 ratio current / baseline for every stage measured in both runs"""
+    baseResults = {resultKey(result): result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        base = baseResults.get(resultKey(result))
+        if base is not None:
+            rows.append(dict(result['config'], signal=result['signal'], stage=result['stage'], base_p50=base['p50_us'], p50=result['p50_us'], ratio=result['p50_us'] / max(base['p50_us'], 1e-9)))
+    return rows
+
+def benchMelProjection(noFFTs=(32, 64, 128), sampleRate=44100, tgtFPS=80, audioRoll=2, minFreq=100, maxFreq=12000):
+    """Dense per frame mel product (previous audioEffect path) against the sparse projection"""
+    audioLen = (sampleRate // tgtFPS) * audioRoll
+    noBins = audioLen // 2
+    spectrum = np.abs(np.random.default_rng(0).standard_normal(noBins)).astype(np.float32)
+    results = []
+    for noFFT in noFFTs:
+        melBank = melFilterBank(sampleRate, audioLen, noFFT, minFreq, maxFreq)
+        melProj = melProjection(melBank, noBins)
+
+        def densePath():
+            melValues = np.atleast_2d(spectrum).T * melBank[:, :noBins].T
+            return np.sum(melValues, axis=0)
+
+        def sparsePath():
+            return melProj.project(spectrum)
+
+        assert np.allclose(densePath(), sparsePath(), rtol=1e-4, atol=1e-6)
+        results.append({'noFFT': noFFT, 'nonZero': melProj.matrix.nnz, 'dense_us': timeCall(densePath), 'sparse_us': timeCall(sparsePath)})
+    return results
+
+def benchSpectrum(windowLens=(1102, 2048, 4410), batchSizes=(1, 8, 40), workers=(1, -1)):
+    """Window, np.pad and np.fft.rfft per frame (previous analyseAudio path) against the planned spectrum, one frame and a catch-up batch"""
+    rng = np.random.default_rng(0)
+    results = []
+    for windowLen in windowLens:
+        for batchSize in batchSizes:
+            frames = rng.standard_normal((batchSize, windowLen)).astype(np.float32)
+            window = np.hamming(windowLen).astype(np.float32)
+
+            def paddedPath():
+                nFFT = 2**int(np.ceil(np.log2(windowLen)))
+                return [np.abs(np.fft.rfft(np.pad(frame * window, (0, nFFT - windowLen), mode='constant'))[:windowLen // 2]) for frame in frames]
+
+            for workerCount in workers:
+                plan = spectrumPlan(windowLen, workerCount)
+                maxDiff = float(np.abs(plan.magnitudes(frames) - np.array(paddedPath())).max())
+                results.append({'windowLen': windowLen, 'frames': batchSize, 'workers': workerCount, 'padded_us': timeCall(paddedPath, number=200),
+                                'plan_us': timeCall(lambda: plan.magnitudes(frames), number=200), 'maxDiff': '%.1e' % maxDiff})
+    return results
+
+def benchEspEncoder(noPixelsList=(150, 300, 600, 1000)):
+    """Per pixel list/bytes packing (previous sendToESP path) against the vectorized encoder, every pixel changing"""
+    rng = np.random.default_rng(0)
+    results = []
+    for noPixels in noPixelsList:
+        frames = [rng.integers(0, 256, (3, noPixels)) for i in range(2)]
+        encoder = espEncoder(noPixels)
+        state = {'frameNo': 0, 'prevPixels': np.tile(253.0, (3, noPixels))}
+
+        def listPath():
+            p = frames[state['frameNo'] % 2]
+            state['frameNo'] += 1
+            idx = [i for i in range(noPixels) if not np.array_equal(p[:, i], state['prevPixels'][:, i])]
+            packets = []
+            for packetIndices in np.array_split(idx, len(idx) // MAX_PIXELS_PER_PACKET + 1):
+                m = []
+                for i in packetIndices:
+                    # Wrapped like the vectorized encoder so long strips can be timed
+                    m.extend((i % 256, p[0][i], p[1][i], p[2][i]))
+                packets.append(bytes(m))
+            state['prevPixels'] = np.copy(p)
+            return packets
+
+        def vectorPath():
+            p = frames[state['frameNo'] % 2]
+            state['frameNo'] += 1
+            return encoder.encode(p)
+
+        results.append({'noPixels': noPixels, 'list_us': timeCall(listPath, number=50), 'vector_us': timeCall(vectorPath, number=2000)})
+    return results
+
+def benchProtocols(noPixelsList=(150, 300, 600, 1000)):
+    """Packets and bytes per full frame and encode time for the ESP8266, DDP and E1.31 encoders"""
+    rng = np.random.default_rng(0)
+    results = []
+    for noPixels in noPixelsList:
+        pixels = rng.integers(0, 256, (3, noPixels)).astype(np.uint8)
+        for name, encoder in [('esp', espEncoder(noPixels)), ('ddp', ddpEncoder(noPixels)), ('e131', e131Encoder(noPixels))]:
+            packets = encoder.encode(pixels, refresh=True)
+            results.append({'noPixels': noPixels, 'protocol': name, 'packets': len(packets), 'bytes': sum(len(packet) for packet in packets),
+                            'encode_us': timeCall(lambda: encoder.encode(pixels, refresh=True))})
+    return results
+
+def benchExpFilter(sizes=(32, 75, 300)):
+    """Allocating expFilter update (previous implementation) against the in-place filter and a 2 filter bank"""
+    rng = np.random.default_rng(0)
+    results = []
+    for size in sizes:
+        inputs = [rng.random(size) for i in range(2)]
+        state = {'value': np.tile(0.01, size), 'frameNo': 0}
+        inPlace = expFilter(np.tile(0.01, size), alpha_decay=0.1, alpha_rise=0.5)
+        pair = [expFilter(np.tile(0.01, size), alpha_decay=0.99, alpha_rise=0.01), expFilter(np.tile(0.01, size), alpha_decay=0.1, alpha_rise=0.5)]
+        bank = expFilterBank(np.tile(0.01, (2, size)), alpha_decay=[0.99, 0.1], alpha_rise=[0.01, 0.5])
+
+        def allocating():
+            value = inputs[state['frameNo'] % 2]
+            state['frameNo'] += 1
+            alpha = value - state['value']
+            alpha[alpha > 0.0] = 0.5
+            alpha[alpha <= 0.0] = 0.1
+            state['value'] = alpha * value + (1.0 - alpha) * state['value']
+
+        def pairUpdate():
+            value = inputs[state['frameNo'] % 2]
+            state['frameNo'] += 1
+            for flt in pair:
+                flt.update(value)
+
+        results.append({'size': size, 'allocating_us': timeCall(allocating), 'inPlace_us': timeCall(lambda: inPlace.update(inputs[0])),
+                        'twoFilters_us': timeCall(pairUpdate), 'bankOfTwo_us': timeCall(lambda: bank.update(inputs[0]))})
+    return results
+
+def benchTwinkle(fields=((10, 150), (100, 300), (1000, 1000), (5000, 1000))):
+    """One object per star (previous stripTwinkle path) against the array star field, stepping and drawing one frame"""
+    from random import randrange
+    results = []
+    for noStars, noPixels in fields:
+        stars = []
+        for i in range(noStars):
+            life = randrange(1, int(starLifeMap(30)))
+            stars.append({'pos': randrange(1, noPixels), 'age': randrange(0, life), 'life': life, 'tgtClr': [randrange(0, 255), randrange(0, 150), randrange(0, 255)], 'clr': [0.0, 0.0, 0.0]})
+
+        def objectPath():
+            pixels = np.tile(0.0, (3, noPixels))
+            for star in stars:
+                if star['age'] == star['life']:
+                    star.update(age=0, pos=randrange(1, noPixels), life=randrange(1, int(starLifeMap(30))), tgtClr=[randrange(0, 255), randrange(0, 150), randrange(0, 255)], clr=[0.0, 0.0, 0.0])
+                star['age'] += 1
+                if star['age'] < star['life']//3:
+                    star['clr'] = [star['clr'][i] + 3*star['tgtClr'][i]/star['life'] for i in [0, 1, 2]]
+                elif star['age'] > 2 * star['life']//3:
+                    star['clr'] = [star['clr'][i] - 3*star['tgtClr'][i]/star['life'] for i in [0, 1, 2]]
+                pixels[:, star['pos']] = star['clr']
+            return pixels
+
+        field = starField(noStars, noPixels, 30, 255, 150, 255, seed=0)
+        pixels = np.zeros((3, noPixels))
+
+        def arrayPath():
+            field.starLife(noPixels, 30, 255, 150, 255)
+            pixels.fill(0.0)
+            field.render(pixels)
+
+        number = max(10, 20000 // noStars)
+        results.append({'noStars': noStars, 'noPixels': noPixels, 'objects_us': timeCall(objectPath, number=number), 'arrays_us': timeCall(arrayPath, number=number)})
+    return results
+
+def benchBlur(lengths=(75, 150, 500), sigmas=(0.2, 1.5, 4.0)):
+    """gaussian_filter1d per colour channel (previous effects) against one blur call with a cached kernel"""
+    rng = np.random.default_rng(0)
+    results = []
+    for length in lengths:
+        pixels = rng.random((3, length)) * 255
+        output = np.zeros_like(pixels)
+        for sigma in sigmas:
+            def perChannel():
+                for color in range(3):
+                    output[color, :] = gaussian_filter1d(pixels[color, :], sigma=sigma)
+            results.append({'length': length, 'sigma': sigma, 'perChannel_us': timeCall(perChannel), 'blur_us': timeCall(lambda: blur(pixels, sigma, output))})
+    return results
+
+def benchRainbow(lengths=(75, 150, 500), paletteSizes=(625, 1024, 4096), noFrames=2000):
+    """colorsys plus scipy interp1d per frame (previous stripRainbow) against a hue wheel lookup, with the largest colour difference"""
+    from colorsys import hsv_to_rgb
+    from scipy.interpolate import interp1d
+    scipySpeedMap = interp1d([0, 100], [80, 0])
+    results = []
+    for length in lengths:
+        for paletteSize in paletteSizes:
+            reference = np.zeros((3, length))
+            pixels = np.zeros((3, length))
+            state = {'hue': 0.0}
+
+            def colorsysPath():
+                int(scipySpeedMap(75))
+                state['hue'] = (state['hue'] + RAINBOW_STEP) % 1.0
+                cycValue = hsv_to_rgb(state['hue'], 1.0, 1.0)
+                reference[:, 1:] = reference[:, :-1]
+                for color in range(3):
+                    reference[color, 0] = int(np.interp(cycValue[color], [0, 1], [0, 60]))
+
+            def palettePath():
+                speedMap(75)
+                wheel = hueWheel(paletteSize, 1.0, 1.0, 60)
+                pixels[:, 1:] = pixels[:, :-1]
+                pixels[:, 0] = wheel[:, int(state['hue'] * paletteSize + 0.5) % paletteSize]
+
+            maxDiff = 0.0
+            for frame in range(noFrames):
+                colorsysPath()
+                palettePath()
+                maxDiff = max(maxDiff, float(np.abs(pixels - reference).max()))
+            results.append({'length': length, 'paletteSize': paletteSize, 'colorsys_us': timeCall(colorsysPath), 'palette_us': timeCall(palettePath), 'maxDiff': maxDiff})
+    return results
+
+def benchColorCorrection(lengths=(150, 300, 600, 1000), brightness=90):
+    """Float brightness, int cast and gamma indexing (previous outputPixels) against the fused uint8 table, with the largest difference
+
+    colorCorrection.apply() makes two passes over the frame: the brightness
+    multiply cast straight into the int index, then one np.take per channel
+    that also clips. The old path makes five and allocates four temporaries.
+    """
+    rng = np.random.default_rng(0)
+    gamma = np.tile(gammaDefault, (3, 1)).astype(np.uint8)
+    results = []
+    for length in lengths:
+        pixels = rng.random((3, length)) * 255
+        correction = colorCorrection()
+        correction.set(brightness, gamma)
+
+        def floatPath():
+            tmpPixels = np.clip(pixels * brightness / 100, 0, 255).astype(int)
+            return gammaDefault[tmpPixels]
+
+        maxDiff = int(np.abs(correction.apply(pixels).astype(int) - floatPath()).max())
+        results.append({'length': length, 'float_us': timeCall(floatPath), 'table_us': timeCall(lambda: correction.apply(pixels)), 'maxDiff': maxDiff})
+    return results
+
+def checkDtypeParity(dtypes=('float32',), signals=tuple(SIGNALS), seconds=10.0, noPixels=300, displays=('scrollDisplay', 'energyDisplay', 'spectrumDisplay')):
+    """Largest and mean difference of the LED output from the float64 pipeline, with the render time per frame
+
+    Compared after brightness with gamma off, where one level of drift in
+    the frame is one level out. Gamma can stretch that to a few levels at
+    the top of its curve.
+    """
+    results = []
+    for display in displays:
+        for signal in signals:
+            samples = SIGNALS[signal](seconds).astype(np.float32)
+            outputs = {}
+            for dtype in ('float64',) + tuple(dtypes):
+                preferences = dict(defaultPreferences, noPixels=noPixels, pipelineDtype=dtype, energyDisplay=display == 'energyDisplay',
+                                   scrollDisplay=display == 'scrollDisplay', spectrumDisplay=display == 'spectrumDisplay')
+                ce = chromaEngine(preferences, prefFile=tempfile.gettempdir() + '/chromatizer-bench/preferences.json', liveOutput=False)
+                start = perf_counter()
+                frames = [np.copy(ce.outputPixels(False)) for levels in iterRender(ce, samples, SAMPLE_RATE)]
+                outputs[dtype] = (np.array(frames, dtype=np.int16), (perf_counter() - start) / len(frames) * 1e6)
+            reference, referenceTime = outputs['float64']
+            for dtype in dtypes:
+                diff = np.abs(outputs[dtype][0] - reference)
+                results.append({'display': display, 'signal': signal, 'dtype': dtype, 'maxDiff': int(diff.max()), 'meanDiff': float(diff.mean()),
+                                'float64_us': referenceTime, 'frame_us': outputs[dtype][1]})
+    return results
+
+def checkMelParity(noFFTs=(32, 64, 128), sampleRate=44100, tgtFPS=80, audioRoll=2, minFreq=100, maxFreq=12000):
+    """Largest deviation of the built-in mel functions from librosa, skipped when librosa is not installed"""
+    try:
+        import librosa
+    except ImportError:
+        return []
+    audioLen = (sampleRate // tgtFPS) * audioRoll
+    results = []
+    for noFFT in noFFTs:
+        bankError = np.max(np.abs(melFilterBank(sampleRate, audioLen, noFFT, minFreq, maxFreq) - librosa.filters.mel(sr=sampleRate, n_fft=audioLen, n_mels=noFFT, fmin=minFreq, fmax=maxFreq)))
+        frqError = np.max(np.abs(melFrequencies(noFFT, minFreq, maxFreq) - librosa.mel_frequencies(n_mels=noFFT, fmin=minFreq, fmax=maxFreq, htk=False)))
+        assert bankError < 1e-6 and frqError < 1e-6, 'Mel filter bank differs from librosa'
+        results.append({'noFFT': noFFT, 'bankError': float(bankError), 'frqError': float(frqError)})
+    return results
+
+def printTable(title, results):
+    print(title)
+    if not results:
+        print('No results\n')
+        return
+    keys = list(results[0].keys())
+    cells = [[('%.3g' % row[key]) if isinstance(row[key], float) else str(row[key]) for key in keys] for row in results]
+    widths = [max(12, len(key) + 2, *(len(line[i]) + 2 for line in cells)) for i, key in enumerate(keys)]
+    print(''.join(key.rjust(width) for key, width in zip(keys, widths)))
+    for line in cells:
+        print(''.join(cell.rjust(width) for cell, width in zip(line, widths)))
+    print()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Chromatizer benchmarks')
+    parser.add_argument('--suite', action='store_true', help='Time every render and output stage over a parameter sweep.')
+    parser.add_argument('--grid', action='store_true', help='Sweep every combination of parameters instead of one at a time.')
+    parser.add_argument('--signals', default=','.join(SIGNALS), help='Synthetic signals to use: ' + ', '.join(SIGNALS) + '.')
+    parser.add_argument('--frames', type=int, default=400, help='Frames rendered per configuration and signal.')
+    parser.add_argument('--out', help='Write the suite results to this json file.')
+    parser.add_argument('--compare', help='Suite results json of an earlier version to compare against.')
+    args = parser.parse_args(argv)
+
+    if not args.suite:
+        melParity = checkMelParity()
+        if melParity:
+            printTable('Mel filter bank parity with librosa', melParity)
+        printTable('Magnitude spectrum (analyseAudio)', benchSpectrum())
+        printTable('Mel projection (audioEffect)', benchMelProjection())
+        printTable('ESP8266 packet encoding (sendToESP)', benchEspEncoder())
+        printTable('Full frame per output protocol', benchProtocols())
+        printTable('Exponential filter update', benchExpFilter())
+        printTable('Twinkle star field step (stripTwinkle)', benchTwinkle())
+        printTable('Strip blur', benchBlur())
+        printTable('Rainbow frame (stripRainbow)', benchRainbow())
+        printTable('Brightness, gamma and white balance (outputPixels)', benchColorCorrection())
+        printTable('Pipeline dtype, LED output compared with float64', checkDtypeParity())
+        return 0
+
+    suite = runSuite(args.signals.split(','), args.grid, args.frames)
+    rows = [dict(result['config'], signal=result['signal'], stage=result['stage'], p50_us=result['p50_us'], p95_us=result['p95_us']) for result in suite['results']]
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(suite, f, indent=1)
+    printTable('Stage latency', rows)
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            printTable('Compared with ' + args.compare, compareSuites(json.load(f), suite))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,19 @@ Revision History   : 0
 
 """
 
-import PySimpleGUI as sg, os, sys
+import os, sys
+
+# Headless mode never touches PySimpleGUI, Tk or matplotlib
+if __name__ == "__main__" and '--headless' in sys.argv[1:]:
+    from engine import headlessMain
+    sys.exit(headlessMain(sys.argv[1:]))
+
+# A frozen build starts the DSP worker process through this script
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+import PySimpleGUI as sg
 
 def resource_path(relative_path):
     if hasattr(sys, '_MEIPASS'):
@@ -21,133 +33,46 @@ signatureImage=b'iVBORw0KGgoAAAANSUhEUgAAAOIAAAAtCAYAAACzrre2AAAAGXRFWHRTb2Z0d2F
 heartIcon = b'iVBORw0KGgoAAAANSUhEUgAAADAAAAAwCAMAAABg3Am1AAAC91BMVEVHcEzgAB/gAC3gACbgAB3gACjgACPgACDgAC7gACXgACngACzgACHgAB7gACThACzgACLgACfgACrgACvhACnhAC3gABrgABzhACHhACvDBBfhACfhACq1AhTBBRe/BRjCBRjhACDABRnhAC7HBBnIBBnhABzCAhbLABfhABrhACThACXhACa/BRfhABm/BhfGBBjLABfNAxvhABq9BBa+BRfKAxvFBBjXARvABRfgABrIABfhABq9AhXiBzLgABrhABvhABvhABrAABa+Bhe3ARWYBBLdABjHBBfJAxfhABnLABfgABnbARrhABvZARnhABreABm8ABXLABfcAB/aARvPAxrgABrABRfgABrhABnhABu/Bhe+BhfNAxncABrMAx3hABrhABvSAhrIAxe/BhfRAhnhABq/BhfhABq+BhfgABrgABy/Bhe/BhfEBBfNAxjHBBjBBRfhABm/BhfBBRfeABngABrhABq+BRe+BhfABRfVAhvfAB7ABRe+BRfKBBnEBBvMABe+BRfIBBzdACO6BRbQAh26BRbhABy+BRe/BRe4BRbABRe9BRfABRe/BRfABRfgABvhABrhABriEDriCTDjCzToPFfgABrhByfoPVzlIkXmM07nNVPtaH/hABzgABngABviEDHhABrgABzkEzrgABrhABrgABrpS2rlIkngAB3oPV/udozhASTnOlzpRWHgABrhABvfABnjFz7oP1/aABnhAC3hAC7hACjhACbhACrhACfhACThAB/hACDhACXhACLhACzhACnhAB7hACHhACvhACPhAB3hAC/ABRjNAxvhABzTAh7FBBjBBRfGBBrhABvgACTVAR7MAxvQAh/HBBnfABzCBRnIBBnQAhrWARzZARvrVG3tbYbxkKHiACLdABzTAhzKAxrBBRnOAx7aASLeAB3iACrlIkHoQWHlIkPoPF3hBCTpSWPnOlbqTWfjFDTtaYDpQ2DrWnbtZX7oQFzudIvwg5foO1jjEDLtZnss0eyBAAAAuHRSTlMA/v7+/v7+/v7+/v7+/v7+/v7+/v7+/v7+/v7+/gL+/v7+/v7+/v4GH/7+/v6YGPn+Ef60FSj+/v7lqgRCBf7ly5uaAV4BBwhcDxsVEvLroKgQARP+/v6ms7E21ccz9/7+ouH+N/OFz8yddyTawoGdX+K5OtS2g+fZYC/0/v7aIv7+B4v+/hL+Df0qVArOHOih4uJ/R/7+/v6O/v7+/v7+9CbH/l/n/nF9MP7+/f7+/v7+a70S/v4L42Mh3gAAAxlJREFUSMftlVVQG2EQx+OXy0UuDkmDBKtADVqsQqm7u1F395a6u7u7u10uckkuBhRoCxRK3d1dHvpd6EsPKbx2unMv38z+Znb/u/s/BuN//BNRrXzz+n8827crIftw4prF6aGt2tQqeHYbUrfC1QqT+owrJv1i4jEmJPTxgZicyMoMRtvOKjUHhFqlimtRVP65BAK1wEZjuM2CEn2HVe7uYyEgK0GIUtJVk5sVztedtf68+7mcyaRw4GyLdXiCXWG3o3a7CyKc6quDGhcCzohOnr5wHkEQX7lMwIWhQEW4GBaLxTxUyBSpVRPp+bXrur5/PUXyMUyJkXITDnvMWrOZbbRZeHYr05nesikNqCX6cffOcYyfaggyYCzSxDXiXByXmo02sccFOVN6N6EBh6Av3z4dNfBTUwHDx0iZwyFwOLhewA4RKR1H0YBE4e0TR9bzf0cQC5HLQCtcKRsWo0IgdMwEGlBPePvOizpYkMHANxhYBgwh3TIHLvX2QJXUqQsNWAu9/fCqDqYsADAAmAS42Qu4QNN5VSNowDrR3p1bN0qUShYVSglCiUsVBGSFRJzkgCk0IGy/683HA24JJSvGwkjEbeICWW0Wu9BKiPJypy2gD+Kg8/27bSY5SQIGoUZBSQRbPNSkOTeuzy006fg9zO07NpTzlYBAJNS4vQUBhUScmOjYRYWXafeu15teap+5fd1uudstM+Fsb8Ng+W4F+y0tal33hW55rsUdYP/AJ3CYQT2gfifnVr5mVdEHsZkD8dhSgUKhECgEXDbMQ6l6kkM0y5cVDejiUgI9Ni1ObRHXbPNu3dMbIZmrVxR3omGRHOu9ikYj2whGZkGtxPSbObmalTWKP+o5XUMDfSrCcKVKMIwKO2RXn1VVE7ukJNOIb32f6fLwsrLmP8leeOlhSOblGTNLtpmGA/s9yMjIuLbwcU7N/MyAtBFRf3Wm0b2qJyUl1ZwXHB2g94sIK4WX9R8TfOXK7OuP9GkDGpTO/aLG+un1en//wTVK65e6oVX806qMrF0Gi+05vsfUsplyI93/H9O/Fb8AXoYqaqIZr/AAAAAASUVORK5CYII='
 splashImage = resource_path('chromatizer.png')
 
-splashWindow = sg.Window('splash', [[sg.Image(source=splashImage,
-    background_color = None,
-    size = (400, 400),
-    s = (None, None),
-    pad = None,
-    p = None,
-    key = None,
-    k = None,
-    tooltip = None,
-    subsample = None,
-    right_click_menu = None,
-    expand_x = False,
-    expand_y = False,
-    visible = True,
-    enable_events = False,
-    metadata = None)]], no_titlebar=True, grab_anywhere=True, disable_close=True, margins=(0,0), element_padding=0, transparent_color=sg.theme_background_color(), icon=windowIcon, finalize=True)
-splashWindow.Refresh()
-
-import platform, pathlib, numpy as np, pyaudio, librosa, matplotlib.pyplot as plt
+# The DSP worker process imports this script again, only a run of it shows the splash
+if __name__ == "__main__":
+    splashWindow = sg.Window('splash', [[sg.Image(source=splashImage,
+        background_color = None,
+        size = (400, 400),
+        s = (None, None),
+        pad = None,
+        p = None,
+        key = None,
+        k = None,
+        tooltip = None,
+        subsample = None,
+        right_click_menu = None,
+        expand_x = False,
+        expand_y = False,
+        visible = True,
+        enable_events = False,
+        metadata = None)]], no_titlebar=True, grab_anywhere=True, disable_close=True, margins=(0,0), element_padding=0, transparent_color=sg.theme_background_color(), icon=windowIcon, finalize=True)
+    splashWindow.Refresh()
+
+import matplotlib.pyplot as plt
 from scipy.interpolate import interp1d
-from scipy.ndimage import gaussian_filter1d
 from math import ceil
-from time import time, sleep
-from colorsys import hsv_to_rgb
-from random import randrange
-# from threading import Thread, Timer
+from time import time
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from engine import chromaEngine, defaultPreferences, getPrefFile, preferenceDict, writePreferences, debugPrint
+from outputs import parseOutputMap
 
-debugOn = False
 colorMap = {'W':'white', 'K':'black', 'R':'red', 'G':'green', 'B':'blue', 'C':'cyan', 'Y':'yellow', 'M':'magenta', 'S':'#C0C0C0', 'D':'#808080', 'O':'#FF5F1F'}
-gammaDefault =  np.array([  0,   0,   0,   0,   0,   0,   0,   0,   0,   0,   0,   0,   1,   1,   1,   1,   1,   1,   1,   1,   2,   2,   2,   2,   2,   2,   3,   3,   3,   3,   4,   4,   4,   4,   5,   5,   5,   5,   6,   6,   6,   7,   7,   7,   8,   8,   8,   9,   9,   9,  10,  10,
-                            11,  11,  11,  12,  12,  13,  13,  14,  14,  15,  15,  16,  16,  17,  17,  18,  18,  19,  19,  20,  20,  21,  21,  22,  23,  23,  24,  24,  25,  26,  26,  27,  28,  28,  29,  30,  30,  31,  32,  32,  33,  34,  35,  35,  36,  37,  38,  38,  39,  40,  41,  42,
-                            42,  43,  44,  45,  46,  47,  47,  48,  49,  50,  51,  52,  53,  54,  55,  56,  56,  57,  58,  59,  60,  61,  62,  63,  64,  65,  66,  67,  68,  69,  70,  71,  73,  74,  75,  76,  77,  78,  79,  80,  81,  82,  84,  85,  86,  87,  88,  89,  91,  92,  93,  94,
-                            95,  97,  98,  99, 100, 102, 103, 104, 105, 107, 108, 109, 111,  112, 113, 115, 116, 117, 119, 120, 121, 123, 124, 126, 127, 128, 130, 131, 133, 134, 136, 137, 139, 140, 142, 143, 145, 146, 148, 149, 151, 152, 154, 155, 157, 158, 160, 162, 163, 165, 166, 168,
-                            170, 171, 173, 175, 176, 178, 180, 181, 183, 185, 186, 188, 190, 192, 193, 195, 197, 199, 200, 202, 204, 206, 207, 209, 211, 213, 215, 217, 218, 220, 222, 224, 226, 228, 230, 232, 233, 235, 237, 239, 241, 243, 245, 247, 249, 251, 253, 255])
-
-_is_python_2 = int(platform.python_version_tuple()[0]) == 2
 runThread = True
-speedMap = interp1d([0, 100], [80, 0])
-starLifeMap = interp1d([5, 45], [300, 3000])
-
-def getPrefFile() -> pathlib.Path:
-    """
-    Returns a parent directory path
-    where persistent application data can be stored.
-
-    linux: ~/.local/share
-    macOS: ~/Library/Application Support
-    windows: C:/Users/<USER>/AppData/Roaming
-    """
-
-    filePath = pathlib.Path.home()
-
-    if sys.platform == "win32":
-        filePath = filePath / "AppData/Roaming"
-    elif sys.platform == "linux":
-        filePath = filePath / ".local/share"
-    elif sys.platform == "darwin":
-        filePath = filePath / "Library/Application Support"
-    
-    return filePath / "chromatizer/preferences.json"
-
-def debugPrint(*args):
-    if debugOn:
-        print(*args)
-        print('\n')
 
 def getPrefName(text):
     return sg.T(text, size=(18,1), justification='left')
 
-def interpolate(y, new_length):
-    """Intelligently resizes the array by linearly interpolating the values
-
-    Parameters
-    ----------
-    y : np.array
-        Array that should be resized
-
-    new_length : int
-        The length of the new interpolated array
-
-    Returns
-    -------
-    z : np.array
-        New array with length of new_length that contains the interpolated
-        values of y.
-    """
-    if len(y) == new_length:
-        return y
-    x_old = np.linspace(0, 1, len(y))
-    x_new = np.linspace(0, 1, new_length)
-    return np.interp(x_new, x_old, y)
-
 def draw_figure(canvas, figure):
     figure_canvas_agg = FigureCanvasTkAgg(figure, canvas)
     figure_canvas_agg.draw()
     figure_canvas_agg.get_tk_widget().pack(side='top', fill='both', expand=1)
     return figure_canvas_agg
 
-class expFilter:
-    """Simple exponential smoothing filter"""
-    def __init__(self, val=0.0, alpha_decay=0.5, alpha_rise=0.5):
-        """Small rise / decay factors = more smoothing"""
-        assert 0.0 < alpha_decay < 1.0, 'Invalid decay smoothing factor'
-        assert 0.0 < alpha_rise < 1.0, 'Invalid rise smoothing factor'
-        self.alpha_decay = alpha_decay
-        self.alpha_rise = alpha_rise
-        self.value = val
-
-    def update(self, value):
-        if isinstance(self.value, (list, np.ndarray, tuple)):
-            alpha = value - self.value
-            alpha[alpha > 0.0] = self.alpha_rise
-            alpha[alpha <= 0.0] = self.alpha_decay
-        else:
-            alpha = self.alpha_rise if value > self.value else self.alpha_decay
-        self.value = alpha * value + (1.0 - alpha) * self.value
-        return self.value
-    
-    def updateDecay(self, value):
-        self.alpha_decay = value
-
-def getCloser(array, searchItem):
-    absolute_val_array = np.abs(array - searchItem)
-    smallest_difference_index = absolute_val_array.argmin()
-    return array[smallest_difference_index[0]]
-
 class graphSlider():
     graph = []
     figuresOfInterest = ()
@@ -244,120 +169,25 @@ class graphSlider():
 
         self.frqGap = ceil(((sliderRange[1] - sliderRange[0])/(self.areaOfInterest[1] - self.areaOfInterest[0]))*(self.graph.get_bounding_box( self.points[0])[1][0] - self.graph.get_bounding_box(self.points[0])[0][0]))
         
-def clamp(n, minVal, maxVal):
-    return max(min(maxVal, n), minVal)
-
-class littleStar():
-    age = []
-    pos = []
-    tgtClr = [] # [r, g, b]
-    life = []
-    clr = []
-
-    def newSpawn(self, noPixels, starMaxLife, starRed, starGreen, starBlue):
-        self.age = 0
-        self.pos = randrange(1, noPixels)
-        self.tgtClr = [randrange(0, starRed), randrange(0,starGreen), randrange(0,starBlue)]
-        self.clr = [0.0, 0.0, 0.0]
-        self.life = randrange(0,int(starLifeMap(starMaxLife)))
-        debugPrint("Star Position: " + str(self.pos) + " :  lifeSpan: " + str(self.life) + " :  target Colour: " + str(self.tgtClr) + " :  current Colour: " + str(self.clr) + "\n")
-
-    def starLife(self, noPixels, starMaxLife, starRed, starGreen, starBlue):
-        if self.age == self.life:
-            debugPrint("End: Star Position: " + str(self.pos) + " :  lifeSpan: " + str(self.life) + "\n")
-            self.newSpawn(noPixels, starMaxLife, starRed, starGreen, starBlue)
-
-        self.age = self.age + 1
-        if self.age < self.life//3:
-            self.clr = [self.clr[i] + 3*self.tgtClr[i]/self.life for i in [0, 1, 2]]
-        elif self.age > 2 * self.life//3:
-            self.clr = [self.clr[i] - 3*self.tgtClr[i]/self.life for i in [0, 1, 2]]
-
-        # self.clr = [clamp(i, 0, 255) for i in self.clr]
-
-        debugPrint("Star Position: " + str(self.pos) + " :  lifeSpan: " + str(self.life) + " :  Age: " + str(self.age) + " :  target Colour: " + str(self.tgtClr) + " :  current Colour: " + str(self.clr) + "\n")
-        
-    def __init__(self, noPixels, starMaxLife, starRed, starGreen, starBlue):
-        self.newSpawn(noPixels, starMaxLife, starRed, starGreen, starBlue)
-        
-
-class chromatizer():
-
-    pa = pyaudio.PyAudio()
-    audioDevices = {}
-    window = []
-    freqSlider = []
-    displayEffect = []
-    activeDevice = []
-    audioStream = []
-    noFrames = []
-    audioSampleRate = []
-    audioDataRoll = []
-    hammingWindow = []
-    readTimeout = None
-    melFrq = []
-    commSoc = []
-    melBank = []
-    displayRefresh = [False, False] # 0 idx - flag to clear strip and 1 idx - condition to set the flag
-    twinkleStars = []
 
+def loadPreferences():
+    """Preferences file of the GUI, preferences added since it was written take their defaults"""
     preferences = sg.UserSettings(filename=str(getPrefFile()))
-
     if sg.user_settings_file_exists(str(getPrefFile())):
         preferences.load()
+        for prefKey, prefValue in defaultPreferences.items():
+            if prefKey not in preferences.get_dict():
+                preferences[prefKey] = prefValue
     else:
-        preferences['audioDevice'] =  '--Refresh Audio Devices--'
-        preferences['stripSaver'] = 'None'
-        preferences['energyDisplay'] = False
-        preferences['scrollDisplay'] = True
-        preferences['spectrumDisplay'] = False
-        preferences['displayEffect'] = 'Audio'
-        preferences['colorOrder'] = 'BRG'
-        preferences['brightness'] = 90
-        preferences['dispFPS'] = False
-        preferences['noPixels'] = 150
-        preferences['tgtFPS'] = 80 
-        preferences['noFFT'] = 32
-        preferences['gainLimit'] = 0.9
-        preferences['volTol'] = 0.0001
-        preferences['audioRoll'] = 2
-        preferences['adAudio'] = 0.9
-        preferences['adGain'] = 0.5
-        preferences['adLED'] = 0.5
-        preferences['gammaTable'] = 'Default'
-        preferences['clrClose'] = True
-        preferences['minFreq'] = 100
-        preferences['lowFreq'] = 720
-        preferences['highFreq'] = 5000
-        preferences['maxFreq'] = 12000
-        preferences['arAudio'] = 0.99
-        preferences['arGain'] = 0.99
-        preferences['arLED'] = 0.9
-        preferences['espUDPIP'] = '192.168.0.150'
-        preferences['espUDPPort'] = 7777
-        preferences['espSoftGamma'] = False
-        preferences['rpLEDPin'] = 18
-        preferences['rpLEDFreq'] = 800000
-        preferences['rpLEDdma'] = 5
-        preferences['rpLEDInvert'] = False
-        preferences['rpUseWeb'] = False
-        preferences['rpSoftGamma'] = True
-        preferences['activeDevice'] = 'ESP 8266'
-        preferences['showOutPlot'] = False
-        preferences['showFreqPlot'] = False
-        preferences['showGainPlot'] = False
-        preferences['rainbowSpeed'] = 75
-        preferences['rainbowSat'] = 100
-        preferences['rainbowVal'] = 100
-        preferences['singleRed'] = 255
-        preferences['singleGreen'] = 95
-        preferences['singleBlue'] = 31
-        preferences['start'] = True
-        preferences['starMaxLife'] = 30.0
-        preferences['noStars'] = 10
-        preferences['starRed'] = 255
-        preferences['starGreen'] = 150
-        preferences['starBlue'] = 255
+        for prefKey, prefValue in defaultPreferences.items():
+            preferences[prefKey] = prefValue
+    return preferences
+
+class chromatizer(chromaEngine):
+
+    window = []
+    freqSlider = []
+    guiTimeout = 50 # ms between GUI updates when there are no events
 
     def setupStartButton(self):
         if self.preferences['start']:
@@ -366,300 +196,8 @@ class chromatizer():
         else:
             self.window['_start_'].update(text='Start', button_color='green')
             self.window['_start_'].set_tooltip('Start the show.')
-            self.readTimeout = None
         
     #*  Update available input audio devices in a dictionary 
-    def getAudioDevices(self):
-        debugPrint('in getAudioDevices')
-        info = self.pa.get_host_api_info_by_index(0)
-        numDevices = info.get('deviceCount')
-        self.audioDevices = {}
-        for i in range(0, numDevices):
-            if (self.pa.get_device_info_by_host_api_device_index(0, i).get('maxInputChannels')) > 0:
-                self.audioDevices[self.pa.get_device_info_by_host_api_device_index(0, i).get('name')] = i
-        if self.preferences['audioDevice'] == '--Refresh Audio Devices--' or self.preferences['audioDevice'] not in self.audioDevices.keys():
-            self.preferences['audioDevice'] = self.pa.get_default_input_device_info()['name']
-        self.refreshAudioData()
-    
-    def getFPS(self):
-        """Return the estimated frames per second
-
-        Returns the current estimate for frames-per-second (FPS).
-        FPS is estimated by measured the amount of time that has elapsed since
-        this function was previously called. The FPS estimate is low-pass filtered
-        to reduce noise.
-
-        This function is intended to be called one time for every iteration of
-        the program's main loop.
-
-        Returns
-        -------
-        fps : float
-            Estimated frames-per-second. This value is low-pass filtered
-            to reduce noise.
-        """
-        currTime = time() * 1000.0
-        dt = currTime - self.fpsTime
-        self.fpsTime = currTime
-        if dt == 0.0:
-            return self.fps.value
-        return self.fps.update(1000.0 / dt)
-
-    def sendToESP(self):
-        debugPrint('inSendToESP')
-        tmpPixels = np.copy(np.clip(self.currPixels*self.preferences['brightness']/100, 0, 255).astype(int))
-        p = self.gammaTable[tmpPixels] if self.preferences['espSoftGamma'] else np.copy(tmpPixels)
-        MAX_PIXELS_PER_PACKET = 126
-        # Pixel indices
-        idx = range(self.currPixels.shape[1])
-        if not self.displayRefresh[0]:
-            idx = [i for i in idx if not np.array_equal(p[:, i], self.prevPixels[:, i])]
-        self.displayRefresh[0] = False
-        n_packets = len(idx) // MAX_PIXELS_PER_PACKET + 1
-        idx = np.array_split(idx, n_packets)
-        for packet_indices in idx:
-            m = '' if _is_python_2 else []
-            for i in packet_indices:
-                if _is_python_2:
-                    m += chr(i) + chr(p[0][i]) + chr(p[1][i]) + chr(p[2][i])
-                else:
-                    m.append(i)  # Index of pixel to change
-                    m.append(p[0][i])  # Pixel red value
-                    m.append(p[1][i])  # Pixel green value
-                    m.append(p[2][i])  # Pixel blue value
-            m = m if _is_python_2 else bytes(m)
-            self.commSoc.sendto(m, (self.preferences['espUDPIP'], self.preferences['espUDPPort']))
-        self.prevPixels = np.copy(p)
-
-    def sendToPi(self):
-        debugPrint('inSendToPi')
-
-    def setupDisplayDevice(self):
-        if self.preferences['activeDevice'] == 'ESP 8266':
-            import socket
-            self.commSoc = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            self.displayFunction = self.sendToESP
-        # Raspberry Pi controls the LED strip directly
-        # ! uncomment these later
-        # elif self.preferences['activeDevice'] == 'Raspberry Pi':
-        #     import neopixel
-        #     strip = neopixel.Adafruit_NeoPixel(self.preferences['noPixels'], self.preferences['rpLEDPin'],
-        #                                     self.preferences['rpLEDFreq'], self.preferences['rpLEDdma'],
-        #                                     self.preferences['rpLEDInvert'], self.preferences['rpUseWeb'])
-        #     strip.begin()
-        #     self.displayFunction = self.sendToPi
-
-    def stripClear(self):
-        #time.sleep(.05);
-        debugPrint('inStripClear')
-        if (self.currPixels == np.tile(0, (3, self.preferences['noPixels']))).all() and self.displayRefresh[1]:
-            self.displayRefresh[0] = True
-            self.displayRefresh[1] = False
-
-        tmpPixels = self.currPixels[:, self.preferences['noPixels']//2:]
-        # Scrolling effect window
-        tmpPixels[:, 1:] = tmpPixels[:, :-1]
-        # Create new color originating at the center
-        tmpPixels[0, 0] = 0
-        tmpPixels[1, 0] = 0
-        tmpPixels[2, 0] = 0
-
-        # Update the LED strip
-        # print('R {:.0f} G {:.0f} B {:.0f}'.format(r, g, b))
-        self.currPixels = np.concatenate((tmpPixels[:, ::-1], tmpPixels), axis=1)
-
-    def stripTwinkle(self):
-        debugPrint('inStripTwinkle')
-        self.readTimeout = 10
-        if (self.currPixels != np.tile(0.0, (3, self.preferences['noPixels']))).any() and self.displayRefresh[1]: #Clear the strip and stop when it is cleared
-            self.stripClear()
-            self.displayRefresh[0] = True
-            self.twinkleStars = [littleStar(self.preferences['noPixels'], self.preferences['starMaxLife'], self.preferences['starRed'], self.preferences['starGreen'], self.preferences['starBlue']) for i in range(self.preferences['noStars'])]
-        else:
-            self.displayRefresh[1] = False
-            tmpPixels = np.tile(0.0, (3, self.preferences['noPixels']))
-            for star in self.twinkleStars:
-                star.starLife(self.preferences['noPixels'], self.preferences['starMaxLife'], self.preferences['starRed'], self.preferences['starGreen'], self.preferences['starBlue'])
-                tmpPixels[:, star.pos] = star.clr
-            
-            # Apply blur to smooth the edges and give 'glow'
-            tmpPixels[0, :] = gaussian_filter1d(tmpPixels[0, :], sigma=1.5)
-            tmpPixels[1, :] = gaussian_filter1d(tmpPixels[1, :], sigma=1.5)
-            tmpPixels[2, :] = gaussian_filter1d(tmpPixels[2, :], sigma=1.5)
-
-            self.currPixels = tmpPixels
-            
-
-    def stripRainbow(self):
-        debugPrint('inStripRainbow')
-        self.readTimeout = int(speedMap(self.preferences['rainbowSpeed']))
-
-        tmpPixels = np.copy(self.currPixels[:, self.preferences['noPixels']//2:])
-        
-        self.rainbowFwd = 1 if self.rainbowHue == 0 else 0 if self.rainbowHue == 1 else self.rainbowFwd
-        self.rainbowHue = self.rainbowHue + (self.rainbowFwd*(0.0016)+ (1-self.rainbowFwd)*(-0.0016))
-
-        cycValue = hsv_to_rgb(self.rainbowHue, self.preferences['rainbowSat']/100, self.preferences['rainbowVal']/100)
-        # Scrolling effect window
-        tmpPixels[:, 1:] = tmpPixels[:, :-1]
-        # Create new color originating at the center
-        tmpPixels[0, 0] = int(np.interp(cycValue[0],[0,1],[0,60]))
-        tmpPixels[1, 0] = int(np.interp(cycValue[1],[0,1],[0,60]))
-        tmpPixels[2, 0] = int(np.interp(cycValue[2],[0,1],[0,60]))
-        
-        # print('R {:.0f} G {:.0f} B {:.0f}'.format(r, g, b))
-        # Update the LED strip
-        self.currPixels = np.concatenate((tmpPixels[:, ::-1], tmpPixels), axis=1)
-
-    def scrollDisplay(self, allMelValues):
-        debugPrint('inScrollDisplay')
-        tmpPixels = self.currPixels[:, self.preferences['noPixels']//2:]
-        melValues = np.copy(allMelValues[0])
-        # melValues = melValues**2.0
-        melValues *= 255.0
-
-        valueMap = {}
-        # Color channel mappings
-        valueMap[self.preferences['colorOrder'][2]] = int(np.max(melValues[allMelValues[2] : self.preferences['noFFT']]))
-        valueMap[self.preferences['colorOrder'][1]] = int(np.max(melValues[allMelValues[1] : allMelValues[2]]))
-        valueMap[self.preferences['colorOrder'][0]] = int(np.max(melValues[0 : allMelValues[1]]))
-
-        # Crude beat detection
-        if max(valueMap.values()) - np.max(tmpPixels[:,0:10]) > 10:
-            # print('Value amplified, max value:', max(valueMap.values()), '  diff: ', max(valueMap.values()) - np.max(tmpPixels[:,0:10]))
-            tmpPixels[:,0:10] *= np.arange(0.7,0.4,-0.03)
-            valueMap['R'] = valueMap['R']*1.5
-            valueMap['G'] = valueMap['G']*1.5
-            valueMap['B'] = valueMap['B']*1.5
-
-        # Scrolling values
-        tmpPixels[:, 1:] = tmpPixels[:, :-1]
-        tmpPixels *= 0.98
-        tmpPixels = gaussian_filter1d(tmpPixels, sigma=0.2)
-
-        # Create new color originating at the center
-        tmpPixels[0, 0] = valueMap['R']
-        tmpPixels[1, 0] = valueMap['G']
-        tmpPixels[2, 0] = valueMap['B']
-
-        # Update the LED strip
-        self.currPixels = np.concatenate((tmpPixels[:, ::-1], tmpPixels), axis=1)
-
-    def energyDisplay(self, allMelValues):
-        debugPrint('inEnergyDisplay')
-        tmpPixels = self.currPixels[:, self.preferences['noPixels']//2:]
-        melValues = np.copy(allMelValues[0])
-        # Scale by the width of the LED strip
-        melValues *= float((self.preferences['noPixels'] // 2) - 1)
-
-        valueMap = {}
-        # Color channel mappings
-        scale = 0.94
-        valueMap[self.preferences['colorOrder'][2]] = int(np.mean(melValues[allMelValues[2] : self.preferences['noFFT']])**scale)
-        valueMap[self.preferences['colorOrder'][1]] = int(np.mean(melValues[allMelValues[1] : allMelValues[2]])**scale)
-        valueMap[self.preferences['colorOrder'][0]] = int(np.mean(melValues[0 : allMelValues[1]])**scale)
-
-        maxBrightness = 200.0
-        # Assign color to different frequency regions
-        tmpPixels[0, :valueMap['R']] = maxBrightness
-        tmpPixels[0, valueMap['R']:] = 0.0
-        tmpPixels[1, :valueMap['G']] = maxBrightness
-        tmpPixels[1, valueMap['G']:] = 0.0
-        tmpPixels[2, :valueMap['B']] = maxBrightness
-        tmpPixels[2, valueMap['B']:] = 0.0
-        self.ledFlt.update(tmpPixels)
-        tmpPixels = np.round(self.ledFlt.value)
-
-        # Apply substantial blur to smooth the edges
-        tmpPixels[0, :] = gaussian_filter1d(tmpPixels[0, :], sigma=4.0)
-        tmpPixels[1, :] = gaussian_filter1d(tmpPixels[1, :], sigma=4.0)
-        tmpPixels[2, :] = gaussian_filter1d(tmpPixels[2, :], sigma=4.0)
-
-        # Update the LED strip
-        self.currPixels = np.concatenate((tmpPixels[:, ::-1], tmpPixels), axis=1)
-
-    def spectrumDisplay(self, allMelValues):
-        debugPrint('inSpectrumDisplay')
-        melValues = allMelValues[0]
-        # melValues = melValues**2.0
-
-        melSpectrum = np.copy(interpolate(melValues, self.preferences['noPixels'] // 2))
-        self.currSpectrum.update(melSpectrum)
-        diff = melSpectrum - self.oldSpectrum
-        self.oldSpectrum = np.copy(melSpectrum)
-
-        valueMap = {}
-        # Color channel mappings
-        valueMap[self.preferences['colorOrder'][2]] = self.spectrumDiff.update(melSpectrum - self.currSpectrum.value)
-        valueMap[self.preferences['colorOrder'][1]] = np.abs(diff)
-        valueMap[self.preferences['colorOrder'][0]] = self.oldSpectrumFlt.update(np.copy(melSpectrum))
-
-        # Mirror the color channels for symmetric output
-        r = np.concatenate((valueMap['R'][::-1], valueMap['R']))
-        g = np.concatenate((valueMap['G'][::-1], valueMap['G']))
-        b = np.concatenate((valueMap['B'][::-1], valueMap['B']))
-
-        # Update the LED strip
-        self.currPixels = np.array([r,g,b]) * 255
-
-    def audioEffect(self):
-        debugPrint('inAudioEffect')
-        audioData = np.frombuffer(self.audioStream.read(self.noFrames, exception_on_overflow=False), dtype=np.int16)
-        audioData = audioData / 2.0**15
-        self.audioDataRoll[:-1] = self.audioDataRoll[1:]
-        self.audioDataRoll[-1, :] = np.copy(audioData)
-        audioData = np.concatenate(self.audioDataRoll, axis=0).astype(np.float32)
-        melValues = []
-        melMax = []
-
-        vol = np.max(np.abs(audioData))
-        if vol < self.preferences['volTol']:
-            self.stripSaver()
-            self.displayFunction()
-        else:
-            self.readTimeout = 0
-            self.displayRefresh[1] = True
-            audioLen = len(audioData)
-            audioData *= self.hammingWindow
-            # audioDataPadded = np.pad(audioData, ((2**int(np.ceil(np.log2(audioLen))) - audioLen)//2, (2**int(np.ceil(np.log2(audioLen))) - audioLen)//2), mode='constant')
-            audioDataPadded = np.pad(audioData, (0, (2**int(np.ceil(np.log2(audioLen))) - audioLen)), mode='constant')
-            # YS = np.abs(np.fft.rfft(y_padded)[:N // 2])
-            # melValues = librosa.feature.melspectrogram(y=audioDataPadded, sr=self.audioSampleRate, n_fft=self.noFrames*self.preferences['audioRoll']//2, win_length=self.noFrames, center=False, pad_mode='constant', power=2.0, n_mels=self.preferences['noFFT'], fmin=self.preferences['minFreq'], fmax=self.preferences['maxFreq'])
-            audioDataFreq = np.abs(np.fft.rfft(audioDataPadded)[:audioLen // 2])
-            melBank = self.melBank[:,:audioDataFreq.size]
-            melValues = np.atleast_2d(audioDataFreq).T * melBank.T
-
-            melValues = np.sum(melValues, axis=0)
-            # melValues = melValues**2.0
-            melMax = np.max(gaussian_filter1d(melValues, sigma=1.0))
-            gainCheck = int(np.max(self.melGain.value) > self.preferences['gainLimit'])
-            self.melGain.updateDecay((gainCheck)*self.melGain.alpha_decay + (1-gainCheck)*0.0005)
-            self.melGain.update((gainCheck)*melMax + (1-gainCheck)*self.preferences['gainLimit'])
-
-            melValues /= self.melGain.value
-            melValues = self.melSmooth.update(melValues)
-
-            leftIndex = abs(self.melFrq - self.preferences['lowFreq']).argmin()
-            rightIndex = abs(self.melFrq - self.preferences['highFreq']).argmin()
-            
-            melValues[0 : leftIndex] = melValues[0 : leftIndex] / 1.5
-            melValues[leftIndex : rightIndex] = melValues[leftIndex : rightIndex] * 1.2
-            melValues[rightIndex : self.preferences['noFFT']] = melValues[rightIndex : self.preferences['noFFT']] * 2
-
-            lowBand = melValues[0 : leftIndex + 1]
-            midBand = melValues[leftIndex : rightIndex + 1]
-            highBand = melValues[rightIndex : self.preferences['noFFT']]
-            self.melData = (melMax, lowBand, midBand, highBand)
-            # self.ledSmooth.update(melValues)
-            # melValues /= self.ledSmooth.value
-            self.audioStripDisplay((melValues, leftIndex, rightIndex))
-            
-            self.displayFunction()
-
-
-        debugPrint('Audio Data: ', melValues, )
-        debugPrint('gain: ',self.melGain.value,'\t','melMax',melMax,'\t','Volume: ', vol)
-
     def displayPlot(self):
         if self.preferences['start']:
             dt = time() - self.plotTimer
@@ -667,7 +205,8 @@ class chromatizer():
                 debugPrint(dt)
                 if self.preferences['showOutPlot']:
                     self.plotAx.cla()
-                    self.plotAx.plot(list(range(0, len(self.currPixels[0]))), self.currPixels[0], 'r', list(range(0, len(self.currPixels[1]))), self.currPixels[1], 'g', list(range(0, len(self.currPixels[2]))), self.currPixels[2], 'b')
+                    levels = self.frame.levels
+                    self.plotAx.plot(list(range(0, len(levels[0]))), levels[0], 'r', list(range(0, len(levels[1]))), levels[1], 'g', list(range(0, len(levels[2]))), levels[2], 'b')
                     self.plotFig.draw()
                 elif self.preferences['showFreqPlot'] and self.preferences['showGainPlot']:
                     self.plotAx.cla()
@@ -688,96 +227,13 @@ class chromatizer():
             dt = time() - self.fpsTimer
             if dt > 0.2:
                 self.window['_FPS_'].update(value = str(int(self.fps.value)))
+                # p95 of every stage in ms, the full table with p50/p99/max is on the tooltip
+                metrics = self.worker if self.worker is not None else self.metrics
+                self.window['_latency_'].update(value = metrics.summary())
+                self.window['_latency_'].set_tooltip(metrics.table())
                 self.window.refresh()
                 self.fpsTimer = time()
 
-    def rainbowEffect(self):
-        debugPrint('inRainbowEffect')
-        self.readTimeout = int(speedMap(self.preferences['rainbowSpeed']))
-        self.stripRainbow()
-        self.displayFunction()
-
-    def twinkleEffect(self):
-        debugPrint('inTwinkleEffect')
-        self.readTimeout = 10
-        self.stripTwinkle()
-        self.displayFunction()
-
-    def singleEffect(self):
-        debugPrint('inSingleEffect')
-        tmpPixels = self.currPixels[:, self.preferences['noPixels']//2:]
-        tmpLen = int(tmpPixels.shape[1]*0.55)
-        # Assign color to different frequency regions
-        tmpPixels[0, :tmpLen] = self.preferences['singleRed']
-        tmpPixels[0, tmpLen:] = 0.0
-        tmpPixels[1, :tmpLen] = self.preferences['singleGreen']
-        tmpPixels[1, tmpLen:] = 0.0
-        tmpPixels[2, :tmpLen] = self.preferences['singleBlue']
-        tmpPixels[2, tmpLen:] = 0.0
-        # self.ledFlt.update(tmpPixels)
-        # tmpPixels = np.round(self.ledFlt.value)
-
-        # Apply substantial blur to smooth the edges
-        tmpPixels[0, :] = gaussian_filter1d(tmpPixels[0, :], sigma=4.0)
-        tmpPixels[1, :] = gaussian_filter1d(tmpPixels[1, :], sigma=4.0)
-        tmpPixels[2, :] = gaussian_filter1d(tmpPixels[2, :], sigma=4.0)
-
-        # Update the LED strip
-        self.currPixels = np.concatenate((tmpPixels[:, ::-1], tmpPixels), axis=1)
-        self.displayFunction()
-    
-    def getEffectHandle(self):
-        if self.preferences['displayEffect'] == 'Audio':
-            self.displayEffect = self.audioEffect
-            self.readTimeout = int(1000/self.preferences['tgtFPS'])
-        elif self.preferences['displayEffect'] == 'Rainbow':
-            self.displayEffect = self.rainbowEffect
-            self.readTimeout = int(speedMap(self.preferences['rainbowSpeed']))
-        elif self.preferences['displayEffect'] == 'Twinkle Stars':
-            self.displayEffect = self.twinkleEffect
-            self.readTimeout = 10
-        elif self.preferences['displayEffect'] == 'Single':
-            self.displayEffect = self.singleEffect
-            self.readTimeout = None
-
-    def getSaverHandle(self):
-        if self.preferences['stripSaver'] == 'None':
-            self.stripSaver = self.stripClear
-        if self.preferences['stripSaver'] == 'Twinkle Stars':
-            self.stripSaver = self.stripTwinkle
-        elif self.preferences['stripSaver'] == 'Rainbow':
-            self.stripSaver = self.stripRainbow
-
-    def refreshAudioData(self):
-        deviceInfo = self.pa.get_device_info_by_index(self.audioDevices[self.preferences['audioDevice']])
-        self.audioSampleRate = int(deviceInfo['defaultSampleRate'])
-        self.noFrames = int(self.audioSampleRate // self.preferences['tgtFPS'])
-        self.audioDataRoll = np.random.rand(self.preferences['audioRoll'], self.noFrames) / 1e16
-        self.hammingWindow = np.hamming(self.noFrames*self.preferences['audioRoll'])
-        self.melFrq = librosa.mel_frequencies(n_mels=self.preferences['noFFT'], fmin=self.preferences['minFreq'], fmax=self.preferences['maxFreq'], htk=False)    
-        self.melBank = librosa.filters.mel(sr=self.audioSampleRate, n_fft=self.noFrames*self.preferences['audioRoll'], n_mels=self.preferences['noFFT'], fmin=self.preferences['minFreq'], fmax=self.preferences['maxFreq'])
-
-        self.melGain= expFilter(np.tile(self.preferences['gainLimit'], self.preferences['noFFT']), alpha_decay=self.preferences['adGain'], alpha_rise=self.preferences['arGain'])
-        self.melSmooth = expFilter(np.tile(1e-1, self.preferences['noFFT']),  alpha_decay=self.preferences['adAudio'], alpha_rise=self.preferences['arAudio'])
-        self.ledSmooth = expFilter(np.tile(0.1, self.preferences['noFFT']),  alpha_decay=self.preferences['adLED'], alpha_rise=self.preferences['arLED'])
-
-        if self.audioStream != []:
-            self.audioStream.stop_stream()
-            self.audioStream.close()
-        
-        self.audioStream = self.pa.open(format=pyaudio.paInt16, channels=1, rate=self.audioSampleRate, input=True, input_device_index=self.audioDevices[self.preferences['audioDevice']], frames_per_buffer=self.noFrames)
-
-    def loopActions(self):
-        debugPrint('inLoopActions: ', self.displayEffect)
-        if self.preferences['start']:
-            self.displayEffect()
-            self.getFPS()
-            self.displayPlot()
-            self.displayFPS()
-        elif self.preferences['clrClose']:
-            self.currPixels = np.tile(0, (3, self.preferences['noPixels'])).astype(np.float64)
-            self.displayFunction()
-
     def resetPlot(self):
         if self.preferences['showOutPlot']:
             self.plotAx.set_ylim(0, 255)
@@ -799,15 +255,27 @@ class chromatizer():
                 self.plotAx.set_autoscaley_on(True)
         self.plotAx.cla()
     
+    def displayActions(self):
+        # Frames rendered by the DSP worker process are copied in before they are drawn
+        if self.worker is not None and self.worker.poll(self):
+            self.window.write_event_value('_deviceList_', list(self.audioDevices.keys()))
+        if self.preferences['start']:
+            self.displayPlot()
+            self.displayFPS()
+
+    def refreshDeviceList(self):
+        """Posted to the render loop, the new device list comes back to the GUI as an event"""
+        self.getAudioDevices()
+        self.window.write_event_value('_deviceList_', list(self.audioDevices.keys()))
+
     def closeActions(self):
         self.savePreferences()
-        if self.preferences['clrClose']:
-            self.currPixels = np.tile(0, (3, self.preferences['noPixels']))
-            self.displayRefresh[0] = True
-            self.displayFunction()
-        # self.plotThread.join()
-        # self.fpsThread.join()
-        self.pa.terminate()
+        chromaEngine.closeActions(self)
+
+    def gammaChoices(self):
+        """Gamma Table combo entries, with the file loaded last if there is one"""
+        gammaFile = [self.preferences['gammaTable']] if self.preferences['gammaTable'] not in ('Default', '--Select file--') else []
+        return ['Default'] + gammaFile + ['--Select file--']
 
     def displayPreferences(self):
         debugPrint('inDisplayPreferences')
@@ -827,8 +295,14 @@ class chromatizer():
         self.window['_adAudio_'].update(value = str(self.preferences['adAudio']))
         self.window['_adGain_'].update(value = str(self.preferences['adGain']))
         self.window['_adLED_'].update(value = str(self.preferences['adLED']))
-        self.window['_gammaTable_'].update(value = self.preferences['gammaTable'])
+        self.window['_gammaTable_'].update(value = self.preferences['gammaTable'], values = self.gammaChoices())
+        self.window['_calibrationTable_'].update(value = self.preferences['calibrationTable'])
+        self.window['_wbRed_'].update(value = str(self.preferences['wbRed']))
+        self.window['_wbGreen_'].update(value = str(self.preferences['wbGreen']))
+        self.window['_wbBlue_'].update(value = str(self.preferences['wbBlue']))
         self.window['_clrClose_'].update(value = self.preferences['clrClose'])
+        self.window['_dspProcess_'].update(value = self.preferences['dspProcess'])
+        self.window['_pipelineDtype_'].update(value = self.preferences['pipelineDtype'])
         self.window['_minFreq_'].update(value = str(self.preferences['minFreq']))
         self.window['_lowFreq_'].update(value = str(self.preferences['lowFreq']))
         self.window['_highFreq_'].update(value = str(self.preferences['highFreq']))
@@ -839,66 +313,113 @@ class chromatizer():
         self.window['_espUDPIP_'].update(value = self.preferences['espUDPIP'])
         self.window['_espUDPPort_'].update(value = str(self.preferences['espUDPPort']))
         self.window['_espSoftGamma_'].update(value = self.preferences['espSoftGamma'])
+        self.window['_espDeltaThreshold_'].update(value = str(self.preferences['espDeltaThreshold']))
+        self.window['_espKeyframe_'].update(value = str(self.preferences['espKeyframe']))
+        self.window['_espOutputMap_'].update(value = self.preferences['espOutputMap'])
+        self.window['_ddpIP_'].update(value = self.preferences['ddpIP'])
+        self.window['_ddpPort_'].update(value = str(self.preferences['ddpPort']))
+        self.window['_ddpSoftGamma_'].update(value = self.preferences['ddpSoftGamma'])
+        self.window['_e131IP_'].update(value = self.preferences['e131IP'])
+        self.window['_e131Port_'].update(value = str(self.preferences['e131Port']))
+        self.window['_e131Universe_'].update(value = str(self.preferences['e131Universe']))
+        self.window['_e131SoftGamma_'].update(value = self.preferences['e131SoftGamma'])
+        self.window['_showFile_'].update(value = self.preferences['showFile'])
         self.window['_rpLEDPin_'].update(value = str(self.preferences['rpLEDPin']))
         self.window['_rpLEDFreq_'].update(value = str(self.preferences['rpLEDFreq']))
         self.window['_rpLEDdma_'].update(value = str(self.preferences['rpLEDdma']))
         self.window['_rpLEDInvert_'].update(value = self.preferences['rpLEDInvert'])
         self.window['_rpUseWeb_'].update(value = self.preferences['rpUseWeb'])
         self.window['_rpSoftGamma_'].update(value = self.preferences['rpSoftGamma'])
+        self.window['_rpColorOrder_'].update(value = self.preferences['rpColorOrder'])
         self.window.refresh()
 
     def savePreferences(self):
         debugPrint('inSavePreferences')
         event, values = self.window.read(timeout=0)
-        self.preferences['audioDevice'] =  values['_audioDevice_']
-        self.preferences['stripSaver'] = values['_stripSaver_']
-        self.preferences['energyDisplay'] = values['_energyDisplay_']
-        self.preferences['scrollDisplay'] = values['_scrollDisplay_']
-        self.preferences['spectrumDisplay'] = values['_spectrumDisplay_']
-        self.preferences['displayEffect'] = values['_displayEffect_']
-        self.preferences['colorOrder'] = values['_colorOrder_']
-        self.preferences['brightness'] = self.brightSlider.sliders[0]
-        self.preferences['dispFPS'] = values['_dispFPS_']
-        self.preferences['noPixels'] = int(values['_noPixels_'])
-        self.preferences['tgtFPS'] = int(values['_tgtFPS_'])
-        self.preferences['noFFT'] = int(values['_noFFT_'])
-        self.preferences['gainLimit'] = float(values['_gainLimit_'])
-        self.preferences['volTol'] = float(values['_volTol_'])
-        self.preferences['audioRoll'] = int(values['_audioRoll_'])
-        self.preferences['adAudio'] = float(values['_adAudio_'])
-        self.preferences['adGain'] = float(values['_adGain_'])
-        self.preferences['adLED'] = float(values['_adLED_'])
-        self.preferences['gammaTable'] = values['_gammaTable_']
-        self.preferences['clrClose'] = values['_clrClose_']
-        self.preferences['minFreq'] = int(values['_minFreq_'])
-        self.preferences['lowFreq'] = int(values['_lowFreq_'])
-        self.preferences['highFreq'] = int(values['_highFreq_'])
-        self.preferences['maxFreq'] = int(values['_maxFreq_'])
-        self.preferences['arAudio'] = float(values['_arAudio_'])
-        self.preferences['arGain'] = float(values['_arGain_'])
-        self.preferences['arLED'] = float(values['_arLED_'])
-        self.preferences['espUDPIP'] = values['_espUDPIP_']
-        self.preferences['espUDPPort'] = int(values['_espUDPPort_'])
-        self.preferences['espSoftGamma'] = values['_espSoftGamma_']
-        self.preferences['rpLEDPin'] = int(values['_rpLEDPin_'])
-        self.preferences['rpLEDFreq'] = int(values['_rpLEDFreq_'])
-        self.preferences['rpLEDdma'] = int(values['_rpLEDdma_'])
-        self.preferences['rpLEDInvert'] = values['_rpLEDInvert_']
-        self.preferences['rpUseWeb'] = values['_rpUseWeb_']
-        self.preferences['rpSoftGamma'] = values['_rpSoftGamma_']
-        self.preferences['activeDevice'] = values['_activeDevice_']
-        self.preferences['rainbowSpeed'] = self.speedSlider.sliders[0]
-        self.preferences['rainbowSat'] = self.saturationSlider.sliders[0]
-        self.preferences['rainbowVal'] = self.valueSlider.sliders[0]
-        self.preferences['starMaxLife'] = self.lifeSlider.sliders[0]
-        self.preferences['noStars'] = self.starSlider.sliders[0]
-        self.preferences['starRed'] = self.starRedSlider.sliders[0]
-        self.preferences['starGreen'] = self.starGreenSlider.sliders[0]
-        self.preferences['starBlue'] = self.starBlueSlider.sliders[0]
+        # Applied by the render loop between frames, rebuilding only what the changed preferences feed
+        changes = {}
+        changes['audioDevice'] =  values['_audioDevice_']
+        changes['stripSaver'] = values['_stripSaver_']
+        changes['energyDisplay'] = values['_energyDisplay_']
+        changes['scrollDisplay'] = values['_scrollDisplay_']
+        changes['spectrumDisplay'] = values['_spectrumDisplay_']
+        changes['displayEffect'] = values['_displayEffect_']
+        changes['colorOrder'] = values['_colorOrder_']
+        changes['brightness'] = self.brightSlider.sliders[0]
+        changes['dispFPS'] = values['_dispFPS_']
+        changes['noPixels'] = int(values['_noPixels_'])
+        changes['tgtFPS'] = int(values['_tgtFPS_'])
+        changes['noFFT'] = int(values['_noFFT_'])
+        changes['gainLimit'] = float(values['_gainLimit_'])
+        changes['volTol'] = float(values['_volTol_'])
+        changes['audioRoll'] = int(values['_audioRoll_'])
+        changes['adAudio'] = float(values['_adAudio_'])
+        changes['adGain'] = float(values['_adGain_'])
+        changes['adLED'] = float(values['_adLED_'])
+        changes['gammaTable'] = values['_gammaTable_']
+        changes['calibrationTable'] = values['_calibrationTable_']
+        changes['wbRed'] = int(values['_wbRed_'])
+        changes['wbGreen'] = int(values['_wbGreen_'])
+        changes['wbBlue'] = int(values['_wbBlue_'])
+        changes['clrClose'] = values['_clrClose_']
+        changes['dspProcess'] = values['_dspProcess_']
+        changes['pipelineDtype'] = values['_pipelineDtype_']
+        changes['minFreq'] = int(values['_minFreq_'])
+        changes['lowFreq'] = int(values['_lowFreq_'])
+        changes['highFreq'] = int(values['_highFreq_'])
+        changes['maxFreq'] = int(values['_maxFreq_'])
+        changes['arAudio'] = float(values['_arAudio_'])
+        changes['arGain'] = float(values['_arGain_'])
+        changes['arLED'] = float(values['_arLED_'])
+        changes['espUDPIP'] = values['_espUDPIP_']
+        changes['espUDPPort'] = int(values['_espUDPPort_'])
+        changes['espSoftGamma'] = values['_espSoftGamma_']
+        changes['espDeltaThreshold'] = int(values['_espDeltaThreshold_'])
+        changes['espKeyframe'] = int(values['_espKeyframe_'])
+        changes['espOutputMap'] = values['_espOutputMap_']
+        try:
+            parseOutputMap(changes['espOutputMap'], changes['espUDPIP'], changes['espUDPPort'], changes['noPixels'])
+        except ValueError as err:
+            # The render loop keeps the outputs it has, so a bad map is never posted
+            sg.popup_error(str(err), title='Output Map')
+            changes['espOutputMap'] = self.preferences['espOutputMap']
+            self.window['_espOutputMap_'].update(value = changes['espOutputMap'])
+        changes['ddpIP'] = values['_ddpIP_']
+        changes['ddpPort'] = int(values['_ddpPort_'])
+        changes['ddpSoftGamma'] = values['_ddpSoftGamma_']
+        changes['e131IP'] = values['_e131IP_']
+        changes['e131Port'] = int(values['_e131Port_'])
+        changes['e131Universe'] = int(values['_e131Universe_'])
+        changes['e131SoftGamma'] = values['_e131SoftGamma_']
+        changes['rpLEDPin'] = int(values['_rpLEDPin_'])
+        changes['rpLEDFreq'] = int(values['_rpLEDFreq_'])
+        changes['rpLEDdma'] = int(values['_rpLEDdma_'])
+        changes['rpLEDInvert'] = values['_rpLEDInvert_']
+        changes['rpUseWeb'] = values['_rpUseWeb_']
+        changes['rpSoftGamma'] = values['_rpSoftGamma_']
+        changes['rpColorOrder'] = values['_rpColorOrder_']
+        changes['activeDevice'] = values['_activeDevice_']
+        changes['rainbowSpeed'] = self.speedSlider.sliders[0]
+        changes['rainbowSat'] = self.saturationSlider.sliders[0]
+        changes['rainbowVal'] = self.valueSlider.sliders[0]
+        changes['starMaxLife'] = self.lifeSlider.sliders[0]
+        changes['noStars'] = self.starSlider.sliders[0]
+        changes['starRed'] = self.starRedSlider.sliders[0]
+        changes['starGreen'] = self.starGreenSlider.sliders[0]
+        changes['starBlue'] = self.starBlueSlider.sliders[0]
+        changes['showFile'] = values['_showFile_']
+        # Written here, once, so the render thread never touches the settings file
+        try:
+            writePreferences(getPrefFile(), dict(preferenceDict(self.preferences), **changes))
+        except OSError as err:
+            print('Could not save preferences:', err)
+        self.post(self.reconfigure, changes)
 
     def __init__(self):
         debugPrint('in Init')
-        self.getAudioDevices()
+        self.preferences = loadPreferences()
+        # With the DSP worker this process opens neither the audio device nor the LED outputs
+        chromaEngine.__init__(self, self.preferences, liveOutput=not self.preferences['dspProcess'])
         tmpBackground = '#808080'
         tmpBackground = None
         verticalGap = 5
@@ -932,6 +453,11 @@ class chromatizer():
                         [sg.Sizer(20,verticalGap)],
                         [sg.Push(), sg.T('Blue: '.ljust(9,' ')), sg.Graph(canvas_size=(600,40), graph_bottom_left=(0,0), graph_top_right=(600,40), background_color=tmpBackground, enable_events=True, drag_submits=True, key='_blueGraph_'), sg.Push()]]
 
+        showLayout =    [[sg.Sizer(20,60)],
+                        [sg.Push(), sg.T(' Pre-rendered Show '.center(100,'-')), sg.Push()],
+                        [sg.Sizer(20,15)],
+                        [sg.Push(), sg.T('Show File: '), sg.Input(default_text=self.preferences['showFile'], tooltip='Show file written by \'offline.py --show\', played in a loop.', size=(60,1), enable_events=True, key='_showFile_'), sg.FileBrowse(file_types=(('Show Files', '*.show'), ('All Files', '*.*'))), sg.Push()]]
+
         audioLayout =   [[sg.Canvas(key='_plot_', size=(800,200),background_color=tmpBackground, right_click_menu=['', ['Enable Output Plot', 'Enable Freq., Plot', 'Enable Gain Plot']])],
                         [sg.Sizer(60,3), sg.T('Select \'Strip\'saver: '), sg.Combo(['None','Rainbow', 'Twinkle Stars'], default_value=self.preferences['stripSaver'], key='_stripSaver_', tooltip='Select what to show when audio level below min threshold.', enable_events=True, readonly=True),
                         sg.Sizer(60,3), sg.Radio('Energy', 'vizEffect', default=self.preferences['energyDisplay'], enable_events=True, tooltip='Colors expand from the center corresponding to sound energy.', key='_energyDisplay_'),
@@ -956,10 +482,20 @@ class chromatizer():
                         [sg.Sizer(20,verticalGap)],
                         [getPrefName('Alpha Decay LED:'), sg.Input(default_text=str(self.preferences['adLED']), tooltip='Alpha decay of LED output values (Small value = more smoothing).', size=(15,1), justification='center' , enable_events=True, key='_adLED_')]]
 
-        prefC2Layout =  [[getPrefName('Gamma Table:'), sg.Combo(['Default','--Select file--'], default_value=self.preferences['gammaTable'], key='_gammaTable_', size=(13,1), tooltip='Select gamma correction table.', enable_events=True, readonly=True)],
+        prefC2Layout =  [[getPrefName('Gamma Table:'), sg.Combo(self.gammaChoices(), default_value=self.preferences['gammaTable'], key='_gammaTable_', size=(13,1), tooltip='Select gamma correction table, a file holds 256 values or 256 per channel (red, green, blue).', enable_events=True, readonly=True)],
+                        [sg.Sizer(20,verticalGap)],
+                        [getPrefName('Calibration Table:'), sg.Input(default_text=self.preferences['calibrationTable'], tooltip='Per channel correction applied after gamma and white balance, a file of 256 values or 256 per channel. Empty for none.', size=(9,1), enable_events=True, key='_calibrationTable_'), sg.FileBrowse(size=(4,1), file_types=(('Tables', '*.txt *.csv *.npy'), ('All Files', '*.*')))],
+                        [sg.Sizer(20,verticalGap)],
+                        [getPrefName('White Balance:'), sg.Input(default_text=str(self.preferences['wbRed']), tooltip='Red gain in percent.', size=(4,1), justification='center', enable_events=True, key='_wbRed_'),
+                                                        sg.Input(default_text=str(self.preferences['wbGreen']), tooltip='Green gain in percent.', size=(4,1), justification='center', enable_events=True, key='_wbGreen_'),
+                                                        sg.Input(default_text=str(self.preferences['wbBlue']), tooltip='Blue gain in percent.', size=(4,1), justification='center', enable_events=True, key='_wbBlue_')],
                         [sg.Sizer(20,verticalGap)],
                         [getPrefName('Clear on Close:'), sg.Sizer(42,1),sg.Checkbox(' ', default=self.preferences['clrClose'], tooltip='If checked LED strip will be cleared before closing the application.', enable_events=True, key='_clrClose_')],
                         [sg.Sizer(20,verticalGap)],
+                        [getPrefName('DSP Process:'), sg.Sizer(42,1),sg.Checkbox(' ', default=self.preferences['dspProcess'], tooltip='If checked audio capture, analysis and LED output run in a separate process. Takes effect on restart.', enable_events=True, key='_dspProcess_')],
+                        [sg.Sizer(20,verticalGap)],
+                        [getPrefName('Pipeline Dtype:'), sg.Combo(['float64', 'float32'], default_value=self.preferences['pipelineDtype'], key='_pipelineDtype_', size=(13,1), tooltip='Number format of the analysis, effects and frame. float32 halves the memory traffic on small boards.', enable_events=True, readonly=True)],
+                        [sg.Sizer(20,verticalGap)],
                         [getPrefName('Min Frequency:'), sg.Input(default_text=str(self.preferences['minFreq']), tooltip='Frequency lower limit for signal analysis.', size=(15,1), justification='center' , enable_events=True, key='_minFreq_')],
                         [sg.Sizer(20,verticalGap)],
                         [getPrefName('Low Frequency:'), sg.Input(default_text=str(self.preferences['lowFreq']), tooltip='Upper limit of low frequency range.', size=(15,1), justification='center' , enable_events=True, key='_lowFreq_')],
@@ -974,19 +510,46 @@ class chromatizer():
                         [sg.Sizer(20,verticalGap)],
                         [getPrefName('Alpha Rise LED:'), sg.Input(default_text=str(self.preferences['arLED']), tooltip='Alpha rise of LED output values (Small value = more smoothing).', size=(15,1), justification='center' , enable_events=True, key='_arLED_')]]
 
-        prefEspLayout = [[sg.Push(), sg.Column([[sg.Sizer(20,verticalGap)],
+        prefEsp1Layout = [[sg.Sizer(20,verticalGap)],
                         [getPrefName('UDP IP:'), sg.Input(default_text=self.preferences['espUDPIP'], tooltip='IP address of the ESP8266. Must be same as IP specified in ESP8266 code.', size=(15,1), justification='center' , enable_events=True, key='_espUDPIP_')],
                         [sg.Sizer(20,verticalGap)],
                         [getPrefName('UDP Port:'), sg.Input(default_text=str(self.preferences['espUDPPort']), tooltip='Port number used for communication between program and ESP8266.', size=(15,1), justification='center' , enable_events=True, key='_espUDPPort_')],
                         [sg.Sizer(20,verticalGap)],
-                        [getPrefName('S/W Gamma Correction:'), sg.Sizer(42,1), sg.Checkbox(' ', default=self.preferences['espSoftGamma'], tooltip='Set to False because the ESP firmware handles gamma correction + dither.', enable_events=True, key='_espSoftGamma_')]]), sg.Push()]]
+                        [getPrefName('S/W Gamma Correction:'), sg.Sizer(42,1), sg.Checkbox(' ', default=self.preferences['espSoftGamma'], tooltip='Set to False because the ESP firmware handles gamma correction + dither.', enable_events=True, key='_espSoftGamma_')]]
+
+        prefEsp2Layout = [[sg.Sizer(20,verticalGap)],
+                        [getPrefName('Delta Threshold:'), sg.Input(default_text=str(self.preferences['espDeltaThreshold']), tooltip='Resend a pixel only when it changes by more than this after gamma correction (0 = any change).', size=(15,1), justification='center' , enable_events=True, key='_espDeltaThreshold_')],
+                        [sg.Sizer(20,verticalGap)],
+                        [getPrefName('Keyframe Interval:'), sg.Input(default_text=str(self.preferences['espKeyframe']), tooltip='Send the whole strip every this many frames to recover from lost packets (0 = never).', size=(15,1), justification='center' , enable_events=True, key='_espKeyframe_')],
+                        [sg.Sizer(20,verticalGap)],
+                        [getPrefName('Output Map:'), sg.Input(default_text=self.preferences['espOutputMap'], tooltip='Several ESP8266 controllers as \'ip:port:first-last\' pixel ranges separated by \';\'. Leave empty to drive the whole strip from UDP IP and Port.', size=(15,1), justification='center' , enable_events=True, key='_espOutputMap_')]]
+
+        prefDdp1Layout = [[sg.Sizer(20,verticalGap)],
+                        [getPrefName('DDP IP:'), sg.Input(default_text=self.preferences['ddpIP'], tooltip='IP address of the DDP controller (WLED, ESPixelStick, xLights ...).', size=(15,1), justification='center' , enable_events=True, key='_ddpIP_')],
+                        [sg.Sizer(20,verticalGap)],
+                        [getPrefName('DDP Port:'), sg.Input(default_text=str(self.preferences['ddpPort']), tooltip='DDP port of the controller (usually 4048).', size=(15,1), justification='center' , enable_events=True, key='_ddpPort_')]]
+
+        prefDdp2Layout = [[sg.Sizer(20,verticalGap)],
+                        [getPrefName('S/W Gamma Correction:'), sg.Sizer(42,1), sg.Checkbox(' ', default=self.preferences['ddpSoftGamma'], tooltip='Uncheck if the controller applies its own gamma correction.', enable_events=True, key='_ddpSoftGamma_')]]
+
+        prefE1311Layout = [[sg.Sizer(20,verticalGap)],
+                        [getPrefName('E1.31 IP:'), sg.Input(default_text=self.preferences['e131IP'], tooltip='IP address of the E1.31 (sACN) controller, packets are sent unicast.', size=(15,1), justification='center' , enable_events=True, key='_e131IP_')],
+                        [sg.Sizer(20,verticalGap)],
+                        [getPrefName('E1.31 Port:'), sg.Input(default_text=str(self.preferences['e131Port']), tooltip='E1.31 port of the controller (usually 5568).', size=(15,1), justification='center' , enable_events=True, key='_e131Port_')]]
+
+        prefE1312Layout = [[sg.Sizer(20,verticalGap)],
+                        [getPrefName('Start Universe:'), sg.Input(default_text=str(self.preferences['e131Universe']), tooltip='Universe of the first 170 pixels, the next ones follow in the universes after it.', size=(15,1), justification='center' , enable_events=True, key='_e131Universe_')],
+                        [sg.Sizer(20,verticalGap)],
+                        [getPrefName('S/W Gamma Correction:'), sg.Sizer(42,1), sg.Checkbox(' ', default=self.preferences['e131SoftGamma'], tooltip='Uncheck if the controller applies its own gamma correction.', enable_events=True, key='_e131SoftGamma_')]]
 
         prefPi1Layout = [[sg.Sizer(20,verticalGap)],
                         [getPrefName('LED Pin:'), sg.Input(default_text=str(self.preferences['rpLEDPin']), tooltip='GPIO pin connected to the LED strip pixels (must support PWM).', size=(15,1), justification='center' , enable_events=True, key='_rpLEDPin_')],
                         [sg.Sizer(20,verticalGap)],
                         [getPrefName('LED Freq Hz:'), sg.Input(default_text=str(self.preferences['rpLEDFreq']), tooltip='LED signal frequency in Hz (usually 800kHz).', size=(15,1), justification='center' , enable_events=True, key='_rpLEDFreq_')],
                         [sg.Sizer(20,verticalGap)],
-                        [getPrefName('LED DMA channel:'), sg.Input(default_text=str(self.preferences['rpLEDdma']), tooltip='DMA channel used for generating PWM signal (try 5).', size=(15,1), justification='center' , enable_events=True, key='_rpLEDdma_')]]
+                        [getPrefName('LED DMA channel:'), sg.Input(default_text=str(self.preferences['rpLEDdma']), tooltip='DMA channel used for generating PWM signal (try 5).', size=(15,1), justification='center' , enable_events=True, key='_rpLEDdma_')],
+                        [sg.Sizer(20,verticalGap)],
+                        [getPrefName('LED Color Order:'), sg.Combo(['GRB', 'RGB', 'BRG', 'RBG', 'GBR', 'BGR'], default_value=self.preferences['rpColorOrder'], key='_rpColorOrder_', size=(13,1), tooltip='Order the strip expects the colors in (WS2812 strips are usually GRB).', enable_events=True, readonly=True)]]
 
         prefPi2Layout = [[sg.Sizer(20,verticalGap)],
                         [getPrefName('LED Invert:'), sg.Sizer(42,1), sg.Checkbox(' ', tooltip='Set True if using an inverting logic level converter.', default=self.preferences['rpLEDInvert'], enable_events=True, key='_rpLEDInvert_')],
@@ -997,17 +560,18 @@ class chromatizer():
 
         prefLayout =    [[sg.Sizer(20,verticalGap)], [sg.Push(), sg.Column(prefC1Layout, right_click_menu=['', ['Save Settings']]), sg.Sizer(80,3) ,sg.Column(prefC2Layout, right_click_menu=['', ['Save Settings']]), sg.Push()],
                         [sg.Sizer(20,verticalGap)],
-                        [sg.Push(), sg.TabGroup([[sg.Tab('ESP 8266', prefEspLayout, right_click_menu=['', ['Save Settings']]), sg.Tab('Raspberry Pi', [[sg.Sizer(44,3), sg.Column(prefPi1Layout, right_click_menu=['', ['Save Settings']]), sg.Sizer(80,3) ,sg.Column(prefPi2Layout, right_click_menu=['', ['Save Settings']]), sg.Push()]], right_click_menu=['', ['Save Settings']])]], size=(800,200), enable_events=True, key='_activeDevice_', tab_location='top'), sg.Push()]]
+                        [sg.Push(), sg.TabGroup([[sg.Tab('ESP 8266', [[sg.Sizer(44,3), sg.Column(prefEsp1Layout, right_click_menu=['', ['Save Settings']]), sg.Sizer(80,3) ,sg.Column(prefEsp2Layout, right_click_menu=['', ['Save Settings']]), sg.Push()]], right_click_menu=['', ['Save Settings']]), sg.Tab('DDP', [[sg.Sizer(44,3), sg.Column(prefDdp1Layout, right_click_menu=['', ['Save Settings']]), sg.Sizer(80,3) ,sg.Column(prefDdp2Layout, right_click_menu=['', ['Save Settings']]), sg.Push()]], right_click_menu=['', ['Save Settings']]), sg.Tab('E1.31', [[sg.Sizer(44,3), sg.Column(prefE1311Layout, right_click_menu=['', ['Save Settings']]), sg.Sizer(80,3) ,sg.Column(prefE1312Layout, right_click_menu=['', ['Save Settings']]), sg.Push()]], right_click_menu=['', ['Save Settings']]), sg.Tab('Raspberry Pi', [[sg.Sizer(44,3), sg.Column(prefPi1Layout, right_click_menu=['', ['Save Settings']]), sg.Sizer(80,3) ,sg.Column(prefPi2Layout, right_click_menu=['', ['Save Settings']]), sg.Push()]], right_click_menu=['', ['Save Settings']])]], size=(800,200), enable_events=True, key='_activeDevice_', tab_location='top'), sg.Push()]]
 
         ctrlLayout =    [[sg.Sizer(60,3)],[sg.Push(),sg.B(button_text='Start', tooltip='Start the show.', enable_events=True, button_color='green', key='_start_',size=(10,1)), sg.Sizer(60,00), sg.T('Select audio source: '),
                         sg.Combo(list(self.audioDevices.keys())+['--Refresh Audio Devices--'], default_value=self.preferences['audioDevice'], key='_audioDevice_', tooltip='Select audio source.', enable_events=True, readonly=True),sg.Push()],
                         [sg.HorizontalSeparator()],
-                        [sg.Push(), sg.TabGroup([[sg.Tab('Audio', audioLayout, right_click_menu=['', ['Enable Output Plot', 'Enable Freq., Plot', 'Enable Gain Plot']]), sg.Tab('Rainbow', rainbowLayout), sg.Tab('Twinkle Stars', twinkleLayout), sg.Tab('Single', singleLayout)]], size=(800,250), enable_events=True, key='_displayEffect_', tab_location='top'), sg.Push()],
+                        [sg.Push(), sg.TabGroup([[sg.Tab('Audio', audioLayout, right_click_menu=['', ['Enable Output Plot', 'Enable Freq., Plot', 'Enable Gain Plot']]), sg.Tab('Rainbow', rainbowLayout), sg.Tab('Twinkle Stars', twinkleLayout), sg.Tab('Single', singleLayout), sg.Tab('Show', showLayout)]], size=(800,250), enable_events=True, key='_displayEffect_', tab_location='top'), sg.Push()],
                         [sg.Sizer(60,8)], [sg.Push(), sg.T('Color band order: '),
                         sg.Combo(['RGB','RBG', 'GRB', 'GBR', 'BRG', 'BGR'], default_value=self.preferences['colorOrder'], key='_colorOrder_', tooltip='Select color corresponding to Low, Mid and High band activations.', enable_events=True, readonly=True, size=(5,1)),
                         # sg.Combo(['RRR', 'RRG', 'RRB', 'RGR', 'RGG', 'RGB', 'RBR', 'RBG', 'RBB', 'GRR', 'GRG', 'GRB', 'GGR', 'GGG', 'GGB', 'GBR', 'GBG', 'GBB', 'BRR', 'BRG', 'BRB', 'BGR', 'BGG', 'BGB', 'BBR', 'BBG', 'BBB'], default_value=self.preferences['colorOrder'], key='_colorOrder_', tooltip='Select color corresponding to Low, Mid and High band activations.', enable_events=True, readonly=True, size=(5,1)),
                         sg.Sizer(30,00), sg.T('Brightness: '), sg.Graph(canvas_size=(270,40), graph_bottom_left=(0,0), graph_top_right=(270, 40), background_color=tmpBackground, motion_events = False, enable_events = True, drag_submits = True, key='_brightGraph_'), sg.Sizer(30,00),
                         sg.Checkbox('Display FPS', enable_events=True, default=self.preferences['dispFPS'], key='_dispFPS_'), sg.pin(sg.T('01', key='_FPS_', visible=self.preferences['dispFPS'])), sg.Push()],
+                        [sg.Push(), sg.pin(sg.T('', key='_latency_', font=('Courier', 8), tooltip='Stage latency p95 (ms).', visible=self.preferences['dispFPS'])), sg.Push()],
                         [sg.Sizer(80,7)], [sg.Push(), sg.T(' Select Frequency Ranges for Audio Analysis '.center(100,'-')), sg.Push()],
                         [sg.Graph(canvas_size=(800,40), graph_bottom_left=(0,0), graph_top_right=(800, 40), background_color=tmpBackground, motion_events = False, enable_events = True, drag_submits = True, key='_freqGraph_')]]
         
@@ -1046,18 +610,8 @@ class chromatizer():
         self.greenSlider = graphSlider(self.window['_greenGraph_'], sliderRange=(0,255), sliders=[self.preferences['singleGreen']], colors='G', relativeHeight=20, lineWidth=5, leftPad=15, rightPad=15)
         self.blueSlider = graphSlider(self.window['_blueGraph_'], sliderRange=(0,255), sliders=[self.preferences['singleBlue']], colors='B', relativeHeight=20, lineWidth=5, leftPad=15, rightPad=15)
 
-        self.fpsTime = time() * 1000.0
         self.plotTimer = time()
         self.fpsTimer = time()
-        self.fps = expFilter(val=self.preferences['tgtFPS'], alpha_decay=0.2, alpha_rise=0.2)
-        self.getEffectHandle()
-
-        self.melGain= expFilter(np.tile(self.preferences['gainLimit'], self.preferences['noFFT']), alpha_decay=self.preferences['adGain'], alpha_rise=self.preferences['arGain'])
-        self.melSmooth = expFilter(np.tile(1e-1, self.preferences['noFFT']),  alpha_decay=self.preferences['adAudio'], alpha_rise=self.preferences['arAudio'])
-        self.ledSmooth = expFilter(np.tile(0.1, self.preferences['noFFT']),  alpha_decay=self.preferences['adLED'], alpha_rise=self.preferences['arLED'])
-        self.getSaverHandle()
-
-        self.melData = (0,0,0,0)
 
         # instantiate matplotlib figure
         fig = plt.figure(facecolor=sg.theme_background_color(), alpha=0.0)
@@ -1071,28 +625,6 @@ class chromatizer():
         self.plotFig = draw_figure(self.window['_plot_'].TKCanvas, fig)
         self.resetPlot()
 
-        self.audioStripDisplay = self.energyDisplay if self.preferences['energyDisplay'] else self.scrollDisplay if self.preferences['scrollDisplay'] else self.spectrumDisplay
-        #* Setting up LED strip
-        self.prevPixels = np.tile(253.0, (3, self.preferences['noPixels']))
-        self.currPixels = np.tile(1.0, (3, self.preferences['noPixels']))
-        self.ledGain= expFilter(np.tile(self.preferences['gainLimit'], self.preferences['noFFT']), alpha_decay=self.preferences['adLED'], alpha_rise=self.preferences['arLED'])
-
-        self.spectrumDiff = expFilter(np.tile(0.01, self.preferences['noPixels'] // 2), alpha_decay=0.2, alpha_rise=0.99)
-        self.oldSpectrumFlt = expFilter(np.tile(0.01, self.preferences['noPixels'] // 2), alpha_decay=0.1, alpha_rise=0.5)
-        self.currSpectrum = expFilter(np.tile(0.01, self.preferences['noPixels'] // 2), alpha_decay=0.99, alpha_rise=0.01)
-        self.ledFlt = expFilter(np.tile(1, (3, self.preferences['noPixels'] // 2)), alpha_decay=0.1, alpha_rise=0.99)
-        self.oldSpectrum = np.tile(0.01, self.preferences['noPixels'] // 2)
-
-        self.rainbowHue = 0
-        self.rainbowFwd = 1
-
-        self.twinkleStars = [littleStar(self.preferences['noPixels'], self.preferences['starMaxLife'], self.preferences['starRed'], self.preferences['starGreen'], self.preferences['starBlue']) for i in range(self.preferences['noStars'])]
-
-        self.gammaTable = np.copy(gammaDefault)
-        self.displayFunction = self.sendToESP
-        self.setupDisplayDevice()
-
-
         #* Selecting tab from previous session 
         self.window[self.preferences['displayEffect']].select()
         self.window[self.preferences['activeDevice']].select()
@@ -1111,8 +643,14 @@ def main():
     global runThread
     cs = chromatizer()
     splashWindow.close()
+    # Frames are rendered on their own thread (or process), the GUI only posts configuration changes to it
+    if cs.preferences['dspProcess']:
+        cs.startWorker(getPrefFile())
+    else:
+        cs.startRendering()
+    cs.post()
     while True:      
-        event, values = cs.window.read(cs.readTimeout)
+        event, values = cs.window.read(cs.guiTimeout)
         # debugPrint(type(event))
         debugPrint(event, values)
         debugPrint(sg.user_settings())
@@ -1120,24 +658,28 @@ def main():
             runThread = False
             cs.closeActions()
             break
+        elif event == '_deviceList_':
+            cs.window['_audioDevice_'].update(values=values['_deviceList_']+['--Refresh Audio Devices--'], value = cs.preferences['audioDevice'])
         elif values['_audioDevice_'] == '--Refresh Audio Devices--':
-            cs.getAudioDevices()
-            cs.window['_audioDevice_'].update(values=list(cs.audioDevices.keys())+['--Refresh Audio Devices--'], value = cs.preferences['audioDevice'])
+            cs.window['_audioDevice_'].update(value = cs.preferences['audioDevice'])
+            cs.post(cs.refreshDeviceList)
         elif event == '_audioDevice_' and values['_audioDevice_'] != '--Refresh Audio Devices--':
             cs.preferences['audioDevice'] = values['_audioDevice_']
-            cs.refreshAudioData()
+            cs.post(cs.reconfigure)
         elif event == '_dispFPS_':
             cs.preferences['dispFPS'] = values['_dispFPS_']
             cs.window['_FPS_'].update(visible=cs.preferences['dispFPS'])
+            cs.window['_latency_'].update(visible=cs.preferences['dispFPS'])
         elif event == '_displayEffect_':
             cs.preferences['displayEffect'] = values['_displayEffect_']
-            cs.getEffectHandle()
+            cs.post(cs.reconfigure)
         elif event == '_freqGraph_':
             cs.freqSlider.movePoints(values['_freqGraph_'])
             cs.preferences['minFreq'] = cs.freqSlider.sliders[0]
             cs.preferences['lowFreq'] = cs.freqSlider.sliders[1]
             cs.preferences['highFreq'] = cs.freqSlider.sliders[2]
             cs.preferences['maxFreq'] = cs.freqSlider.sliders[3]
+            cs.post(cs.refreshBands)
             cs.displayPreferences()
             cs.window.refresh()
         elif event == '_brightGraph_':
@@ -1163,7 +705,7 @@ def main():
         elif event == '_starGraph_':
             cs.starSlider.movePoints(values['_starGraph_'])
             cs.preferences['noStars'] = int(cs.starSlider.sliders[0])
-            cs.twinkleStars = [littleStar(cs.preferences['noPixels'], cs.preferences['starMaxLife'], cs.preferences['starRed'], cs.preferences['starGreen'], cs.preferences['starBlue']) for i in range(cs.preferences['noStars'])]
+            cs.post(cs.reconfigure)
             cs.displayPreferences()
             cs.window.refresh()
         elif event == '_lifeGraph_':
@@ -1201,9 +743,24 @@ def main():
             cs.preferences['singleBlue'] = int(cs.blueSlider.sliders[0])
             cs.displayPreferences()
             cs.window.refresh()
+        elif event == '_showFile_':
+            cs.preferences['showFile'] = values['_showFile_']
+            cs.post(cs.reconfigure)
+        elif event == '_gammaTable_':
+            if values['_gammaTable_'] == '--Select file--':
+                gammaFile = sg.popup_get_file('Gamma table', file_types=(('Tables', '*.txt *.csv *.npy'), ('All Files', '*.*')), no_window=True)
+                if gammaFile:
+                    cs.preferences['gammaTable'] = gammaFile
+                cs.window['_gammaTable_'].update(value = cs.preferences['gammaTable'], values = cs.gammaChoices())
+            else:
+                cs.preferences['gammaTable'] = values['_gammaTable_']
+            cs.post(cs.reconfigure)
+        elif event == '_calibrationTable_':
+            cs.preferences['calibrationTable'] = values['_calibrationTable_']
+            cs.post(cs.reconfigure)
         elif event == '_stripSaver_':
             cs.preferences['stripSaver'] = values['_stripSaver_']
-            cs.getSaverHandle()
+            cs.post(cs.reconfigure)
         elif event == '_colorOrder_':
             cs.preferences['colorOrder'] = values['_colorOrder_']
             cs.freqSlider.colors='S'+cs.preferences['colorOrder']
@@ -1213,9 +770,9 @@ def main():
         elif event == '_start_':
             cs.preferences['start'] = not cs.preferences['start']
             cs.setupStartButton()
+            cs.post(cs.reconfigure)
         elif event == '_energyDisplay_' or event == '_scrollDisplay_' or event == '_spectrumDisplay_':
             cs.savePreferences()
-            cs.audioStripDisplay = cs.energyDisplay if cs.preferences['energyDisplay'] else cs.scrollDisplay if cs.preferences['scrollDisplay'] else cs.spectrumDisplay
         elif event == 'Enable Output Plot' or event == 'Disable Output Plot':
             cs.preferences['showOutPlot'] = not cs.preferences['showOutPlot']
             cs.preferences['showFreqPlot'] = False
@@ -1233,10 +790,12 @@ def main():
             cs.freqSlider.sliders = [cs.preferences['minFreq'], cs.preferences['lowFreq'], cs.preferences['highFreq'], cs.preferences['maxFreq']]
             cs.freqSlider.drawSlider()
             cs.savePreferences()
-            cs.refreshAudioData()
             cs.window.refresh()
-    
-        cs.loopActions()
+
+        # Any other event can change what an event driven effect (Single) shows
+        if event != sg.TIMEOUT_KEY:
+            cs.post()
+        cs.displayActions()
 
     cs.window.close()
 
@@ -0,0 +1,192 @@
+"""
+Title              : Chromatizer DSP
+Description        : Signal processing building blocks for the audio analysis
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import os, pathlib, numpy as np, scipy.fft
+from functools import lru_cache
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.sparse import csr_matrix
+from scipy.ndimage import correlate1d
+
+class melProjection():
+    """Band-limited sparse (CSR) form of a mel filter bank
+
+    Only the FFT bins between the first and last nonzero weight are kept, so
+    projecting a spectrum onto the mel bands is a single sparse matrix-vector
+    product over the triangle weights.
+    """
+    def __init__(self, melBank, noBins, dtype=np.float64):
+        bank = melBank[:, :noBins]
+        usedBins = np.flatnonzero(bank.any(axis=0))
+        self.lowBin = int(usedBins[0]) if usedBins.size else 0
+        self.highBin = int(usedBins[-1]) + 1 if usedBins.size else 0
+        self.matrix = csr_matrix(bank[:, self.lowBin:self.highBin].astype(dtype))
+
+    def project(self, spectrum):
+        return self.matrix.dot(spectrum[self.lowBin:self.highBin])
+
+    def projectFrames(self, spectra):
+        """Mel energies of a (frames, bins) block of spectra, returned as (frames, bands)"""
+        return self.matrix.dot(spectra[:, self.lowBin:self.highBin].T).T
+
+@lru_cache(maxsize=None)
+def gaussianKernel(sigma, truncate=4.0):
+    """Correlation weights of scipy.ndimage.gaussian_filter1d for sigma, built once and shared read-only"""
+    radius = int(truncate * float(sigma) + 0.5)
+    x = np.arange(-radius, radius + 1)
+    weights = np.exp(-0.5 / (sigma * sigma) * x ** 2)
+    weights = (weights / weights.sum())[::-1]
+    weights.setflags(write=False)
+    return weights
+
+def blur(values, sigma, output):
+    """Gaussian blur along the last axis, every row (colour channel) in one call
+
+    Same result as gaussian_filter1d(values, sigma, output=output) without
+    rebuilding the kernel, output must not overlap values.
+    """
+    return correlate1d(values, gaussianKernel(sigma), axis=-1, output=output, mode='reflect')
+
+@lru_cache(maxsize=None)
+def resampleWeights(oldLength, newLength, dtype=np.float64):
+    """Left and right neighbour and the weight of the right one for every point of a linear resampling, shared read-only"""
+    position = np.linspace(0, oldLength - 1, newLength)
+    left = np.minimum(position.astype(np.intp), max(oldLength - 2, 0))
+    right = np.minimum(left + 1, oldLength - 1)
+    weight = (position - left).astype(dtype)
+    for array in (left, right, weight):
+        array.setflags(write=False)
+    return left, right, weight
+
+def resample(values, newLength):
+    """Linear interpolation of values onto newLength evenly spaced points, in the dtype of values
+
+    Same points as np.interp(np.linspace(0, 1, newLength), np.linspace(0, 1, len(values)), values),
+    which always computes in float64.
+    """
+    if len(values) == newLength:
+        return values
+    left, right, weight = resampleWeights(len(values), newLength, values.dtype)
+    lower = values[left]
+    return np.add(lower, (values[right] - lower) * weight, out=lower)
+
+def slidingFrames(samples, windowLen, hop):
+    """Analysis windows ending every hop samples, as a strided view
+
+    Window k covers the windowLen samples up to (k + 1) * hop, with zeros
+    before the first sample, the same window the capture ring holds after
+    k + 1 chunks.
+    """
+    padded = np.concatenate((np.zeros(windowLen - hop, dtype=samples.dtype), samples))
+    return sliding_window_view(padded, windowLen)[::hop]
+
+class spectrumPlan():
+    """Hamming windowed magnitude spectra of fixed length analysis windows, zero padded to the next power of two
+
+    Planned once per window length: the window, the padded size and the
+    input and magnitude buffers are kept, so a frame is a multiply into the
+    padded buffer, one scipy.fft.rfft and an abs into the magnitudes. A
+    (frames, windowLen) block runs as one batched transform, split over
+    workers threads (-1 for every core).
+    """
+    def __init__(self, windowLen, workers=1, dtype=np.float32):
+        self.windowLen = windowLen
+        self.nFFT = 2**int(np.ceil(np.log2(windowLen)))
+        self.noBins = windowLen // 2
+        self.window = np.hamming(windowLen).astype(dtype)
+        self.workers = workers
+        self.dtype = dtype
+        self.reserve(1)
+
+    def reserve(self, noFrames):
+        self.padded = np.zeros((noFrames, self.nFFT), dtype=self.dtype)
+        self.spectra = np.zeros((noFrames, self.noBins), dtype=self.dtype)
+
+    def magnitudes(self, frames):
+        """First windowLen // 2 magnitude bins of one window or of every row of a block, reused by the next call"""
+        block = frames.reshape(-1, self.windowLen)
+        noFrames = block.shape[0]
+        if noFrames > self.padded.shape[0]:
+            self.reserve(noFrames)
+        padded = self.padded[:noFrames]
+        np.multiply(block, self.window, out=padded[:, :self.windowLen])
+        # overwrite_x lets the transform use its input as scratch, so the padding is cleared every call
+        padded[:, self.windowLen:] = 0
+        spectrum = scipy.fft.rfft(padded, axis=-1, overwrite_x=True, workers=self.workers)
+        spectra = np.abs(spectrum[:, :self.noBins], out=self.spectra[:noFrames])
+        return spectra.reshape(frames.shape[:-1] + (self.noBins,))
+
+def hzToMel(frequencies):
+    """Hz to mel on the Slaney scale (librosa.hz_to_mel with htk=False)"""
+    frequencies = np.asanyarray(frequencies, dtype=np.float64)
+    fSp = 200.0 / 3
+    minLogHz = 1000.0
+    minLogMel = minLogHz / fSp
+    logStep = np.log(6.4) / 27.0
+    mels = frequencies / fSp
+    logRegion = frequencies >= minLogHz
+    mels = np.where(logRegion, minLogMel + np.log(np.maximum(frequencies, minLogHz) / minLogHz) / logStep, mels)
+    return mels
+
+def melToHz(mels):
+    """Mel on the Slaney scale to Hz (librosa.mel_to_hz with htk=False)"""
+    mels = np.asanyarray(mels, dtype=np.float64)
+    fSp = 200.0 / 3
+    minLogHz = 1000.0
+    minLogMel = minLogHz / fSp
+    logStep = np.log(6.4) / 27.0
+    return np.where(mels >= minLogMel, minLogHz * np.exp(logStep * (mels - minLogMel)), fSp * mels)
+
+def melFrequencies(nMels, fMin, fMax):
+    """Center frequencies of nMels bands evenly spaced on the mel scale"""
+    return melToHz(np.linspace(hzToMel(fMin), hzToMel(fMax), nMels))
+
+def melFilterBank(sampleRate, nFFT, nMels, fMin, fMax):
+    """Slaney normalised triangular mel filter bank, same output as librosa.filters.mel"""
+    fftFreqs = np.fft.rfftfreq(n=nFFT, d=1.0 / sampleRate)
+    melF = melFrequencies(nMels + 2, fMin, fMax)
+    fDiff = np.diff(melF)
+    ramps = np.subtract.outer(melF, fftFreqs)
+    lower = -ramps[:-2] / fDiff[:-1, None]
+    upper = ramps[2:] / fDiff[1:, None]
+    weights = np.maximum(0, np.minimum(lower, upper)).astype(np.float32)
+    # Slaney-style area normalisation
+    weights *= (2.0 / (melF[2 : nMels + 2] - melF[:nMels]))[:, None]
+    return weights
+
+def cachedMelBank(cacheDir, sampleRate, nFFT, nMels, fMin, fMax):
+    """Mel band frequencies and filter bank, loaded from cacheDir when this configuration was built before
+
+    Returns
+    -------
+    melFrq : np.array
+        Center frequencies of the nMels bands.
+
+    melBank : np.array
+        (nMels, 1 + nFFT // 2) filter bank weights.
+    """
+    cacheFile = pathlib.Path(cacheDir) / 'melBank_{}_{}_{}_{}_{}.npz'.format(int(sampleRate), int(nFFT), int(nMels), fMin, fMax)
+    try:
+        with np.load(cacheFile) as cached:
+            return cached['melFrq'], cached['melBank']
+    except (OSError, KeyError, ValueError):
+        pass
+
+    melFrq = melFrequencies(nMels, fMin, fMax)
+    melBank = melFilterBank(sampleRate, nFFT, nMels, fMin, fMax)
+    try:
+        cacheFile.parent.mkdir(parents=True, exist_ok=True)
+        # Write aside and rename so an interrupted save never leaves a truncated cache entry
+        tmpFile = cacheFile.with_name(cacheFile.stem + '.{}.tmp.npz'.format(os.getpid()))
+        np.savez(tmpFile, melFrq=melFrq, melBank=melBank)
+        os.replace(tmpFile, cacheFile)
+    except OSError:
+        pass
+    return melFrq, melBank
@@ -0,0 +1,1213 @@
+"""
+Title              : Chromatizer Engine
+Description        : Audio analysis, strip effects and LED output without the GUI
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import sys, json, queue, argparse, pathlib, traceback, numpy as np, pyaudio
+from numpy.lib.stride_tricks import sliding_window_view
+from time import time, sleep, monotonic
+from threading import Event, Thread
+from dsp import melProjection, spectrumPlan, cachedMelBank, blur, resample
+from palette import hueWheel, linearLookup, loadColorTable, colorCorrection
+from outputs import udpSender, espEncoder, ddpEncoder, e131Encoder, parseOutputMap, piSender, openPiStrip
+from shows import showFile
+from metrics import stageMetrics
+
+debugOn = False
+gammaDefault =  np.array([  0,   0,   0,   0,   0,   0,   0,   0,   0,   0,   0,   0,   1,   1,   1,   1,   1,   1,   1,   1,   2,   2,   2,   2,   2,   2,   3,   3,   3,   3,   4,   4,   4,   4,   5,   5,   5,   5,   6,   6,   6,   7,   7,   7,   8,   8,   8,   9,   9,   9,  10,  10,
+                            11,  11,  11,  12,  12,  13,  13,  14,  14,  15,  15,  16,  16,  17,  17,  18,  18,  19,  19,  20,  20,  21,  21,  22,  23,  23,  24,  24,  25,  26,  26,  27,  28,  28,  29,  30,  30,  31,  32,  32,  33,  34,  35,  35,  36,  37,  38,  38,  39,  40,  41,  42,
+                            42,  43,  44,  45,  46,  47,  47,  48,  49,  50,  51,  52,  53,  54,  55,  56,  56,  57,  58,  59,  60,  61,  62,  63,  64,  65,  66,  67,  68,  69,  70,  71,  73,  74,  75,  76,  77,  78,  79,  80,  81,  82,  84,  85,  86,  87,  88,  89,  91,  92,  93,  94,
+                            95,  97,  98,  99, 100, 102, 103, 104, 105, 107, 108, 109, 111,  112, 113, 115, 116, 117, 119, 120, 121, 123, 124, 126, 127, 128, 130, 131, 133, 134, 136, 137, 139, 140, 142, 143, 145, 146, 148, 149, 151, 152, 154, 155, 157, 158, 160, 162, 163, 165, 166, 168,
+                            170, 171, 173, 175, 176, 178, 180, 181, 183, 185, 186, 188, 190, 192, 193, 195, 197, 199, 200, 202, 204, 206, 207, 209, 211, 213, 215, 217, 218, 220, 222, 224, 226, 228, 230, 232, 233, 235, 237, 239, 241, 243, 245, 247, 249, 251, 253, 255])
+
+speedMap = linearLookup([0, 100], [80, 0], dtype=int)
+starLifeMap = linearLookup([5, 45], [300, 3000], dtype=int)
+# Hue step of the rainbow per frame
+RAINBOW_STEP = 0.0016
+# pipelineDtype preference to the dtype analysis, filters, effects and the frame compute in
+PIPELINE_DTYPES = {'float64': np.float64, 'float32': np.float32}
+
+def getPrefFile() -> pathlib.Path:
+    """
+    Returns a parent directory path
+    where persistent application data can be stored.
+
+    linux: ~/.local/share
+    macOS: ~/Library/Application Support
+    windows: C:/Users/<USER>/AppData/Roaming
+    """
+
+    filePath = pathlib.Path.home()
+
+    if sys.platform == "win32":
+        filePath = filePath / "AppData/Roaming"
+    elif sys.platform == "linux":
+        filePath = filePath / ".local/share"
+    elif sys.platform == "darwin":
+        filePath = filePath / "Library/Application Support"
+    
+    return filePath / "chromatizer/preferences.json"
+
+def debugPrint(*args):
+    if debugOn:
+        print(*args)
+        print('\n')
+
+class expFilter:
+    """Simple exponential smoothing filter
+
+    Array filters are updated in place: value is a preallocated state array
+    and update() returns it, so nothing is allocated per frame.
+    """
+    def __init__(self, val=0.0, alpha_decay=0.5, alpha_rise=0.5, dtype=np.float64):
+        """Small rise / decay factors = more smoothing, array state is kept in dtype"""
+        assert np.all(0.0 < np.asarray(alpha_decay)) and np.all(np.asarray(alpha_decay) < 1.0), 'Invalid decay smoothing factor'
+        assert np.all(0.0 < np.asarray(alpha_rise)) and np.all(np.asarray(alpha_rise) < 1.0), 'Invalid rise smoothing factor'
+        self.alpha_decay = alpha_decay
+        self.alpha_rise = alpha_rise
+        if isinstance(val, (list, np.ndarray, tuple)):
+            self.value = np.array(val, dtype=dtype)
+            self.alpha = np.empty_like(self.value)
+            self.riseTerm = np.empty_like(self.value)
+            self.mask = np.empty(self.value.shape, dtype=bool)
+        else:
+            self.value = val
+
+    def update(self, value):
+        if isinstance(self.value, np.ndarray):
+            alpha = self.alpha
+            # alpha = rise where the input is above the state, decay elsewhere
+            np.greater(value, self.value, out=self.mask)
+            np.copyto(alpha, self.alpha_decay)
+            np.copyto(alpha, self.alpha_rise, where=self.mask)
+            # value = alpha * value + (1.0 - alpha) * self.value, same operation order as the scalar filter
+            np.multiply(alpha, value, out=self.riseTerm)
+            np.subtract(1.0, alpha, out=alpha)
+            np.multiply(alpha, self.value, out=alpha)
+            np.add(self.riseTerm, alpha, out=self.value)
+        else:
+            alpha = self.alpha_rise if value > self.value else self.alpha_decay
+            self.value = alpha * value + (1.0 - alpha) * self.value
+        return self.value
+    
+    def updateDecay(self, value):
+        self.alpha_decay = value
+
+class expFilterBank(expFilter):
+    """Several same-shaped exponential filters stacked on the first axis, updated in one call
+
+    Rise / decay factors can be given per filter. update() takes either one
+    input per filter or a single input shared by all of them.
+    """
+    def __init__(self, val, alpha_decay=0.5, alpha_rise=0.5, dtype=np.float64):
+        val = np.array(val, dtype=dtype)
+        perFilter = (-1,) + (1,) * (val.ndim - 1)
+        expFilter.__init__(self, val, np.reshape(alpha_decay, perFilter) if np.ndim(alpha_decay) else alpha_decay, np.reshape(alpha_rise, perFilter) if np.ndim(alpha_rise) else alpha_rise, dtype)
+
+    def updateDecay(self, value):
+        self.alpha_decay = np.reshape(value, (-1,) + (1,) * (self.value.ndim - 1)) if np.ndim(value) else value
+
+class frameBuffer():
+    """Strip colors in one preallocated 3 x noPixels array
+
+    Mirrored effects draw the right half (half, a view starting at the
+    center) and mirror() copies it reversed onto the left half in place.
+    scratch is a same-shaped work array for filters that cannot run in place.
+
+    Effects draw levels (0 - 255) into levels, in the compute dtype of
+    PIPELINE_DTYPES.
+    """
+    def __init__(self, noPixels, val=0.0, dtype='float64'):
+        self.resize(noPixels, val, dtype)
+
+    def resize(self, noPixels, val=0.0, dtype=None):
+        self.dtype = dtype or self.dtype
+        self.noPixels = noPixels
+        self.levels = np.full((3, noPixels), val, dtype=PIPELINE_DTYPES[self.dtype])
+        self.scratch = np.zeros_like(self.levels)
+        self.half = self.levels[:, noPixels // 2:]
+        self.scratchHalf = self.scratch[:, noPixels // 2:]
+        # The center pixel of an odd length strip is not repeated
+        self.left = self.levels[:, :noPixels // 2]
+        self.mirrorSource = self.half[:, ::-1][:, :noPixels // 2]
+
+    def mirror(self):
+        np.copyto(self.left, self.mirrorSource)
+
+    def isClear(self):
+        return not self.levels.any()
+
+    def clear(self):
+        self.levels.fill(0.0)
+
+class audioRing():
+    """Circular audio buffer filled from the PyAudio stream callback
+
+    Samples are written twice, at idx and idx + capacity, so the latest
+    analysis windows are always available as a view without copying.
+    """
+    def __init__(self, noFrames, audioRoll, tgtFPS):
+        # Analysis window plus ~0.5 s of history so a stalled reader can catch up
+        self.windowLen = noFrames * audioRoll
+        self.hop = noFrames
+        self.capacity = noFrames * (audioRoll + max(1, tgtFPS // 2))
+        self.maxWindows = (self.capacity - self.windowLen) // self.hop + 1
+        self.buffer = np.zeros(2 * self.capacity, dtype=np.float32)
+        self.head = 0
+        self.count = 0
+        self.readCount = 0
+        self.overflows = 0
+        self.newData = Event()
+
+    def write(self, samples):
+        n = samples.size
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            n = self.capacity
+        head = self.head
+        first = min(n, self.capacity - head)
+        for offset in (0, self.capacity):
+            np.multiply(samples[:first], 1.0 / 2.0**15, out=self.buffer[offset + head : offset + head + first])
+            if n > first:
+                np.multiply(samples[first:], 1.0 / 2.0**15, out=self.buffer[offset : offset + n - first])
+        self.head = (head + n) % self.capacity
+        self.count += n
+        self.newData.set()
+
+    def callback(self, inData, frameCount, timeInfo, status):
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+        self.write(np.frombuffer(inData, dtype=np.int16))
+        return (None, pyaudio.paContinue)
+
+    def window(self):
+        """Latest windowLen samples as a view into the ring, oldest first"""
+        end = self.head + self.capacity
+        return self.buffer[end - self.windowLen : end]
+
+    def windows(self, count):
+        """Latest count analysis windows, hop samples apart, as a (count, windowLen) view, oldest first"""
+        end = self.head + self.capacity
+        return sliding_window_view(self.buffer[end - self.windowLen - (count - 1) * self.hop : end], self.windowLen)[::self.hop]
+
+    def read(self, timeout=None):
+        """Wait for the next callback chunk and return the windows of every chunk since the last read
+
+        At least the latest window, at most the history the ring still holds.
+        """
+        self.newData.wait(timeout)
+        self.newData.clear()
+        pending = (self.count - self.readCount) // self.hop
+        self.readCount += pending * self.hop
+        return self.windows(min(max(pending, 1), self.maxWindows))
+
+def getCloser(array, searchItem):
+    absolute_val_array = np.abs(array - searchItem)
+    smallest_difference_index = absolute_val_array.argmin()
+    return array[smallest_difference_index[0]]
+
+def clamp(n, minVal, maxVal):
+    return max(min(maxVal, n), minVal)
+
+class starField():
+    """Twinkling stars held as arrays, one entry per star
+
+    A star fades in over the first third of its life, holds, fades out over
+    the last third and is then respawned at a new position with a new
+    target colour and life span.
+    """
+    def __init__(self, noStars, noPixels, starMaxLife, starRed, starGreen, starBlue, seed=None, dtype=np.float64):
+        self.rng = np.random.default_rng(seed)
+        self.pos = np.zeros(noStars, dtype=np.intp)
+        self.age = np.zeros(noStars, dtype=np.int64)
+        self.life = np.ones(noStars, dtype=np.int64)
+        self.riseEnd = np.zeros(noStars, dtype=np.int64)
+        self.fallStart = np.zeros(noStars, dtype=np.int64)
+        self.tgtClr = np.zeros((3, noStars), dtype=dtype)
+        self.clrStep = np.zeros((3, noStars), dtype=dtype)
+        self.clr = np.zeros((3, noStars), dtype=dtype)
+        self.clrDelta = np.zeros((3, noStars), dtype=dtype)
+        self.expired = np.zeros(noStars, dtype=bool)
+        # +1 while fading in, -1 while fading out, 0 in between
+        self.direction = np.zeros(noStars, dtype=dtype)
+        self.falling = np.zeros(noStars, dtype=dtype)
+        self.starMaxLife = None
+        self.newSpawn(np.ones(noStars, dtype=bool), noPixels, starMaxLife, starRed, starGreen, starBlue)
+
+    def newSpawn(self, spawn, noPixels, starMaxLife, starRed, starGreen, starBlue):
+        spawn = np.flatnonzero(spawn)
+        self.age[spawn] = 0
+        self.pos[spawn] = self.rng.integers(1, max(noPixels, 2), spawn.size)
+        # Target colour below the slider values, a zero slider keeps that colour off
+        tgtClr = self.rng.integers(0, np.maximum([[starRed], [starGreen], [starBlue]], 1), (3, spawn.size))
+        if starMaxLife != self.starMaxLife:
+            self.starMaxLife = starMaxLife
+            self.maxLifeSpan = max(starLifeMap(starMaxLife), 2)
+        # At least one frame, a zero life span would divide by zero below
+        life = self.rng.integers(1, self.maxLifeSpan, spawn.size)
+        self.tgtClr[:, spawn] = tgtClr
+        self.clr[:, spawn] = 0.0
+        self.life[spawn] = life
+        self.riseEnd[spawn] = life // 3
+        self.fallStart[spawn] = 2 * life // 3
+        self.clrStep[:, spawn] = 3 * tgtClr / life
+
+    def starLife(self, noPixels, starMaxLife, starRed, starGreen, starBlue):
+        """Age every star by one frame, respawning the ones at the end of their life"""
+        np.equal(self.age, self.life, out=self.expired)
+        if self.expired.any():
+            self.newSpawn(self.expired, noPixels, starMaxLife, starRed, starGreen, starBlue)
+        self.age += 1
+        np.less(self.age, self.riseEnd, out=self.direction)
+        np.greater(self.age, self.fallStart, out=self.falling)
+        np.subtract(self.direction, self.falling, out=self.direction)
+        np.multiply(self.clrStep, self.direction, out=self.clrDelta)
+        np.add(self.clr, self.clrDelta, out=self.clr)
+
+    def render(self, pixels):
+        """Add every star's current colour into a zeroed 3 x noPixels array"""
+        for color in range(3):
+            np.add.at(pixels[color], self.pos, self.clr[color])
+
+defaultPreferences = {'audioDevice': '--Refresh Audio Devices--',
+                      'stripSaver': 'None',
+                      'energyDisplay': False,
+                      'scrollDisplay': True,
+                      'spectrumDisplay': False,
+                      'displayEffect': 'Audio',
+                      'colorOrder': 'BRG',
+                      'brightness': 90,
+                      'dispFPS': False,
+                      'noPixels': 150,
+                      'tgtFPS': 80,
+                      'noFFT': 32,
+                      'gainLimit': 0.9,
+                      'volTol': 0.0001,
+                      'audioRoll': 2,
+                      'adAudio': 0.9,
+                      'adGain': 0.5,
+                      'adLED': 0.5,
+                      'gammaTable': 'Default',
+                      'calibrationTable': '',
+                      'wbRed': 100,
+                      'wbGreen': 100,
+                      'wbBlue': 100,
+                      'clrClose': True,
+                      'minFreq': 100,
+                      'lowFreq': 720,
+                      'highFreq': 5000,
+                      'maxFreq': 12000,
+                      'arAudio': 0.99,
+                      'arGain': 0.99,
+                      'arLED': 0.9,
+                      'espUDPIP': '192.168.0.150',
+                      'espUDPPort': 7777,
+                      'espSoftGamma': False,
+                      'espDeltaThreshold': 0,
+                      'espKeyframe': 80,
+                      'espOutputMap': '',
+                      'ddpIP': '192.168.0.150',
+                      'ddpPort': 4048,
+                      'ddpSoftGamma': True,
+                      'e131IP': '192.168.0.150',
+                      'e131Port': 5568,
+                      'e131Universe': 1,
+                      'e131SoftGamma': True,
+                      'rpLEDPin': 18,
+                      'rpLEDFreq': 800000,
+                      'rpLEDdma': 5,
+                      'rpLEDInvert': False,
+                      'rpUseWeb': False,
+                      'rpSoftGamma': True,
+                      'rpColorOrder': 'GRB',
+                      'activeDevice': 'ESP 8266',
+                      'showOutPlot': False,
+                      'showFreqPlot': False,
+                      'showGainPlot': False,
+                      'rainbowSpeed': 75,
+                      'rainbowSat': 100,
+                      'rainbowVal': 100,
+                      'paletteSize': 1024,
+                      'singleRed': 255,
+                      'singleGreen': 95,
+                      'singleBlue': 31,
+                      'start': True,
+                      'starMaxLife': 30.0,
+                      'noStars': 10,
+                      'starRed': 255,
+                      'starGreen': 150,
+                      'starBlue': 255,
+                      'showFile': '',
+                      'metricsFile': '',
+                      'metricsInterval': 5.0,
+                      'dspProcess': False,
+                      'pipelineDtype': 'float64',
+                      'fftWorkers': 1}
+
+# Engine state built from the preferences, reconfigure() rebuilds only the parts whose preferences changed.
+# Preferences not listed here are read every frame.
+PREFERENCE_DEPENDENTS = {'audio': ('audioDevice', 'tgtFPS', 'audioRoll', 'noFFT', 'minFreq', 'maxFreq', 'pipelineDtype', 'fftWorkers'),
+                         'bands': ('lowFreq', 'highFreq', 'pipelineDtype'),
+                         'smoothing': ('noFFT', 'adAudio', 'arAudio', 'adGain', 'arGain', 'adLED', 'arLED', 'pipelineDtype'),
+                         'frame': ('noPixels', 'pipelineDtype'),
+                         'stars': ('noPixels', 'noStars', 'pipelineDtype'),
+                         'effect': ('displayEffect', 'start'),
+                         'saver': ('stripSaver',),
+                         'display': ('energyDisplay', 'scrollDisplay', 'spectrumDisplay'),
+                         'show': ('showFile',),
+                         'color': ('gammaTable', 'calibrationTable'),
+                         'output': ('activeDevice', 'noPixels', 'espUDPIP', 'espUDPPort', 'espSoftGamma', 'espDeltaThreshold', 'espKeyframe', 'espOutputMap',
+                                    'ddpIP', 'ddpPort', 'e131IP', 'e131Port', 'e131Universe', 'rpLEDPin', 'rpLEDFreq', 'rpLEDdma', 'rpLEDInvert', 'rpColorOrder')}
+
+def preferenceDict(preferences):
+    """Plain dict of the GUI's UserSettings or the engine's preferences"""
+    return dict(preferences.get_dict() if hasattr(preferences, 'get_dict') else preferences)
+
+def loadPreferences(prefFile):
+    """Read a preferences json written by the GUI, missing keys take the defaults"""
+    preferences = dict(defaultPreferences)
+    prefFile = pathlib.Path(prefFile)
+    if prefFile.is_file():
+        with open(prefFile, 'r') as f:
+            preferences.update(json.load(f))
+    return preferences
+
+def writePreferences(prefFile, preferences):
+    """Write the preferences json in one go, replaced atomically so a reader never sees half a file"""
+    prefFile = pathlib.Path(prefFile)
+    prefFile.parent.mkdir(parents=True, exist_ok=True)
+    tmpFile = prefFile.with_name(prefFile.name + '.tmp')
+    with open(tmpFile, 'w') as f:
+        json.dump(preferenceDict(preferences), f)
+    tmpFile.replace(prefFile)
+
+class chromaEngine():
+    """Audio analysis, strip effects and LED output, shared by the GUI and headless mode"""
+
+    audioDevices = {}
+    displayEffect = []
+    activeDevice = []
+    audioStream = []
+    noFrames = []
+    audioSampleRate = []
+    audioRing = []
+    streamConfig = None
+    fftPlan = None
+    readTimeout = None
+    melFrq = []
+    udpSenders = []
+    outputMap = []
+    outputDevice = None
+    piOutput = None
+    melGain = None
+    piConfig = None
+    melBank = []
+    melProj = []
+    leftIndex = 0
+    rightIndex = 0
+    bandGain = []
+    displayRefresh = [False, False] # 0 idx - flag to clear strip and 1 idx - condition to set the flag
+    twinkleStars = None
+    show = None
+    renderThread = None
+    singleKey = None
+    worker = None
+
+    def getAudioDevices(self):
+        debugPrint('in getAudioDevices')
+        info = self.pa.get_host_api_info_by_index(0)
+        numDevices = info.get('deviceCount')
+        self.audioDevices = {}
+        for i in range(0, numDevices):
+            if (self.pa.get_device_info_by_host_api_device_index(0, i).get('maxInputChannels')) > 0:
+                self.audioDevices[self.pa.get_device_info_by_host_api_device_index(0, i).get('name')] = i
+        if self.preferences['audioDevice'] == '--Refresh Audio Devices--' or self.preferences['audioDevice'] not in self.audioDevices.keys():
+            self.preferences['audioDevice'] = self.pa.get_default_input_device_info()['name']
+        self.refreshAudioData()
+    
+    def getFPS(self):
+        """Return the estimated frames per second
+
+        Returns the current estimate for frames-per-second (FPS).
+        FPS is estimated by measured the amount of time that has elapsed since
+        this function was previously called. The FPS estimate is low-pass filtered
+        to reduce noise.
+
+        This function is intended to be called one time for every iteration of
+        the program's main loop.
+
+        Returns
+        -------
+        fps : float
+            Estimated frames-per-second. This value is low-pass filtered
+            to reduce noise.
+        """
+        currTime = time() * 1000.0
+        dt = currTime - self.fpsTime
+        self.fpsTime = currTime
+        if dt == 0.0:
+            return self.fps.value
+        return self.fps.update(1000.0 / dt)
+
+    def sendToESP(self):
+        debugPrint('inSendToESP')
+        self.sendToUDP(self.preferences['espSoftGamma'])
+
+    def sendToDDP(self):
+        debugPrint('inSendToDDP')
+        self.sendToUDP(self.preferences['ddpSoftGamma'])
+
+    def sendToE131(self):
+        debugPrint('inSendToE131')
+        self.sendToUDP(self.preferences['e131SoftGamma'])
+
+    def outputPixels(self, softGamma):
+        """The frame as uint8 at the set brightness and white balance, gamma corrected when softGamma is set"""
+        whiteBalance = (self.preferences['wbRed'], self.preferences['wbGreen'], self.preferences['wbBlue'])
+        self.colorCorrection.set(self.preferences['brightness'], self.gammaTable if softGamma else None, whiteBalance, self.calibrationTable)
+        return self.colorCorrection.apply(self.frame.levels)
+
+    def sendToUDP(self, softGamma):
+        # Everything since the last lap was the effect rendering this frame
+        self.metrics.lap('effect')
+        p = self.outputPixels(softGamma)
+        # Every controller gets its own slice of the frame, encoded and sent on its own thread
+        for sender, (ip, port, start, stop) in zip(self.udpSenders, self.outputMap):
+            sender.submit(p[:, start:stop], (ip, port), self.displayRefresh[0])
+        self.displayRefresh[0] = False
+        self.metrics.lap('output')
+
+    def sendToNone(self):
+        debugPrint('inSendToNone')
+
+    def sendToPi(self):
+        debugPrint('inSendToPi')
+        self.metrics.lap('effect')
+        # Packed here, shown on the sender's own thread
+        if self.piOutput is not None:
+            self.piOutput.submit(self.outputPixels(self.preferences['rpSoftGamma']))
+        self.metrics.lap('output')
+
+    def setupDisplayDevice(self):
+        if self.preferences['activeDevice'] == 'ESP 8266':
+            self.displayFunction = self.sendToESP
+        elif self.preferences['activeDevice'] == 'DDP':
+            self.displayFunction = self.sendToDDP
+        elif self.preferences['activeDevice'] == 'E1.31':
+            self.displayFunction = self.sendToE131
+        # Raspberry Pi controls the LED strip directly
+        elif self.preferences['activeDevice'] == 'Raspberry Pi':
+            self.displayFunction = self.sendToPi
+        # Only the outputs of the active device stay open
+        self.configureOutput()
+        self.configurePi()
+
+    def configurePi(self):
+        """Strip driver and sender for the Raspberry Pi, reopened only when the strip settings change"""
+        if self.preferences['activeDevice'] != 'Raspberry Pi':
+            self.closePi()
+            return
+        piConfig = (self.preferences['noPixels'], self.preferences['rpLEDPin'], self.preferences['rpLEDFreq'], self.preferences['rpLEDdma'], self.preferences['rpLEDInvert'])
+        if piConfig != self.piConfig:
+            self.closePi()
+            self.piOutput = piSender(openPiStrip(*piConfig), self.preferences['rpColorOrder'], metrics=self.metrics)
+            self.piConfig = piConfig
+        self.piOutput.setColorOrder(self.preferences['rpColorOrder'])
+
+    def closePi(self):
+        if self.piOutput is not None:
+            self.piOutput.close()
+        self.piOutput = None
+        self.piConfig = None
+
+    def configureOutput(self):
+        """UDP senders for the controllers of activeDevice, only rebuilt when the controllers or their protocol change"""
+        device = self.preferences['activeDevice']
+        noPixels = self.preferences['noPixels']
+        if device == 'ESP 8266':
+            try:
+                outputMap = parseOutputMap(self.preferences['espOutputMap'], self.preferences['espUDPIP'], self.preferences['espUDPPort'], noPixels)
+            except ValueError as err:
+                # Keep sending to the controllers configured last
+                print('Could not apply the output map:', err)
+                return
+            newEncoder = espEncoder
+        elif device == 'DDP':
+            outputMap = [(self.preferences['ddpIP'], self.preferences['ddpPort'], 0, noPixels)]
+            newEncoder = ddpEncoder
+        elif device == 'E1.31':
+            outputMap = [(self.preferences['e131IP'], self.preferences['e131Port'], 0, noPixels)]
+            newEncoder = lambda noPixels: e131Encoder(noPixels, self.preferences['e131Universe'])
+            device = (device, self.preferences['e131Universe'])
+        else:
+            self.closeOutputs()
+            return
+        if outputMap != self.outputMap or device != self.outputDevice:
+            self.closeOutputs()
+            self.udpSenders = [udpSender(stop - start, metrics=self.metrics, encoder=newEncoder(stop - start)) for ip, port, start, stop in outputMap]
+            self.outputMap = outputMap
+            self.outputDevice = device
+        if device == 'ESP 8266':
+            # Deltas are judged on the gamma corrected values, the ESP firmware applies its own (default) gamma when software gamma is off
+            perceptualTable = None if self.preferences['espSoftGamma'] else gammaDefault
+            for sender in self.udpSenders:
+                sender.configure(self.preferences['espDeltaThreshold'], self.preferences['espKeyframe'], perceptualTable)
+
+    def closeOutputs(self):
+        for sender in self.udpSenders:
+            sender.close()
+        self.udpSenders = []
+        self.outputMap = []
+        self.outputDevice = None
+
+    def stripClear(self):
+        #time.sleep(.05);
+        debugPrint('inStripClear')
+        if self.frame.isClear() and self.displayRefresh[1]:
+            self.displayRefresh[0] = True
+            self.displayRefresh[1] = False
+
+        tmpPixels = self.frame.half
+        # Scrolling effect window
+        tmpPixels[:, 1:] = tmpPixels[:, :-1]
+        # Create new color originating at the center
+        tmpPixels[0, 0] = 0
+        tmpPixels[1, 0] = 0
+        tmpPixels[2, 0] = 0
+
+        # Update the LED strip
+        # print('R {:.0f} G {:.0f} B {:.0f}'.format(r, g, b))
+        self.frame.mirror()
+
+    def stripTwinkle(self):
+        debugPrint('inStripTwinkle')
+        self.readTimeout = 10
+        if not self.frame.isClear() and self.displayRefresh[1]: #Clear the strip and stop when it is cleared
+            self.stripClear()
+            self.displayRefresh[0] = True
+            self.resetStars()
+        else:
+            self.displayRefresh[1] = False
+            tmpPixels = self.frame.scratch
+            tmpPixels.fill(0.0)
+            self.twinkleStars.starLife(self.preferences['noPixels'], self.preferences['starMaxLife'], self.preferences['starRed'], self.preferences['starGreen'], self.preferences['starBlue'])
+            self.twinkleStars.render(tmpPixels)
+            
+            # Apply blur to smooth the edges and give 'glow'
+            blur(tmpPixels, 1.5, self.frame.levels)
+            
+
+    def stripRainbow(self):
+        debugPrint('inStripRainbow')
+        self.readTimeout = speedMap(self.preferences['rainbowSpeed'])
+
+        paletteSize = self.preferences['paletteSize']
+        wheel = hueWheel(paletteSize, self.preferences['rainbowSat']/100, self.preferences['rainbowVal']/100, 60)
+        self.rainbowHue = (self.rainbowHue + RAINBOW_STEP) % 1.0
+
+        # Scrolling effect window, whatever was on the strip scrolls out
+        tmpPixels = self.frame.half
+        tmpPixels[:, 1:] = tmpPixels[:, :-1]
+        # Create new color originating at the center
+        tmpPixels[:, 0] = wheel[:, int(self.rainbowHue * paletteSize + 0.5) % paletteSize]
+
+        # Update the LED strip
+        self.frame.mirror()
+
+    def scrollDisplay(self, allMelValues):
+        debugPrint('inScrollDisplay')
+        tmpPixels = self.frame.half
+        melValues = np.copy(allMelValues[0])
+        # melValues = melValues**2.0
+        melValues *= 255.0
+
+        valueMap = {}
+        # Color channel mappings
+        valueMap[self.preferences['colorOrder'][2]] = int(np.max(melValues[allMelValues[2] : self.preferences['noFFT']]))
+        valueMap[self.preferences['colorOrder'][1]] = int(np.max(melValues[allMelValues[1] : allMelValues[2]]))
+        valueMap[self.preferences['colorOrder'][0]] = int(np.max(melValues[0 : allMelValues[1]]))
+
+        # Crude beat detection
+        if max(valueMap.values()) - np.max(tmpPixels[:,0:10]) > 10:
+            # print('Value amplified, max value:', max(valueMap.values()), '  diff: ', max(valueMap.values()) - np.max(tmpPixels[:,0:10]))
+            tmpPixels[:,0:10] *= self.beatFade
+            valueMap['R'] = valueMap['R']*1.5
+            valueMap['G'] = valueMap['G']*1.5
+            valueMap['B'] = valueMap['B']*1.5
+
+        # Scrolling values
+        tmpPixels[:, 1:] = tmpPixels[:, :-1]
+        tmpPixels *= 0.98
+        blur(tmpPixels, 0.2, self.frame.scratchHalf)
+        np.copyto(tmpPixels, self.frame.scratchHalf)
+
+        # Create new color originating at the center
+        tmpPixels[0, 0] = valueMap['R']
+        tmpPixels[1, 0] = valueMap['G']
+        tmpPixels[2, 0] = valueMap['B']
+
+        # Update the LED strip
+        self.frame.mirror()
+
+    def energyDisplay(self, allMelValues):
+        debugPrint('inEnergyDisplay')
+        tmpPixels = self.frame.half
+        melValues = np.copy(allMelValues[0])
+        # Scale by the width of the LED strip
+        melValues *= float((self.preferences['noPixels'] // 2) - 1)
+
+        valueMap = {}
+        # Color channel mappings
+        scale = 0.94
+        valueMap[self.preferences['colorOrder'][2]] = int(np.mean(melValues[allMelValues[2] : self.preferences['noFFT']])**scale)
+        valueMap[self.preferences['colorOrder'][1]] = int(np.mean(melValues[allMelValues[1] : allMelValues[2]])**scale)
+        valueMap[self.preferences['colorOrder'][0]] = int(np.mean(melValues[0 : allMelValues[1]])**scale)
+
+        maxBrightness = 200.0
+        # Assign color to different frequency regions
+        tmpPixels[0, :valueMap['R']] = maxBrightness
+        tmpPixels[0, valueMap['R']:] = 0.0
+        tmpPixels[1, :valueMap['G']] = maxBrightness
+        tmpPixels[1, valueMap['G']:] = 0.0
+        tmpPixels[2, :valueMap['B']] = maxBrightness
+        tmpPixels[2, valueMap['B']:] = 0.0
+        self.ledFlt.update(tmpPixels)
+        roundPixels = np.round(self.ledFlt.value, out=self.frame.scratchHalf)
+
+        # Apply substantial blur to smooth the edges
+        blur(roundPixels, 4.0, tmpPixels)
+
+        # Update the LED strip
+        self.frame.mirror()
+
+    def spectrumDisplay(self, allMelValues):
+        debugPrint('inSpectrumDisplay')
+        melValues = allMelValues[0]
+        # melValues = melValues**2.0
+
+        melSpectrum = np.copy(resample(melValues, self.preferences['noPixels'] // 2))
+        # Row 0 follows the current spectrum, row 1 the slowly decaying old spectrum
+        currSpectrum, oldSpectrum = self.spectrumFlt.update(melSpectrum)
+        diff = melSpectrum - self.oldSpectrum
+        self.oldSpectrum = np.copy(melSpectrum)
+
+        valueMap = {}
+        # Color channel mappings
+        valueMap[self.preferences['colorOrder'][2]] = self.spectrumDiff.update(melSpectrum - currSpectrum)
+        valueMap[self.preferences['colorOrder'][1]] = np.abs(diff)
+        valueMap[self.preferences['colorOrder'][0]] = oldSpectrum
+
+        # Right half of the strip, mirrored for symmetric output
+        tmpPixels = self.frame.half
+        noValues = self.preferences['noPixels'] // 2
+        np.multiply(valueMap['R'], 255, out=tmpPixels[0, :noValues])
+        np.multiply(valueMap['G'], 255, out=tmpPixels[1, :noValues])
+        np.multiply(valueMap['B'], 255, out=tmpPixels[2, :noValues])
+        tmpPixels[:, noValues:] = 0.0
+
+        # Update the LED strip
+        self.frame.mirror()
+
+    def audioEffect(self):
+        debugPrint('inAudioEffect')
+        # Blocks until the stream callback delivers the next chunk, the windows themselves are a view into the ring
+        audioFrames = self.audioRing.read(timeout=2.0 * self.noFrames / self.audioSampleRate)
+        self.metrics.wait('wait')
+
+        vols = np.max(np.abs(audioFrames), axis=1)
+        if vols[-1] < self.preferences['volTol']:
+            self.stripSaver()
+            self.displayFunction()
+        else:
+            self.readTimeout = 0
+            melFrames = self.analyseAudio(audioFrames)
+            # Chunks that arrived while the previous frame ran late only step the gain and smoothing filters
+            for frameNo in np.flatnonzero(vols[:-1] >= self.preferences['volTol']):
+                self.smoothMel(np.copy(melFrames[frameNo]))
+            self.renderMel(np.copy(melFrames[-1]))
+            self.displayFunction()
+
+        debugPrint('Volume: ', vols[-1])
+
+    def analyseAudio(self, audioData):
+        """Mel energies of one analysis window, or (frames, bands) of a block of windows: Hamming window, zero padded rfft and mel projection"""
+        audioDataFreq = self.fftPlan.magnitudes(audioData)
+        self.metrics.lap('fft')
+        melValues = self.melProj.project(audioDataFreq) if audioDataFreq.ndim == 1 else self.melProj.projectFrames(audioDataFreq)
+        self.metrics.lap('melProjection')
+        return melValues
+
+    def renderMel(self, melValues):
+        """Gain, smoothing and band weighting of one frame of mel energies, then the selected audio display"""
+        self.displayRefresh[1] = True
+        melValues = self.smoothMel(melValues)
+        self.metrics.lap('smoothing')
+        self.audioStripDisplay((melValues, self.leftIndex, self.rightIndex))
+
+    def smoothMel(self, melValues):
+        """Gain and smoothing filter update for one frame of mel energies, returns the band weighted values"""
+        # melValues = melValues**2.0
+        melMax = np.max(blur(melValues, 1.0, self.melBlurred))
+        gainCheck = int(np.max(self.melGain.value) > self.preferences['gainLimit'])
+        self.melGain.updateDecay((gainCheck)*self.melGain.alpha_decay + (1-gainCheck)*0.0005)
+        self.melGain.update((gainCheck)*melMax + (1-gainCheck)*self.preferences['gainLimit'])
+
+        melValues /= self.melGain.value
+        melValues = self.melSmooth.update(melValues)
+
+        leftIndex = self.leftIndex
+        rightIndex = self.rightIndex
+        melValues *= self.bandGain
+
+        lowBand = melValues[0 : leftIndex + 1]
+        midBand = melValues[leftIndex : rightIndex + 1]
+        highBand = melValues[rightIndex : self.preferences['noFFT']]
+        self.melData = (melMax, lowBand, midBand, highBand)
+        # self.ledSmooth.update(melValues)
+        # melValues /= self.ledSmooth.value
+
+        debugPrint('Audio Data: ', melValues, )
+        debugPrint('gain: ',self.melGain.value,'\t','melMax',melMax)
+        return melValues
+
+    def rainbowEffect(self):
+        debugPrint('inRainbowEffect')
+        self.readTimeout = speedMap(self.preferences['rainbowSpeed'])
+        self.stripRainbow()
+        self.displayFunction()
+
+    def twinkleEffect(self):
+        debugPrint('inTwinkleEffect')
+        self.readTimeout = 10
+        self.stripTwinkle()
+        self.displayFunction()
+
+    def singleEffect(self):
+        debugPrint('inSingleEffect')
+        singleKey = (self.preferences['singleRed'], self.preferences['singleGreen'], self.preferences['singleBlue'], self.frame.noPixels)
+        if singleKey == self.singleKey:
+            # Static frame, only drawn again when a colour slider changes
+            np.copyto(self.frame.levels, self.singleFrame)
+            self.displayFunction()
+            return
+
+        tmpPixels = self.frame.scratchHalf
+        tmpLen = int(tmpPixels.shape[1]*0.55)
+        # Assign color to different frequency regions
+        tmpPixels[0, :tmpLen] = self.preferences['singleRed']
+        tmpPixels[0, tmpLen:] = 0.0
+        tmpPixels[1, :tmpLen] = self.preferences['singleGreen']
+        tmpPixels[1, tmpLen:] = 0.0
+        tmpPixels[2, :tmpLen] = self.preferences['singleBlue']
+        tmpPixels[2, tmpLen:] = 0.0
+        # self.ledFlt.update(tmpPixels)
+        # tmpPixels = np.round(self.ledFlt.value)
+
+        # Apply substantial blur to smooth the edges
+        blur(tmpPixels, 4.0, self.frame.half)
+
+        # Update the LED strip
+        self.frame.mirror()
+        self.singleKey = singleKey
+        self.singleFrame = np.copy(self.frame.levels)
+        self.displayFunction()
+    
+    def loadColorTables(self):
+        """Gamma and calibration tables named in the preferences, the default gamma table and no calibration otherwise"""
+        self.gammaTable = np.tile(gammaDefault, (3, 1)).astype(np.uint8)
+        if self.preferences['gammaTable'] != 'Default' and pathlib.Path(self.preferences['gammaTable']).is_file():
+            try:
+                self.gammaTable = loadColorTable(self.preferences['gammaTable'])
+            except (OSError, ValueError) as err:
+                print('Could not load gamma table:', err)
+        self.calibrationTable = None
+        if pathlib.Path(self.preferences['calibrationTable']).is_file():
+            try:
+                self.calibrationTable = loadColorTable(self.preferences['calibrationTable'])
+            except (OSError, ValueError) as err:
+                print('Could not load calibration table:', err)
+
+    def loadShow(self):
+        """Memory-map the show file from preferences and restart playback"""
+        self.show = None
+        if self.preferences['showFile'] and pathlib.Path(self.preferences['showFile']).is_file():
+            try:
+                self.show = showFile(self.preferences['showFile'])
+            except (OSError, ValueError) as err:
+                print('Could not open show file:', err)
+        self.showStart = time()
+
+    def showEffect(self):
+        debugPrint('inShowEffect')
+        if self.show is None or self.show.noFrames == 0:
+            self.stripClear()
+            self.displayFunction()
+            return
+        self.readTimeout = max(1, int(1000 / self.show.fps))
+        # Frame picked from the wall clock, a late call skips frames rather than slowing the show
+        frame = self.show.frames[self.show.frameAt(time() - self.showStart)]
+        noPixels = min(frame.shape[1], self.frame.noPixels)
+        for color, channel in enumerate(self.show.rgbChannels):
+            self.frame.levels[color, :noPixels] = frame[channel, :noPixels]
+        self.frame.levels[:, noPixels:] = 0.0
+        self.displayFunction()
+
+    def getEffectHandle(self):
+        if self.preferences['displayEffect'] == 'Audio':
+            self.displayEffect = self.audioEffect
+            self.readTimeout = int(1000/self.preferences['tgtFPS'])
+        elif self.preferences['displayEffect'] == 'Rainbow':
+            self.displayEffect = self.rainbowEffect
+            self.readTimeout = speedMap(self.preferences['rainbowSpeed'])
+        elif self.preferences['displayEffect'] == 'Twinkle Stars':
+            self.displayEffect = self.twinkleEffect
+            self.readTimeout = 10
+        elif self.preferences['displayEffect'] == 'Single':
+            self.displayEffect = self.singleEffect
+            self.readTimeout = None
+        elif self.preferences['displayEffect'] == 'Show':
+            self.displayEffect = self.showEffect
+            self.loadShow()
+            self.readTimeout = max(1, int(1000 / self.show.fps)) if self.show is not None else None
+
+    def getSaverHandle(self):
+        if self.preferences['stripSaver'] == 'None':
+            self.stripSaver = self.stripClear
+        if self.preferences['stripSaver'] == 'Twinkle Stars':
+            self.stripSaver = self.stripTwinkle
+        elif self.preferences['stripSaver'] == 'Rainbow':
+            self.stripSaver = self.stripRainbow
+
+    def getDisplayHandle(self):
+        self.audioStripDisplay = self.energyDisplay if self.preferences['energyDisplay'] else self.scrollDisplay if self.preferences['scrollDisplay'] else self.spectrumDisplay
+
+    def resetStars(self):
+        self.twinkleStars = starField(self.preferences['noStars'], self.preferences['noPixels'], self.preferences['starMaxLife'], self.preferences['starRed'], self.preferences['starGreen'], self.preferences['starBlue'], dtype=PIPELINE_DTYPES[self.preferences['pipelineDtype']])
+
+    def refreshAudioData(self):
+        """Analysis and audio ring for the selected device
+
+        The stream is only reopened when the device, sample rate or buffer
+        size changed, and the ring only replaced when its window did.
+        """
+        deviceIndex = self.audioDevices[self.preferences['audioDevice']]
+        deviceInfo = self.pa.get_device_info_by_index(deviceIndex)
+        self.refreshAnalysis(int(deviceInfo['defaultSampleRate']))
+
+        streamConfig = (deviceIndex, self.audioSampleRate, self.noFrames)
+        restart = streamConfig != self.streamConfig
+        if restart and self.audioStream != []:
+            self.audioStream.stop_stream()
+            self.audioStream.close()
+        if restart or self.audioRing.windowLen != self.noFrames*self.preferences['audioRoll']:
+            # The stream callback goes through audioCallback, so it writes to the new ring from its next chunk
+            self.audioRing = audioRing(self.noFrames, self.preferences['audioRoll'], self.preferences['tgtFPS'])
+        if restart:
+            self.audioStream = self.pa.open(format=pyaudio.paInt16, channels=1, rate=self.audioSampleRate, input=True, input_device_index=deviceIndex, frames_per_buffer=self.noFrames, stream_callback=self.audioCallback)
+            self.streamConfig = streamConfig
+
+    def audioCallback(self, inData, frameCount, timeInfo, status):
+        return self.audioRing.callback(inData, frameCount, timeInfo, status)
+
+    def refreshAnalysis(self, sampleRate):
+        """Window, mel bank and smoothing filters for audio at sampleRate, shared by live capture and file rendering"""
+        self.audioSampleRate = sampleRate
+        self.noFrames = int(self.audioSampleRate // self.preferences['tgtFPS'])
+        self.fftPlan = spectrumPlan(self.noFrames*self.preferences['audioRoll'], self.preferences['fftWorkers'])
+        self.melFrq, self.melBank = cachedMelBank(self.cacheDir, self.audioSampleRate, self.noFrames*self.preferences['audioRoll'], self.preferences['noFFT'], self.preferences['minFreq'], self.preferences['maxFreq'])
+        self.melProj = melProjection(self.melBank, self.noFrames*self.preferences['audioRoll'] // 2, PIPELINE_DTYPES[self.preferences['pipelineDtype']])
+        self.refreshBands()
+        self.refreshSmoothing()
+
+    def refreshSmoothing(self):
+        """Gain and smoothing filters, keeping their state unless the number of bands or the dtype changed"""
+        dtype = PIPELINE_DTYPES[self.preferences['pipelineDtype']]
+        if self.melGain is None or self.melGain.value.size != self.preferences['noFFT'] or self.melGain.value.dtype != dtype:
+            self.melGain= expFilter(np.tile(self.preferences['gainLimit'], self.preferences['noFFT']), alpha_decay=self.preferences['adGain'], alpha_rise=self.preferences['arGain'], dtype=dtype)
+            self.melBlurred = np.zeros(self.preferences['noFFT'], dtype=dtype)
+            self.melSmooth = expFilter(np.tile(1e-1, self.preferences['noFFT']),  alpha_decay=self.preferences['adAudio'], alpha_rise=self.preferences['arAudio'], dtype=dtype)
+            self.ledSmooth = expFilter(np.tile(0.1, self.preferences['noFFT']),  alpha_decay=self.preferences['adLED'], alpha_rise=self.preferences['arLED'], dtype=dtype)
+            return
+        for flt, decay, rise in [(self.melGain, 'adGain', 'arGain'), (self.melSmooth, 'adAudio', 'arAudio'), (self.ledSmooth, 'adLED', 'arLED')]:
+            flt.alpha_decay = self.preferences[decay]
+            flt.alpha_rise = self.preferences[rise]
+
+    def refreshFrame(self):
+        """Frame buffer and the per pixel effect filters for noPixels and pipelineDtype"""
+        if self.frame.noPixels != self.preferences['noPixels'] or self.frame.dtype != self.preferences['pipelineDtype']:
+            self.frame.resize(self.preferences['noPixels'], dtype=self.preferences['pipelineDtype'])
+            self.currPixels = self.frame.levels
+        dtype = PIPELINE_DTYPES[self.preferences['pipelineDtype']]
+        self.spectrumDiff = expFilter(np.tile(0.01, self.preferences['noPixels'] // 2), alpha_decay=0.2, alpha_rise=0.99, dtype=dtype)
+        self.spectrumFlt = expFilterBank(np.tile(0.01, (2, self.preferences['noPixels'] // 2)), alpha_decay=[0.99, 0.1], alpha_rise=[0.01, 0.5], dtype=dtype)
+        self.ledFlt = expFilter(np.tile(1, (3, self.preferences['noPixels'] // 2)), alpha_decay=0.1, alpha_rise=0.99, dtype=dtype)
+        self.oldSpectrum = np.tile(0.01, self.preferences['noPixels'] // 2).astype(dtype)
+        self.beatFade = np.arange(0.7,0.4,-0.03).astype(dtype)
+
+    def reconfigure(self, changes=None):
+        """Apply changes and bring the engine in line with the preferences, rebuilding only what they feed
+
+        Meant to be posted, so it runs between two frames and the next frame
+        sees the new state all at once. Preferences written directly since
+        the last reconfigure are picked up as well.
+        """
+        debugPrint('inReconfigure')
+        if changes:
+            self.setPreferences(changes)
+        preferences = preferenceDict(self.preferences)
+        changed = {key for key, value in preferences.items() if self.appliedPreferences.get(key) != value}
+        stale = {part for part, keys in PREFERENCE_DEPENDENTS.items() if changed.intersection(keys)}
+        if 'frame' in stale:
+            self.refreshFrame()
+        if 'audio' in stale and self.liveOutput:
+            self.refreshAudioData()
+        elif 'audio' in stale and self.audioSampleRate != []:
+            self.refreshAnalysis(self.audioSampleRate)
+        else:
+            if 'bands' in stale:
+                self.refreshBands()
+            if 'smoothing' in stale:
+                self.refreshSmoothing()
+        if 'stars' in stale:
+            self.resetStars()
+        if 'effect' in stale:
+            self.getEffectHandle()
+        if 'saver' in stale:
+            self.getSaverHandle()
+        if 'display' in stale:
+            self.getDisplayHandle()
+        if 'show' in stale:
+            self.loadShow()
+        if 'color' in stale:
+            self.loadColorTables()
+        if 'output' in stale and self.liveOutput:
+            self.setupDisplayDevice()
+        self.appliedPreferences = preferences
+
+    def refreshBands(self):
+        """Mel band indices closest to lowFreq / highFreq and the per band gain applied to them"""
+        self.leftIndex = int(abs(self.melFrq - self.preferences['lowFreq']).argmin())
+        self.rightIndex = int(abs(self.melFrq - self.preferences['highFreq']).argmin())
+        self.bandGain = np.ones(self.preferences['noFFT'], dtype=PIPELINE_DTYPES[self.preferences['pipelineDtype']])
+        self.bandGain[0 : self.leftIndex] /= 1.5
+        self.bandGain[self.leftIndex : self.rightIndex] *= 1.2
+        self.bandGain[self.rightIndex : self.preferences['noFFT']] *= 2
+
+    def loopActions(self):
+        debugPrint('inLoopActions: ', self.displayEffect)
+        if self.preferences['start']:
+            self.metrics.startFrame()
+            self.displayEffect()
+            self.metrics.endFrame(1.0 / self.preferences['tgtFPS'])
+            self.getFPS()
+            self.exportMetrics()
+        else:
+            # Stopped, only render again after a configuration change
+            self.readTimeout = None
+            if self.preferences['clrClose']:
+                self.frame.clear()
+                self.displayFunction()
+
+    def post(self, action=None, *args):
+        """Queue a configuration change for the render loop, applied between two frames
+
+        post() without an action only asks for a frame, for effects that do
+        not refresh on their own. With a DSP worker the action runs in the
+        worker process, this engine keeps the preferences and only mirrors frames.
+        """
+        if self.worker is not None:
+            # The GUI's copy of the preferences is kept up to date here
+            if action in (self.setPreferences, self.reconfigure) and args:
+                self.setPreferences(*args)
+            if action == self.setPreferences:
+                action = None
+            self.worker.post(action.__name__ if action is not None else None, args, self.preferences)
+            return
+        self.configQueue.put((action, args))
+
+    def applyConfig(self):
+        """Run the queued configuration changes, True if there were any
+
+        A change that fails is reported and dropped, rendering carries on
+        with whatever state the engine was left in.
+        """
+        changed = False
+        while True:
+            try:
+                action, args = self.configQueue.get_nowait()
+            except queue.Empty:
+                return changed
+            if action is not None:
+                try:
+                    action(*args)
+                except Exception as err:
+                    print('Could not apply {}:'.format(getattr(action, '__name__', action)), repr(err))
+                    traceback.print_exc()
+            changed = True
+
+    def discardConfig(self):
+        """Empty the configuration queue on close, keeping the preference changes without rebuilding anything for them"""
+        while True:
+            try:
+                action, args = self.configQueue.get_nowait()
+            except queue.Empty:
+                return
+            if action in (self.setPreferences, self.reconfigure) and args:
+                self.setPreferences(*args)
+
+    def setPreferences(self, changes):
+        """Apply changes in memory only
+
+        Item assignment on the GUI's UserSettings rewrites its file for every
+        key, so the changes go straight into its dict. The GUI writes the
+        file itself, once per save, before posting.
+        """
+        preferences = self.preferences.get_dict() if hasattr(self.preferences, 'get_dict') else self.preferences
+        preferences.update(changes)
+
+    def renderLoop(self):
+        """Render frames at tgtFPS on the monotonic clock until stopRendering()
+
+        Ticks sit on a fixed grid. A frame that overruns skips the ticks it
+        missed (counted in metrics.skippedFrames) rather than bursting to catch up.
+        Effects with a longer refresh interval (readTimeout in ms) render on
+        the first tick after it elapsed, readTimeout None only after a
+        configuration change.
+        """
+        debugPrint('inRenderLoop')
+        deadline = effectDue = monotonic()
+        while not self.renderStop.is_set():
+            period = 1.0 / self.preferences['tgtFPS']
+            changed = self.applyConfig()
+            now = monotonic()
+            if changed or (self.readTimeout is not None and now >= effectDue):
+                self.loopActions()
+                # Half a tick early so an interval rounds to the nearest tick
+                effectDue = now + (self.readTimeout or 0) / 1000.0 - period / 2
+            deadline += period
+            late = monotonic() - deadline
+            if late > 0:
+                missed = int(late // period) + 1
+                self.metrics.skippedFrames += missed
+                deadline += missed * period
+            self.renderStop.wait(deadline - monotonic())
+
+    def startRendering(self):
+        self.renderStop.clear()
+        self.renderThread = Thread(target=self.renderLoop, name='render', daemon=True)
+        self.renderThread.start()
+
+    def startWorker(self, prefFile=None):
+        """Run capture, analysis and LED output in a separate process instead of the render thread"""
+        from worker import dspWorker
+        self.worker = dspWorker(self.preferences, prefFile)
+
+    def stopRendering(self):
+        self.renderStop.set()
+        if self.renderThread is not None:
+            self.renderThread.join(timeout=2.0)
+            self.renderThread = None
+
+
+    def exportMetrics(self):
+        """Write the stage latencies to preferences metricsFile every metricsInterval seconds"""
+        if self.preferences['metricsFile'] and time() - self.metricsTime > self.preferences['metricsInterval']:
+            self.metricsTime = time()
+            try:
+                self.metrics.writeFile(self.preferences['metricsFile'])
+            except OSError as err:
+                print('Could not write metrics file:', err)
+
+    def closeActions(self):
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
+        self.stopRendering()
+        self.discardConfig()
+        if self.preferences['clrClose']:
+            self.frame.clear()
+            self.displayRefresh[0] = True
+            self.displayFunction()
+        self.closeOutputs()
+        self.closePi()
+        # self.plotThread.join()
+        # self.fpsThread.join()
+        if self.liveOutput:
+            self.pa.terminate()
+
+    def __init__(self, preferences, prefFile=None, liveOutput=True):
+        """liveOutput=False skips the audio device and LED output, used to render audio files"""
+        debugPrint('in Engine Init')
+        self.preferences = preferences
+        self.liveOutput = liveOutput
+        # Mel filter banks are cached next to the preferences file
+        self.cacheDir = pathlib.Path(prefFile if prefFile is not None else getPrefFile()).parent / 'melCache'
+        if self.preferences['pipelineDtype'] not in PIPELINE_DTYPES:
+            # Files from versions with the 'uint16' setting, which computed in float32 too
+            self.setPreferences({'pipelineDtype': 'float32'})
+        # Every effect draws into this one buffer, currPixels is its level array
+        self.frame = frameBuffer(self.preferences['noPixels'], 1.0, self.preferences['pipelineDtype'])
+        self.currPixels = self.frame.levels
+        self.audioDevices = {}
+        if self.liveOutput:
+            self.pa = pyaudio.PyAudio()
+            self.getAudioDevices()
+
+        self.fpsTime = time() * 1000.0
+        self.fps = expFilter(val=self.preferences['tgtFPS'], alpha_decay=0.2, alpha_rise=0.2)
+        self.metrics = stageMetrics()
+        self.metricsTime = time()
+        self.configQueue = queue.SimpleQueue()
+        self.renderStop = Event()
+        self.getEffectHandle()
+        self.getSaverHandle()
+
+        self.melData = (0,0,0,0)
+
+        self.getDisplayHandle()
+        #* Setting up LED strip
+        self.ledGain= expFilter(np.tile(self.preferences['gainLimit'], self.preferences['noFFT']), alpha_decay=self.preferences['adLED'], alpha_rise=self.preferences['arLED'], dtype=PIPELINE_DTYPES[self.preferences['pipelineDtype']])
+
+        self.refreshFrame()
+
+        self.rainbowHue = 0.0
+
+        self.resetStars()
+
+        self.colorCorrection = colorCorrection()
+        self.loadColorTables()
+        self.displayFunction = self.sendToESP
+        if self.liveOutput:
+            self.setupDisplayDevice()
+        else:
+            self.displayFunction = self.sendToNone
+        # What the state above was built from, see reconfigure()
+        self.appliedPreferences = preferenceDict(self.preferences)
+
+def headlessMain(argv=None):
+    """Run the selected effect and LED output without PySimpleGUI, Tk or matplotlib"""
+    parser = argparse.ArgumentParser(description='Chromatizer: The Color of Music (headless)')
+    parser.add_argument('--headless', action='store_true', help='Run without the GUI (always on for this entry point).')
+    parser.add_argument('--config', default=str(getPrefFile()), help='Preferences json saved by the GUI.')
+    args = parser.parse_args(argv)
+
+    preferences = loadPreferences(args.config)
+    preferences['start'] = True
+    ce = chromaEngine(preferences, args.config)
+    ce.post()
+    try:
+        ce.renderLoop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ce.closeActions()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(headlessMain())
@@ -0,0 +1,143 @@
+"""
+Title              : Chromatizer Metrics
+Description        : Per stage frame latency with rolling percentiles and file export
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import os, json, numpy as np
+from time import perf_counter, time
+from threading import Lock
+
+QUANTILES = (50, 95, 99)
+
+class latencyWindow():
+    """Rolling window of the last few stage latencies in seconds
+
+    record() is a single store into a preallocated ring, percentiles are only
+    computed when a snapshot is taken. Several sender threads can record
+    into one window while another thread takes snapshots, both hold the
+    window's lock.
+    """
+    def __init__(self, size=1024):
+        self.samples = np.zeros(size)
+        self.head = 0
+        self.count = 0
+        self.total = 0.0
+        self.lock = Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples[self.head] = seconds
+            self.head = (self.head + 1) % self.samples.size
+            self.count += 1
+            self.total += seconds
+
+    def snapshot(self):
+        with self.lock:
+            window = self.samples[:min(self.count, self.samples.size)].copy()
+            count, total = self.count, self.total
+        if not window.size:
+            return dict(count=0, sum=0.0, max=0.0, **{'p%d' % q: 0.0 for q in QUANTILES})
+        percentiles = np.percentile(window, QUANTILES)
+        return dict(count=count, sum=total, max=float(window.max()), **{'p%d' % q: float(p) for q, p in zip(QUANTILES, percentiles)})
+
+class stageMetrics():
+    """Latency of every pipeline stage, plus which stage to blame for frames over budget
+
+    The render loop calls startFrame(), then lap(stage) after each stage and
+    endFrame() once the frame is out, and counts the ticks it had to drop in
+    skippedFrames. Time spent blocked on input is recorded with wait(stage)
+    instead, it counts neither toward the frame time nor against the budget. Stages on other threads (the packet encoder and sender)
+    call record() with their own timings.
+    """
+    def __init__(self, windowSize=1024):
+        self.windowSize = windowSize
+        self.stages = {}
+        self.frameLaps = {}
+        self.overBudget = {}
+        self.skippedFrames = 0
+        self.waitTime = 0.0
+        self.lock = Lock()
+        self.frameStart = self.lapStart = perf_counter()
+
+    def record(self, stage, seconds):
+        window = self.stages.get(stage)
+        if window is None:
+            # Two sender threads can meet a new stage at once
+            with self.lock:
+                window = self.stages.setdefault(stage, latencyWindow(self.windowSize))
+        window.record(seconds)
+
+    def startFrame(self):
+        self.frameLaps.clear()
+        self.waitTime = 0.0
+        self.frameStart = self.lapStart = perf_counter()
+
+    def lap(self, stage):
+        now = perf_counter()
+        self.frameLaps[stage] = now - self.lapStart
+        self.record(stage, now - self.lapStart)
+        self.lapStart = now
+
+    def wait(self, stage):
+        now = perf_counter()
+        self.record(stage, now - self.lapStart)
+        self.waitTime += now - self.lapStart
+        self.lapStart = now
+
+    def endFrame(self, budget):
+        frameTime = perf_counter() - self.frameStart - self.waitTime
+        self.record('frame', frameTime)
+        if frameTime > budget and self.frameLaps:
+            worst = max(self.frameLaps, key=self.frameLaps.get)
+            self.overBudget[worst] = self.overBudget.get(worst, 0) + 1
+
+    def snapshot(self):
+        return {stage: self.stages[stage].snapshot() for stage in list(self.stages)}
+
+    def summary(self):
+        """One line of p95 latencies in ms for the window"""
+        return '  '.join('%s %.2f' % (stage, values['p95'] * 1000) for stage, values in self.snapshot().items())
+
+    def table(self):
+        lines = ['stage'.ljust(14) + ''.join(name.rjust(9) for name in ['p50', 'p95', 'p99', 'max', 'over'])]
+        for stage, values in self.snapshot().items():
+            lines.append(stage.ljust(14) + ''.join(('%.2f' % (values[name] * 1000)).rjust(9) for name in ['p50', 'p95', 'p99', 'max']) + str(self.overBudget.get(stage, 0)).rjust(9))
+        lines.append('skipped frames'.ljust(14) + str(self.skippedFrames).rjust(45))
+        return '\n'.join(lines)
+
+    def prometheus(self):
+        lines = ['# HELP chromatizer_stage_latency_seconds Latency of each pipeline stage over the recent frames.',
+                 '# TYPE chromatizer_stage_latency_seconds summary']
+        snapshot = self.snapshot()
+        for stage, values in snapshot.items():
+            for q in QUANTILES:
+                lines.append('chromatizer_stage_latency_seconds{stage="%s",quantile="%g"} %.9g' % (stage, q / 100, values['p%d' % q]))
+            lines.append('chromatizer_stage_latency_seconds_sum{stage="%s"} %.9g' % (stage, values['sum']))
+            lines.append('chromatizer_stage_latency_seconds_count{stage="%s"} %d' % (stage, values['count']))
+        lines += ['# HELP chromatizer_stage_latency_max_seconds Slowest call of each stage over the recent frames.',
+                  '# TYPE chromatizer_stage_latency_max_seconds gauge']
+        lines += ['chromatizer_stage_latency_max_seconds{stage="%s"} %.9g' % (stage, values['max']) for stage, values in snapshot.items()]
+        lines += ['# HELP chromatizer_frames_over_budget_total Frames over the target frame time, by their slowest stage.',
+                  '# TYPE chromatizer_frames_over_budget_total counter']
+        lines += ['chromatizer_frames_over_budget_total{stage="%s"} %d' % (stage, count) for stage, count in list(self.overBudget.items())]
+        lines += ['# HELP chromatizer_skipped_frames_total Render ticks dropped because the previous frame ran late.',
+                  '# TYPE chromatizer_skipped_frames_total counter',
+                  'chromatizer_skipped_frames_total %d' % self.skippedFrames]
+        return '\n'.join(lines) + '\n'
+
+    def writeFile(self, path):
+        """Prometheus text for a .prom file, json otherwise, replaced atomically"""
+        if str(path).endswith('.prom'):
+            text = self.prometheus()
+        else:
+            text = json.dumps({'timestamp': time(), 'stages': self.snapshot(), 'overBudget': dict(self.overBudget), 'skippedFrames': self.skippedFrames}, indent=1)
+        tmpPath = str(path) + '.tmp'
+        with open(tmpPath, 'w') as f:
+            f.write(text)
+        os.replace(tmpPath, path)
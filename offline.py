@@ -0,0 +1,113 @@
+"""
+Title              : Chromatizer Offline Rendering
+Description        : Runs the audio pipeline over a WAV or FLAC file faster than real time
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import sys, wave, argparse, pathlib, numpy as np
+from time import time
+from engine import chromaEngine, loadPreferences, getPrefFile
+from dsp import slidingFrames
+from shows import showWriter
+
+def readAudioFile(audioFile):
+    """Mono float32 samples in [-1, 1) and the sample rate of a WAV (PCM) or, with soundfile installed, FLAC file"""
+    audioFile = pathlib.Path(audioFile)
+    if audioFile.suffix.lower() == '.wav':
+        with wave.open(str(audioFile), 'rb') as wavFile:
+            sampleRate = wavFile.getframerate()
+            noChannels = wavFile.getnchannels()
+            sampleWidth = wavFile.getsampwidth()
+            rawData = wavFile.readframes(wavFile.getnframes())
+        if sampleWidth == 1:
+            samples = (np.frombuffer(rawData, dtype=np.uint8).astype(np.float32) - 128.0) / 2.0**7
+        elif sampleWidth == 3:
+            # Little endian 24 bit, shifted into the top of an int32
+            raw = np.frombuffer(rawData, dtype=np.uint8).reshape(-1, 3)
+            samples = ((raw[:, 0].astype(np.int32) << 8) | (raw[:, 1].astype(np.int32) << 16) | (raw[:, 2].astype(np.int32) << 24)).astype(np.float32) / 2.0**31
+        elif sampleWidth in (2, 4):
+            samples = np.frombuffer(rawData, dtype='<i{}'.format(sampleWidth)).astype(np.float32) / 2.0**(8 * sampleWidth - 1)
+        else:
+            raise ValueError('Unsupported WAV sample width: {} bytes'.format(sampleWidth))
+        samples = samples.reshape(-1, noChannels)
+    else:
+        import soundfile
+        samples, sampleRate = soundfile.read(str(audioFile), dtype='float32', always_2d=True)
+    samples = samples[:, 0] if samples.shape[1] == 1 else samples.mean(axis=1, dtype=np.float32)
+    return np.ascontiguousarray(samples, dtype=np.float32), int(sampleRate)
+
+def iterRender(ce, samples, sampleRate, chunkFrames=1024):
+    """Yields the strip colors (ce.frame.levels) of every frame of a recording
+
+    The windowed FFT and mel projection run over chunkFrames frames at a time,
+    only the smoothing filters and strip effects step frame by frame.
+    """
+    ce.refreshAnalysis(sampleRate)
+    windowLen = ce.noFrames * ce.preferences['audioRoll']
+    allFrames = slidingFrames(samples, windowLen, ce.noFrames)
+    for chunkStart in range(0, allFrames.shape[0], chunkFrames):
+        frames = allFrames[chunkStart : chunkStart + chunkFrames]
+        vols = np.max(np.abs(frames), axis=1)
+        melFrames = ce.melProj.projectFrames(ce.fftPlan.magnitudes(frames))
+        for frameNo in range(frames.shape[0]):
+            if vols[frameNo] < ce.preferences['volTol']:
+                ce.stripSaver()
+            else:
+                ce.renderMel(np.copy(melFrames[frameNo]))
+            yield ce.frame.levels
+
+def renderAudio(ce, samples, sampleRate):
+    """Per frame pixel arrays of the selected effect for a whole recording
+
+    Returns
+    -------
+    frames : np.array
+        (noFrames, 3, noPixels) strip colors, before brightness and gamma.
+    """
+    return np.array([np.copy(pixels) for pixels in iterRender(ce, samples, sampleRate)])
+
+def renderFile(audioFile, preferences):
+    """Render an audio file with the given preferences, returns the pixel frames and their frame rate"""
+    samples, sampleRate = readAudioFile(audioFile)
+    ce = chromaEngine(preferences, liveOutput=False)
+    pixelFrames = renderAudio(ce, samples, sampleRate)
+    return pixelFrames, sampleRate / ce.noFrames
+
+def renderShow(audioFile, showPath, preferences, colorOrder='RGB'):
+    """Render an audio file straight into a show file, returns the number of frames written"""
+    samples, sampleRate = readAudioFile(audioFile)
+    ce = chromaEngine(preferences, liveOutput=False)
+    ce.refreshAnalysis(sampleRate)
+    with showWriter(showPath, preferences['noPixels'], sampleRate / ce.noFrames, colorOrder) as writer:
+        for pixels in iterRender(ce, samples, sampleRate):
+            writer.write(pixels)
+    return writer.noFrames
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Chromatizer: render an audio file to LED frames')
+    parser.add_argument('audioFile', help='WAV or FLAC file to render.')
+    parser.add_argument('--config', default=str(getPrefFile()), help='Preferences json saved by the GUI.')
+    parser.add_argument('--out', help='Save the (frames, 3, noPixels) pixel array to this .npy file.')
+    parser.add_argument('--show', help='Write a show file for the \'Show\' effect instead of a pixel array.')
+    args = parser.parse_args(argv)
+
+    startTime = time()
+    if args.show:
+        noFrames = renderShow(args.audioFile, args.show, loadPreferences(args.config))
+        print('{} frames written to {} in {:.2f} s'.format(noFrames, args.show, time() - startTime))
+        return 0
+    pixelFrames, frameRate = renderFile(args.audioFile, loadPreferences(args.config))
+    renderTime = time() - startTime
+    duration = pixelFrames.shape[0] / frameRate
+    print('{} frames at {:.1f} FPS ({:.1f} s of audio) rendered in {:.2f} s, {:.0f}x real time'.format(pixelFrames.shape[0], frameRate, duration, renderTime, duration / max(renderTime, 1e-9)))
+    if args.out:
+        np.save(args.out, pixelFrames)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,553 @@
+"""
+Title              : Chromatizer Outputs
+Description        : Packet encoders for the LED controllers
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import sys, uuid, socket, struct, ctypes, numpy as np
+from time import sleep, perf_counter
+from threading import Thread, Condition
+
+MAX_PIXELS_PER_PACKET = 126
+# Sub-threshold error is flushed once it adds up to this many thresholds
+ERROR_FLUSH_FACTOR = 4
+
+DDP_HEADER_SIZE = 10
+DDP_PIXELS_PER_PACKET = 480
+DDP_VERSION = 0x40
+DDP_PUSH = 0x01
+DDP_TYPE_RGB8 = 0x0B
+DDP_ID_DISPLAY = 0x01
+
+E131_HEADER_SIZE = 126
+E131_PIXELS_PER_UNIVERSE = 170
+E131_PRIORITY = 100
+E131_SOURCE_NAME = b'Chromatizer'
+
+def parseOutputMap(outputMap, defaultIP, defaultPort, noPixels):
+    """Controllers driving the strip as a list of (ip, port, start, stop) pixel ranges
+
+    outputMap lists 'ip:port:first-last' entries separated by ';', for example
+    '192.168.0.150:7777:0-149; 192.168.0.151:7777:150-299'. Port and range
+    are optional, an entry without a range drives the whole strip. An empty
+    map drives every pixel from defaultIP:defaultPort. A malformed entry, or
+    a range starting past the strip, raises ValueError.
+    """
+    controllers = []
+    for entry in outputMap.split(';'):
+        fields = [field.strip() for field in entry.split(':')]
+        if not fields[0]:
+            continue
+        if len(fields) > 3:
+            raise ValueError('Invalid output map entry: ' + entry.strip())
+        start, stop = 0, noPixels
+        try:
+            port = int(fields[1]) if len(fields) > 1 and fields[1] else defaultPort
+            if len(fields) == 3 and fields[2]:
+                first, last = fields[2].split('-')
+                start, stop = int(first), min(int(last) + 1, noPixels)
+        except ValueError:
+            raise ValueError('Invalid output map entry: ' + entry.strip()) from None
+        if not 0 < port < 65536:
+            raise ValueError('Invalid port in output map entry: ' + entry.strip())
+        if not 0 <= start < stop:
+            raise ValueError('Invalid pixel range in output map entry ({} pixels): {}'.format(noPixels, entry.strip()))
+        controllers.append((fields[0], port, start, stop))
+    if not controllers:
+        controllers.append((defaultIP, defaultPort, 0, noPixels))
+    return controllers
+
+class espEncoder():
+    """Vectorized encoder for the ESP8266 UDP protocol
+
+    Every changed pixel is sent as an [index, r, g, b] record, at most
+    MAX_PIXELS_PER_PACKET records per datagram. Records are packed into a
+    preallocated uint8 buffer and packets are memoryview slices of it, valid
+    until the next call to encode.
+
+    With a threshold above zero a pixel is only resent once its largest
+    channel error against the value last sent exceeds the threshold in
+    gamma corrected (perceived) space. Smaller errors add up per pixel and
+    are flushed at ERROR_FLUSH_FACTOR thresholds. Every keyframeInterval
+    frames the whole strip is sent to recover from lost packets.
+    """
+    def __init__(self, noPixels, threshold=0, keyframeInterval=0, perceptualTable=None):
+        self.threshold = 0
+        self.keyframeInterval = 0
+        self.perceptualTable = None
+        self.frameCount = 0
+        self.resize(noPixels)
+        self.configure(threshold, keyframeInterval, perceptualTable)
+
+    def resize(self, noPixels):
+        self.noPixels = noPixels
+        self.records = np.zeros((noPixels, 4), dtype=np.uint8)
+        # ESP8266 firmware addresses pixels with a single byte
+        self.records[:, 0] = np.arange(noPixels) % 256
+        self.packed = np.zeros((noPixels, 4), dtype=np.uint8)
+        self.packedView = memoryview(self.packed.reshape(-1))
+        self.prevPixels = np.full((3, noPixels), 253, dtype=np.uint8)
+        self.diff = np.zeros((3, noPixels), dtype=bool)
+        self.changed = np.zeros(noPixels, dtype=bool)
+        self.flush = np.zeros(noPixels, dtype=bool)
+        self.perceived = np.zeros((3, noPixels), dtype=np.int16)
+        self.sentPerceived = np.zeros((3, noPixels), dtype=np.int16)
+        self.err = np.zeros((3, noPixels), dtype=np.int16)
+        self.pixErr = np.zeros(noPixels, dtype=np.int16)
+        self.errAcc = np.zeros(noPixels, dtype=np.int32)
+        self.perceive(self.prevPixels, self.sentPerceived)
+
+    def configure(self, threshold=0, keyframeInterval=0, perceptualTable=None):
+        """Change threshold (0 resends on any difference), keyframe interval (0 disables) and the gamma table used to compare pixels"""
+        self.perceptualTable = None if perceptualTable is None else np.asarray(perceptualTable, dtype=np.int16)
+        self.threshold = threshold
+        self.keyframeInterval = keyframeInterval
+        self.perceive(self.prevPixels, self.sentPerceived)
+        self.errAcc[:] = 0
+
+    def perceive(self, pixels, out):
+        if self.perceptualTable is None:
+            out[:] = pixels
+        else:
+            np.take(self.perceptualTable, pixels, out=out)
+
+    def encode(self, pixels, refresh=False):
+        """Packets for the pixels that differ from the previous frame, all pixels if refresh is set, none if nothing changed
+
+        Parameters
+        ----------
+        pixels : np.array
+            (3, noPixels) integer RGB values in the range 0 to 255.
+
+        refresh : bool
+            Send every pixel regardless of the previous frame.
+        """
+        if pixels.shape[1] != self.noPixels:
+            self.resize(pixels.shape[1])
+        self.records[:, 1:] = pixels.T
+        keyframe = self.keyframeInterval > 0 and self.frameCount % self.keyframeInterval == 0
+        self.frameCount += 1
+        if self.threshold > 0:
+            self.perceive(pixels, self.perceived)
+        if refresh or keyframe:
+            self.changed[:] = True
+        elif self.threshold > 0:
+            np.subtract(self.perceived, self.sentPerceived, out=self.err)
+            np.abs(self.err, out=self.err)
+            np.max(self.err, axis=0, out=self.pixErr)
+            np.greater(self.pixErr, self.threshold, out=self.changed)
+            np.add(self.errAcc, self.pixErr, out=self.errAcc)
+            np.greater(self.errAcc, ERROR_FLUSH_FACTOR * self.threshold, out=self.flush)
+            np.logical_or(self.changed, self.flush, out=self.changed)
+        else:
+            np.not_equal(pixels, self.prevPixels, out=self.diff)
+            np.any(self.diff, axis=0, out=self.changed)
+        # Deltas are taken against what the strip was last sent
+        np.copyto(self.prevPixels, pixels, casting='unsafe', where=self.changed)
+        if self.threshold > 0:
+            np.copyto(self.sentPerceived, self.perceived, where=self.changed)
+            np.copyto(self.errAcc, 0, where=self.changed)
+
+        noChanged = int(np.count_nonzero(self.changed))
+        self.packetBounds = []
+        if noChanged == 0:
+            # Nothing over the threshold, the strip keeps what it shows
+            return []
+        np.compress(self.changed, self.records, axis=0, out=self.packed[:noChanged])
+
+        # Same packet boundaries as np.array_split over the changed pixels
+        noPackets = noChanged // MAX_PIXELS_PER_PACKET + 1
+        packetLen, extra = divmod(noChanged, noPackets)
+        packets = []
+        start = 0
+        for packetNo in range(noPackets):
+            end = start + packetLen + (packetNo < extra)
+            packets.append(self.packedView[4 * start : 4 * end])
+            self.packetBounds.append((4 * start, 4 * (end - start)))
+            start = end
+        return packets
+
+class fullFrameEncoder():
+    """Common part of the protocols that send every frame whole, pixelsPerPacket RGB pixels per datagram
+
+    Packets sit back to back in one preallocated uint8 buffer (packed), their
+    headers are written once per resize. encode() copies the frame into the
+    data part of every packet in one go and stamps the sequence number, the
+    packets are memoryview slices of the buffer valid until the next encode.
+    """
+    headerSize = 0
+    pixelsPerPacket = 1
+    sequenceByte = 0
+
+    def __init__(self, noPixels, threshold=0, keyframeInterval=0, perceptualTable=None):
+        self.sequence = 0
+        self.resize(noPixels)
+
+    def resize(self, noPixels):
+        self.noPixels = noPixels
+        noPackets = max(1, -(-noPixels // self.pixelsPerPacket))
+        packetSize = self.headerSize + 3 * self.pixelsPerPacket
+        self.buffer = np.zeros((noPackets, packetSize), dtype=np.uint8)
+        self.packed = self.buffer.reshape(-1)
+        self.data = self.buffer[:, self.headerSize:].reshape(noPackets, self.pixelsPerPacket, 3)
+        counts = np.minimum(noPixels - np.arange(noPackets) * self.pixelsPerPacket, self.pixelsPerPacket)
+        self.writeHeaders(self.buffer[:, :self.headerSize], counts)
+        self.packetBounds = [(packetNo * packetSize, self.headerSize + 3 * int(count)) for packetNo, count in enumerate(counts)]
+        packedView = memoryview(self.packed)
+        self.packets = [packedView[offset : offset + length] for offset, length in self.packetBounds]
+
+    def writeHeaders(self, headers, counts):
+        pass
+
+    def nextSequence(self):
+        return (self.sequence + 1) % 256
+
+    def configure(self, threshold=0, keyframeInterval=0, perceptualTable=None):
+        """Every frame is sent whole, there are no deltas to configure"""
+
+    def encode(self, pixels, refresh=False):
+        """Packets for the whole frame, pixels is (3, noPixels) integer RGB in the range 0 to 255"""
+        if pixels.shape[1] != self.noPixels:
+            self.resize(pixels.shape[1])
+        wholePackets, rest = divmod(self.noPixels, self.pixelsPerPacket)
+        rgb = pixels.T
+        self.data[:wholePackets] = rgb[:wholePackets * self.pixelsPerPacket].reshape(wholePackets, self.pixelsPerPacket, 3)
+        if rest:
+            self.data[wholePackets, :rest] = rgb[wholePackets * self.pixelsPerPacket:]
+        self.sequence = self.nextSequence()
+        self.buffer[:, self.sequenceByte] = self.sequence
+        return self.packets
+
+class ddpEncoder(fullFrameEncoder):
+    """Encoder for DDP (Distributed Display Protocol), understood by WLED, ESPixelStick, xLights and others
+
+    Each packet carries the byte offset of its pixels, the last one sets the
+    push flag so the controller shows the frame at once.
+    """
+    headerSize = DDP_HEADER_SIZE
+    pixelsPerPacket = DDP_PIXELS_PER_PACKET
+    sequenceByte = 1
+
+    def writeHeaders(self, headers, counts):
+        headers[:, 0] = DDP_VERSION
+        headers[-1, 0] |= DDP_PUSH
+        headers[:, 2] = DDP_TYPE_RGB8
+        headers[:, 3] = DDP_ID_DISPLAY
+        offsets = np.arange(len(counts)) * 3 * self.pixelsPerPacket
+        headers[:, 4:8] = offsets.astype('>u4').view(np.uint8).reshape(-1, 4)
+        headers[:, 8:10] = (3 * counts).astype('>u2').view(np.uint8).reshape(-1, 2)
+
+    def nextSequence(self):
+        # 1 to 15, 0 would mean the receiver should not check the sequence
+        return self.sequence % 15 + 1
+
+class e131Encoder(fullFrameEncoder):
+    """Encoder for E1.31 (streaming ACN) data packets, one universe of 170 RGB pixels per packet
+
+    Universes are numbered on from universe. Packets are meant for unicast to
+    the controller, one address for the whole strip.
+    """
+    headerSize = E131_HEADER_SIZE
+    pixelsPerPacket = E131_PIXELS_PER_UNIVERSE
+    sequenceByte = 111
+
+    def __init__(self, noPixels, universe=1, threshold=0, keyframeInterval=0, perceptualTable=None):
+        self.universe = universe
+        self.cid = uuid.uuid4().bytes
+        fullFrameEncoder.__init__(self, noPixels)
+
+    def writeHeaders(self, headers, counts):
+        slots = 3 * counts
+        packetLen = E131_HEADER_SIZE + slots
+        # Root layer
+        headers[:, 0:16] = np.frombuffer(b'\x00\x10\x00\x00ASC-E1.17\x00\x00\x00', dtype=np.uint8)
+        headers[:, 16:18] = (0x7000 | (packetLen - 16)).astype('>u2').view(np.uint8).reshape(-1, 2)
+        headers[:, 18:22] = np.frombuffer(struct.pack('!I', 4), dtype=np.uint8)
+        headers[:, 22:38] = np.frombuffer(self.cid, dtype=np.uint8)
+        # Framing layer
+        headers[:, 38:40] = (0x7000 | (packetLen - 38)).astype('>u2').view(np.uint8).reshape(-1, 2)
+        headers[:, 40:44] = np.frombuffer(struct.pack('!I', 2), dtype=np.uint8)
+        headers[:, 44:108] = np.frombuffer(E131_SOURCE_NAME.ljust(64, b'\x00'), dtype=np.uint8)
+        headers[:, 108] = E131_PRIORITY
+        universes = self.universe + np.arange(len(counts))
+        headers[:, 113:115] = universes.astype('>u2').view(np.uint8).reshape(-1, 2)
+        # DMP layer, DMX start code 0 then the channel values
+        headers[:, 115:117] = (0x7000 | (packetLen - 115)).astype('>u2').view(np.uint8).reshape(-1, 2)
+        headers[:, 117:123] = np.frombuffer(b'\x02\xa1\x00\x00\x00\x01', dtype=np.uint8)
+        headers[:, 123:125] = (slots + 1).astype('>u2').view(np.uint8).reshape(-1, 2)
+        headers[:, 125] = 0
+
+class _iovec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+class _msghdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32), ('msg_iov', ctypes.POINTER(_iovec)), ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t), ('msg_flags', ctypes.c_int)]
+
+class _mmsghdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _msghdr), ('msg_len', ctypes.c_uint)]
+
+def _loadSendmmsg():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        sendmmsg = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_mmsghdr), ctypes.c_uint, ctypes.c_int]
+    sendmmsg.restype = ctypes.c_int
+    return sendmmsg
+
+_sendmmsg = _loadSendmmsg()
+
+class datagramBatch():
+    """Sends several UDP datagrams from one buffer with a single sendmmsg call (Linux, IPv4)"""
+    def __init__(self, maxPackets=16):
+        self.sockAddr = ctypes.create_string_buffer(16)
+        self.address = None
+        self.resize(maxPackets)
+
+    def resize(self, maxPackets):
+        self.maxPackets = maxPackets
+        self.iovecs = (_iovec * maxPackets)()
+        self.msgs = (_mmsghdr * maxPackets)()
+        for i in range(maxPackets):
+            self.msgs[i].msg_hdr.msg_name = ctypes.addressof(self.sockAddr)
+            self.msgs[i].msg_hdr.msg_namelen = 16
+            self.msgs[i].msg_hdr.msg_iov = ctypes.pointer(self.iovecs[i])
+            self.msgs[i].msg_hdr.msg_iovlen = 1
+
+    def send(self, sock, baseAddress, bounds, address):
+        """Send (offset, length) slices of the buffer at baseAddress, returns the number of datagrams sent"""
+        if address != self.address:
+            self.sockAddr.raw = struct.pack('=H', socket.AF_INET) + struct.pack('!H', address[1]) + socket.inet_aton(socket.gethostbyname(address[0])) + bytes(8)
+            self.address = address
+        if len(bounds) > self.maxPackets:
+            self.resize(len(bounds))
+        for i, (offset, length) in enumerate(bounds):
+            self.iovecs[i].iov_base = baseAddress + offset
+            self.iovecs[i].iov_len = length
+        sent = 0
+        while sent < len(bounds):
+            count = _sendmmsg(sock.fileno(), ctypes.byref(self.msgs[sent]), len(bounds) - sent, 0)
+            if count < 0:
+                errNo = ctypes.get_errno()
+                raise OSError(errNo, 'sendmmsg failed')
+            sent += count
+        return sent
+
+class udpSender():
+    """Encodes and sends frames for one controller on a worker thread
+
+    submit() only copies the frame into a single pending slot, so a slow
+    network never delays the caller. A newer frame replaces a pending one
+    (coalesced). Deltas are always taken against the last frame that was
+    actually encoded, and a frame that fails to send forces a full refresh
+    on the next one (dropped). Encode and send times go to metrics when given.
+    The encoder defaults to the ESP8266 protocol, ddpEncoder and e131Encoder
+    drive standard pixel controllers.
+    """
+    def __init__(self, noPixels, threshold=0, keyframeInterval=0, perceptualTable=None, metrics=None, encoder=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.encoder = encoder if encoder is not None else espEncoder(noPixels, threshold, keyframeInterval, perceptualTable)
+        self.batch = datagramBatch() if _sendmmsg is not None else None
+        self.pendingFrame = np.zeros((3, noPixels), dtype=np.uint8)
+        self.workFrame = np.zeros((3, noPixels), dtype=np.uint8)
+        self.hasPending = False
+        self.pendingRefresh = False
+        self.pendingAddress = None
+        self.resend = False
+        self.pendingConfig = None
+        self.running = True
+        self.sentFrames = 0
+        self.coalescedFrames = 0
+        self.droppedFrames = 0
+        self.metrics = metrics
+        self.frameReady = Condition()
+        self.thread = Thread(target=self.run, name='udpSender', daemon=True)
+        self.thread.start()
+
+    def configure(self, threshold=0, keyframeInterval=0, perceptualTable=None):
+        # Taken by the worker between frames
+        with self.frameReady:
+            self.pendingConfig = (threshold, keyframeInterval, perceptualTable)
+
+    def submit(self, pixels, address, refresh=False):
+        with self.frameReady:
+            if self.pendingFrame.shape != pixels.shape:
+                self.pendingFrame = np.zeros(pixels.shape, dtype=np.uint8)
+            self.pendingFrame[:] = pixels
+            if self.hasPending:
+                self.coalescedFrames += 1
+            self.hasPending = True
+            self.pendingRefresh = self.pendingRefresh or refresh
+            self.pendingAddress = address
+            self.frameReady.notify()
+
+    def sendPackets(self, packets, address):
+        if self.batch is not None:
+            self.batch.send(self.sock, self.encoder.packed.ctypes.data, self.encoder.packetBounds, address)
+        else:
+            for packet in packets:
+                self.sock.sendto(packet, address)
+
+    def run(self):
+        while True:
+            with self.frameReady:
+                while self.running and not self.hasPending:
+                    self.frameReady.wait()
+                if not self.hasPending:
+                    break
+                self.pendingFrame, self.workFrame = self.workFrame, self.pendingFrame
+                refresh = self.pendingRefresh or self.resend
+                address = self.pendingAddress
+                self.hasPending = False
+                self.pendingRefresh = False
+                config, self.pendingConfig = self.pendingConfig, None
+            if config is not None:
+                self.encoder.configure(*config)
+            startTime = perf_counter()
+            packets = self.encoder.encode(self.workFrame, refresh)
+            encodeTime = perf_counter()
+            try:
+                if packets:
+                    self.sendPackets(packets, address)
+                self.resend = False
+                self.sentFrames += 1
+            except OSError:
+                # Full send buffer or unreachable controller, resend everything once it recovers
+                self.resend = True
+                self.droppedFrames += 1
+            if self.metrics is not None:
+                self.metrics.record('encode', encodeTime - startTime)
+                self.metrics.record('send', perf_counter() - encodeTime)
+
+    def close(self):
+        """Send whatever is pending and stop the worker"""
+        with self.frameReady:
+            self.running = False
+            self.frameReady.notify()
+        self.thread.join(timeout=1.0)
+        self.sock.close()
+
+class mockStrip():
+    """Stand-in for rpi_ws281x.PixelStrip off the Pi
+
+    Keeps the colours it was given and what was last shown, and holds show()
+    for the wire time of a WS281x strip (wireTime seconds per pixel).
+    """
+    def __init__(self, num, pin=18, freq_hz=800000, dma=10, invert=False, brightness=255, channel=0, strip_type=None, wireTime=30e-6):
+        self.leds = np.zeros(num, dtype=np.uint32)
+        self.shown = np.zeros(num, dtype=np.uint32)
+        self.showCount = 0
+        self.wireTime = wireTime
+
+    def begin(self):
+        pass
+
+    def numPixels(self):
+        return self.leds.size
+
+    def __setitem__(self, pos, value):
+        self.leds[pos] = value
+
+    def setPixelColor(self, n, color):
+        self.leds[n] = color
+
+    def show(self):
+        sleep(self.wireTime * self.leds.size)
+        self.shown[:] = self.leds
+        self.showCount += 1
+
+    def _cleanup(self):
+        pass
+
+def openPiStrip(noPixels, pin, freq, dma, invert):
+    """rpi_ws281x PixelStrip taking colours in wire order, mockStrip when the driver is not installed"""
+    try:
+        from rpi_ws281x import PixelStrip, WS2811_STRIP_RGB
+    except ImportError:
+        print('rpi_ws281x not found, using the mock LED driver')
+        return mockStrip(noPixels, pin, freq, dma, invert)
+    # PWM1 pins are on the second channel
+    channel = 1 if pin in (13, 19, 41, 45, 53) else 0
+    strip = PixelStrip(noPixels, pin, freq, dma, invert, 255, channel, WS2811_STRIP_RGB)
+    strip.begin()
+    return strip
+
+class piSender():
+    """Writes frames to a directly driven strip on a worker thread
+
+    submit() packs the frame into the driver's 24 bit colours, already in the
+    strip's colour order, in one vectorized step and leaves it as the pending
+    buffer (double buffered, a newer frame replaces a pending one). The
+    worker copies it into the driver and calls show(), which takes the wire
+    time of the strip (about 30us per pixel) off the render loop. Show times
+    go to metrics when given.
+    """
+    def __init__(self, strip, colorOrder='GRB', metrics=None):
+        self.strip = strip
+        self.noPixels = strip.numPixels()
+        self.pendingColors = np.zeros(self.noPixels, dtype=np.uint32)
+        self.workColors = np.zeros(self.noPixels, dtype=np.uint32)
+        self.shifted = np.zeros(self.noPixels, dtype=np.uint32)
+        self.setColorOrder(colorOrder)
+        self.hasPending = False
+        self.running = True
+        self.shownFrames = 0
+        self.coalescedFrames = 0
+        self.metrics = metrics
+        self.frameReady = Condition()
+        self.thread = Thread(target=self.run, name='piSender', daemon=True)
+        self.thread.start()
+
+    def setColorOrder(self, colorOrder):
+        self.channels = ['RGB'.index(color) for color in colorOrder.upper()]
+
+    def pack(self, pixels, out):
+        """(3, noPixels) integer RGB to one uint32 per pixel, first colour of colorOrder in the high byte"""
+        first, second, third = self.channels
+        # Shifted as uint32, a uint8 frame would shift its bits out
+        np.left_shift(pixels[first], 16, out=out, dtype=np.uint32, casting='unsafe')
+        np.left_shift(pixels[second], 8, out=self.shifted, dtype=np.uint32, casting='unsafe')
+        np.bitwise_or(out, self.shifted, out=out)
+        np.bitwise_or(out, pixels[third], out=out, dtype=np.uint32, casting='unsafe')
+
+    def submit(self, pixels):
+        with self.frameReady:
+            self.pack(pixels, self.pendingColors)
+            if self.hasPending:
+                self.coalescedFrames += 1
+            self.hasPending = True
+            self.frameReady.notify()
+
+    def run(self):
+        while True:
+            with self.frameReady:
+                while self.running and not self.hasPending:
+                    self.frameReady.wait()
+                if not self.hasPending:
+                    break
+                self.pendingColors, self.workColors = self.workColors, self.pendingColors
+                self.hasPending = False
+            startTime = perf_counter()
+            self.strip[0:self.noPixels] = self.workColors.tolist()
+            self.strip.show()
+            self.shownFrames += 1
+            if self.metrics is not None:
+                self.metrics.record('show', perf_counter() - startTime)
+
+    def close(self):
+        """Show whatever is pending, stop the worker and release the driver"""
+        with self.frameReady:
+            self.running = False
+            self.frameReady.notify()
+        self.thread.join(timeout=2.0)
+        self.strip._cleanup()
@@ -0,0 +1,130 @@
+"""
+Title              : Chromatizer Palette
+Description        : Precomputed colour tables for the effects and the output stage, and slider lookups
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import pathlib, numpy as np
+from functools import lru_cache
+
+# Pure hues at every sixth of the wheel, hsv_to_rgb is linear in between
+HUE_STOPS = ((1, 0, 0), (1, 1, 0), (0, 1, 0), (0, 1, 1), (0, 0, 1), (1, 0, 1), (1, 0, 0))
+
+def _gradientPalette(stops, size, scale=255):
+    """(3, size) uint8 table running through the RGB stops (0 to 1) at even spacing, the builder behind hueWheel
+
+    Entry i is the colour i / size of the way along, truncated like int().
+    """
+    stops = np.asarray(stops, dtype=np.float64)
+    position = np.arange(size) / size * (len(stops) - 1)
+    table = np.zeros((3, size), dtype=np.uint8)
+    for color in range(3):
+        table[color] = np.interp(position, np.arange(len(stops)), stops[:, color]) * scale
+    return table
+
+@lru_cache(maxsize=64)
+def hueWheel(size, sat=1.0, val=1.0, scale=255):
+    """colorsys.hsv_to_rgb(i / size, sat, val) * scale for every hue step i
+
+    Built once per combination and shared read-only. Effects index it with an
+    array of hue steps to colour a whole strip in one gather,
+    np.take(table, indices, axis=1).
+    """
+    stops = val * (1.0 - sat + sat * np.array(HUE_STOPS))
+    table = _gradientPalette(stops, size, scale)
+    table.setflags(write=False)
+    return table
+
+class linearLookup():
+    """Piecewise linear map of a slider value, tabulated over the slider range
+
+    Takes the place of a scipy interp1d evaluated per call: the map is
+    sampled once at resolution points per unit and a call reads the nearest
+    sample. Values outside the range clamp to its ends.
+    """
+    def __init__(self, xPoints, yPoints, resolution=10, dtype=np.float64):
+        self.low = xPoints[0]
+        self.resolution = resolution
+        grid = self.low + np.arange(int(round((xPoints[-1] - self.low) * resolution)) + 1) / resolution
+        self.table = np.interp(grid, xPoints, yPoints).astype(dtype)
+
+    def __call__(self, value):
+        index = int(round((value - self.low) * self.resolution))
+        return self.table[min(max(index, 0), self.table.size - 1)].item()
+
+def loadColorTable(path):
+    """(3, 256) uint8 output level for every input level, from a .npy file or a text file of numbers
+
+    Text may separate the numbers by whitespace, commas or new lines. 256
+    values apply to every channel, 768 are the red, green and blue tables.
+    """
+    path = pathlib.Path(path)
+    if path.suffix == '.npy':
+        values = np.load(path).ravel()
+    else:
+        values = np.array(path.read_text().replace(',', ' ').split(), dtype=np.float64)
+    if values.size not in (256, 3 * 256):
+        raise ValueError('%s has %d values, a colour table needs 256 or 3 x 256' % (path, values.size))
+    table = np.broadcast_to(values.reshape(-1, 256), (3, 256))
+    return np.clip(np.rint(table), 0, 255).astype(np.uint8)
+
+def outputTable(gamma=None, whiteBalance=(100, 100, 100), calibration=None):
+    """(3, 256) uint8 table from a dimmed frame level to the level sent to the strip, per channel
+
+    Fuses, in order: the gamma table, the white balance gain of each channel
+    in percent and the calibration table. gamma and calibration are (3, 256)
+    tables or None. Brightness is not part of the table, it scales the frame
+    before levels above 255 are clipped.
+    """
+    table = np.tile(np.arange(256, dtype=np.intp), (3, 1))
+    if gamma is not None:
+        table = np.take_along_axis(gamma, table, axis=1).astype(np.intp)
+    table = np.minimum((table * np.reshape(whiteBalance, (3, 1)) / 100).astype(np.intp), 255)
+    if calibration is not None:
+        table = np.take_along_axis(calibration, table, axis=1)
+    return table.astype(np.uint8)
+
+class colorCorrection():
+    """Brightness, gamma, white balance and calibration of the output frame
+
+    Matches np.clip(pixels * brightness / 100, 0, 255) truncated to int,
+    then gamma, white balance and calibration, so levels above 255 still
+    reach full output when dimmed. The divide by 100 is folded into the
+    table: it is indexed by int(pixels * brightness) and entry i holds the
+    fused output table at level i // 100. apply() is then two passes over
+    the frame, the multiply cast straight into the preallocated index and
+    one np.take per channel whose mode='clip' also clips to 0 - 255 into a
+    preallocated uint8 frame. The table is only rebuilt when set() is given
+    different settings, brightness alone never rebuilds it.
+    """
+    def __init__(self):
+        self.settings = None
+        self.gamma = self.calibration = None
+        self.brightness = 100
+        self.table = None
+        self.output = None
+
+    def set(self, brightness, gamma=None, whiteBalance=(100, 100, 100), calibration=None):
+        self.brightness = brightness
+        settings = tuple(whiteBalance)
+        if self.table is None or settings != self.settings or gamma is not self.gamma or calibration is not self.calibration:
+            self.table = np.repeat(outputTable(gamma, whiteBalance, calibration), 100, axis=1)
+            self.settings = settings
+            self.gamma = gamma
+            self.calibration = calibration
+
+    def apply(self, pixels):
+        """(3, noPixels) uint8 frame for float levels, reused by the next call"""
+        if self.output is None or self.output.shape != pixels.shape:
+            self.index = np.zeros(pixels.shape, dtype=np.intp)
+            self.output = np.zeros(pixels.shape, dtype=np.uint8)
+        # Truncated like astype(int), negative levels land below index 0 and clip to it
+        np.multiply(pixels, self.brightness, out=self.index, casting='unsafe')
+        for color in range(3):
+            np.take(self.table[color], self.index[color], out=self.output[color], mode='clip')
+        return self.output
@@ -0,0 +1,74 @@
+"""
+Title              : Chromatizer Shows
+Description        : Pre-rendered show files, written once and memory-mapped for playback
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import struct, pathlib, numpy as np
+
+# magic, version, noPixels, fps, color order of the three stored channels, reserved
+SHOW_HEADER = struct.Struct('<4sHIf3s15x')
+SHOW_MAGIC = b'CHRS'
+SHOW_VERSION = 1
+
+class showWriter():
+    """Appends uint8 (3, noPixels) frames to a show file"""
+    def __init__(self, showFile, noPixels, fps, colorOrder='RGB'):
+        self.noPixels = noPixels
+        # Channel i of the file holds color colorOrder[i]
+        self.order = ['RGB'.index(color) for color in colorOrder]
+        self.frame = np.zeros((3, noPixels), dtype=np.uint8)
+        self.noFrames = 0
+        self.file = open(showFile, 'wb')
+        self.file.write(SHOW_HEADER.pack(SHOW_MAGIC, SHOW_VERSION, noPixels, fps, colorOrder.encode('ascii')))
+
+    def write(self, pixels):
+        """Append one frame of RGB strip colors, clipped to 0 - 255"""
+        for channel, color in enumerate(self.order):
+            np.clip(pixels[color], 0, 255, out=self.frame[channel], casting='unsafe')
+        self.file.write(self.frame.tobytes())
+        self.noFrames += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class showFile():
+    """Memory-mapped show file, frames are paged in only when played
+
+    A file that is not a show file or has a broken header raises ValueError.
+    """
+    def __init__(self, showPath):
+        self.path = pathlib.Path(showPath)
+        with open(self.path, 'rb') as f:
+            header = f.read(SHOW_HEADER.size)
+        if len(header) < SHOW_HEADER.size:
+            raise ValueError('Show file too short for its header: ' + str(showPath))
+        magic, version, self.noPixels, self.fps, colorOrder = SHOW_HEADER.unpack(header)
+        if magic != SHOW_MAGIC or version != SHOW_VERSION:
+            raise ValueError('Not a chromatizer show file: ' + str(showPath))
+        if self.noPixels <= 0:
+            raise ValueError('Show file has no pixels: ' + str(showPath))
+        if not (np.isfinite(self.fps) and self.fps > 0):
+            raise ValueError('Show file has an invalid frame rate {}: {}'.format(self.fps, showPath))
+        self.colorOrder = colorOrder.decode('ascii')
+        if sorted(self.colorOrder) != sorted('RGB'):
+            raise ValueError('Show file has an invalid color order {!r}: {}'.format(self.colorOrder, showPath))
+        # File channel holding R, G and B
+        self.rgbChannels = [self.colorOrder.index(color) for color in 'RGB']
+        self.noFrames = (self.path.stat().st_size - SHOW_HEADER.size) // (3 * self.noPixels)
+        self.frames = np.memmap(self.path, dtype=np.uint8, mode='r', offset=SHOW_HEADER.size, shape=(self.noFrames, 3, self.noPixels))
+
+    def frameAt(self, seconds):
+        """Frame index for a playback time, looping at the end of the show"""
+        return int(seconds * self.fps) % self.noFrames
@@ -0,0 +1,41 @@
+"""
+Title              : Chromatizer DSP Tests
+Description        : Parity of the built-in mel filter bank with librosa, as built and as loaded from the cache
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import pytest, numpy as np
+from dsp import melFilterBank, melFrequencies, cachedMelBank
+
+librosa = pytest.importorskip('librosa')
+
+SAMPLE_RATE = 44100
+MIN_FREQ, MAX_FREQ = 100, 12000
+TOLERANCE = 1e-6
+
+@pytest.mark.parametrize('nFFT', [1102, 2204])
+@pytest.mark.parametrize('nMels', [32, 64, 128])
+def test_melBankMatchesLibrosa(nFFT, nMels):
+    reference = librosa.filters.mel(sr=SAMPLE_RATE, n_fft=nFFT, n_mels=nMels, fmin=MIN_FREQ, fmax=MAX_FREQ)
+    assert np.max(np.abs(melFilterBank(SAMPLE_RATE, nFFT, nMels, MIN_FREQ, MAX_FREQ) - reference)) < TOLERANCE
+
+@pytest.mark.parametrize('nMels', [32, 64, 128])
+def test_melFrequenciesMatchLibrosa(nMels):
+    reference = librosa.mel_frequencies(n_mels=nMels, fmin=MIN_FREQ, fmax=MAX_FREQ, htk=False)
+    assert np.max(np.abs(melFrequencies(nMels, MIN_FREQ, MAX_FREQ) - reference)) < TOLERANCE
+
+def test_cachedMelBankMatchesLibrosa(tmp_path):
+    nFFT, nMels = 1102, 64
+    reference = librosa.filters.mel(sr=SAMPLE_RATE, n_fft=nFFT, n_mels=nMels, fmin=MIN_FREQ, fmax=MAX_FREQ)
+    # The first call builds and saves the bank, the second loads it back
+    for attempt in range(2):
+        melFrq, melBank = cachedMelBank(tmp_path, SAMPLE_RATE, nFFT, nMels, MIN_FREQ, MAX_FREQ)
+        assert melBank.shape == reference.shape
+        assert np.max(np.abs(melBank - reference)) < TOLERANCE
+        assert np.max(np.abs(melFrq - librosa.mel_frequencies(n_mels=nMels, fmin=MIN_FREQ, fmax=MAX_FREQ, htk=False))) < TOLERANCE
+    assert len(list(tmp_path.glob('melBank_*.npz'))) == 1
@@ -0,0 +1,44 @@
+"""
+Title              : Chromatizer Metrics Tests
+Description        : Stage latency windows under concurrent recording, and the frame budget
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+from time import sleep
+from threading import Thread
+from metrics import stageMetrics
+
+def test_concurrentRecordsAreNotLost():
+    metrics = stageMetrics()
+
+    def sender():
+        for frameNo in range(20000):
+            metrics.record('send', 0.001)
+
+    threads = [Thread(target=sender) for threadNo in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        snapshot = metrics.snapshot()['send']
+        assert snapshot['max'] in (0.0, 0.001)
+    for thread in threads:
+        thread.join()
+    snapshot = metrics.snapshot()['send']
+    assert snapshot['count'] == 80000
+    assert abs(snapshot['sum'] - 80.0) < 1e-6
+
+def test_waitIsLeftOutOfTheBudget():
+    metrics = stageMetrics()
+    metrics.startFrame()
+    sleep(0.05)
+    metrics.wait('wait')
+    metrics.lap('fft')
+    metrics.endFrame(0.02)
+    assert metrics.overBudget == {}
+    assert metrics.snapshot()['frame']['max'] < 0.02
+    assert metrics.snapshot()['wait']['max'] >= 0.05
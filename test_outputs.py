@@ -0,0 +1,148 @@
+"""
+Title              : Chromatizer Output Tests
+Description        : Wire formats of the LED output encoders and senders
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import socket, struct, itertools, pytest, numpy as np
+from time import sleep
+from outputs import parseOutputMap, espEncoder, ddpEncoder, e131Encoder, udpSender, piSender, mockStrip, MAX_PIXELS_PER_PACKET
+
+def randomFrame(noPixels, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (3, noPixels), dtype=np.uint8)
+
+def arraySplitPackets(pixels, changed):
+    """Packets as the per pixel sendToESP loop built them, np.array_split over the changed [index, r, g, b] records"""
+    records = [[index % 256] + [int(value) for value in pixels[:, index]] for index in np.flatnonzero(changed)]
+    return [bytes(np.array(chunk, dtype=np.uint8).reshape(-1)) for chunk in np.array_split(np.array(records, dtype=np.uint8).reshape(-1, 4), len(records) // MAX_PIXELS_PER_PACKET + 1)]
+
+@pytest.mark.parametrize('noPixels', [1, 125, 126, 127, 252, 300, 1000])
+def test_espRefreshMatchesArraySplit(noPixels):
+    pixels = randomFrame(noPixels)
+    packets = espEncoder(noPixels).encode(pixels, refresh=True)
+    assert [bytes(packet) for packet in packets] == arraySplitPackets(pixels, np.ones(noPixels, dtype=bool))
+
+@pytest.mark.parametrize('noChanged', [1, 126, 127, 400])
+def test_espDeltaMatchesArraySplit(noChanged):
+    noPixels = 600
+    encoder = espEncoder(noPixels)
+    pixels = randomFrame(noPixels)
+    encoder.encode(pixels, refresh=True)
+    changed = np.zeros(noPixels, dtype=bool)
+    changed[np.random.default_rng(1).choice(noPixels, noChanged, replace=False)] = True
+    pixels = pixels.copy()
+    pixels[0, changed] ^= 0x80
+    assert [bytes(packet) for packet in encoder.encode(pixels)] == arraySplitPackets(pixels, changed)
+
+def test_espIndexWrapsAbove255():
+    pixels = randomFrame(300)
+    records = np.frombuffer(b''.join(bytes(packet) for packet in espEncoder(300).encode(pixels, refresh=True)), dtype=np.uint8).reshape(-1, 4)
+    assert list(records[255:258, 0]) == [255, 0, 1]
+    assert records[299, 0] == 299 - 256
+    np.testing.assert_array_equal(records[:, 1:], pixels.T)
+
+def test_espUnchangedFrameSendsNothing():
+    pixels = randomFrame(300)
+    encoder = espEncoder(300)
+    encoder.encode(pixels)
+    assert encoder.encode(pixels) == []
+    encoder.configure(threshold=8)
+    pixels = pixels.copy()
+    pixels[:, 0] = np.minimum(pixels[:, 0], 250) + 3
+    assert encoder.encode(pixels) == []
+
+def test_udpSenderSkipsEmptyFrames():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(('127.0.0.1', 0))
+    receiver.settimeout(0.5)
+    sender = udpSender(150)
+    pixels = randomFrame(150)
+    for frameNo in range(3):
+        sender.submit(pixels, receiver.getsockname())
+        sleep(0.05)
+    sender.close()
+    datagrams = []
+    try:
+        while True:
+            datagrams.append(receiver.recv(2048))
+    except socket.timeout:
+        pass
+    receiver.close()
+    assert sender.sentFrames == 3
+    assert len(datagrams) == 2
+
+def test_outputMapEntries():
+    assert parseOutputMap('', '10.0.0.1', 7777, 300) == [('10.0.0.1', 7777, 0, 300)]
+    assert parseOutputMap('10.0.0.2', '10.0.0.1', 7777, 300) == [('10.0.0.2', 7777, 0, 300)]
+    assert parseOutputMap('10.0.0.2:5000:0-149; 10.0.0.3::150-400', '10.0.0.1', 7777, 300) == [('10.0.0.2', 5000, 0, 150), ('10.0.0.3', 7777, 150, 300)]
+
+@pytest.mark.parametrize('outputMap', ['10.0.0.2:5000:0-', '10.0.0.2:5000:-10', '10.0.0.2:abc', '10.0.0.2:5000:a-b', '10.0.0.2:5000:0-10-20',
+                                       '10.0.0.2:5000:0-10:x', '10.0.0.2:0', '10.0.0.2:70000', '10.0.0.2:5000:300-400', '10.0.0.2:5000:20-10'])
+def test_outputMapRejectsMalformedEntries(outputMap):
+    with pytest.raises(ValueError):
+        parseOutputMap(outputMap, '10.0.0.1', 7777, 300)
+
+@pytest.mark.parametrize('noPixels', [1, 480, 481, 1000])
+def test_ddpPackets(noPixels):
+    pixels = randomFrame(noPixels)
+    encoder = ddpEncoder(noPixels)
+    packets = [bytes(packet) for packet in encoder.encode(pixels)]
+    counts = [len(chunk) for chunk in np.array_split(np.arange(noPixels), np.arange(480, noPixels, 480))]
+    assert len(packets) == len(counts)
+    for packetNo, (packet, count) in enumerate(zip(packets, counts)):
+        flags = 0x41 if packetNo == len(packets) - 1 else 0x40
+        assert packet[:10] == struct.pack('!BBBBIH', flags, 1, 0x0B, 0x01, packetNo * 3 * 480, 3 * count)
+        assert packet[10:] == bytes(pixels[:, packetNo * 480 : packetNo * 480 + count].T)
+
+def test_ddpSequenceSkipsZero():
+    encoder = ddpEncoder(10)
+    assert [bytes(encoder.encode(randomFrame(10))[0])[1] for frameNo in range(16)] == list(range(1, 16)) + [1]
+
+@pytest.mark.parametrize('noPixels', [1, 170, 171, 400])
+def test_e131Packets(noPixels):
+    pixels = randomFrame(noPixels)
+    encoder = e131Encoder(noPixels, universe=5)
+    for sequence in (1, 2):
+        packets = [bytes(packet) for packet in encoder.encode(pixels)]
+        assert all(packet[111] == sequence for packet in packets)
+    counts = [len(chunk) for chunk in np.array_split(np.arange(noPixels), np.arange(170, noPixels, 170))]
+    assert len(packets) == len(counts)
+    for packetNo, (packet, count) in enumerate(zip(packets, counts)):
+        slots = 3 * count
+        assert len(packet) == 126 + slots
+        assert packet[:16] == b'\x00\x10\x00\x00ASC-E1.17\x00\x00\x00'
+        assert struct.unpack('!H', packet[16:18])[0] == 0x7000 | (110 + slots)
+        assert packet[18:22] == struct.pack('!I', 4) and packet[22:38] == encoder.cid
+        assert struct.unpack('!H', packet[38:40])[0] == 0x7000 | (88 + slots)
+        assert packet[40:44] == struct.pack('!I', 2) and packet[44:108].rstrip(b'\x00') == b'Chromatizer'
+        assert packet[108] == 100 and struct.unpack('!H', packet[113:115])[0] == 5 + packetNo
+        assert struct.unpack('!H', packet[115:117])[0] == 0x7000 | (11 + slots)
+        assert packet[117:123] == b'\x02\xa1\x00\x00\x00\x01' and struct.unpack('!H', packet[123:125])[0] == slots + 1
+        assert packet[125] == 0 and packet[126:] == bytes(pixels[:, packetNo * 170 : packetNo * 170 + count].T)
+
+@pytest.mark.parametrize('colorOrder', [''.join(order) for order in itertools.permutations('RGB')])
+def test_piPacking(colorOrder):
+    pixels = randomFrame(50)
+    sender = piSender(mockStrip(50, wireTime=0), colorOrder)
+    sender.submit(pixels)
+    sender.close()
+    first, second, third = (pixels['RGB'.index(color)].astype(np.uint32) for color in colorOrder)
+    np.testing.assert_array_equal(sender.strip.shown, (first << 16) | (second << 8) | third)
+
+def test_piNewerFrameReplacesPending():
+    strip = mockStrip(100, wireTime=1e-3)
+    sender = piSender(strip, 'RGB')
+    sender.submit(randomFrame(100, seed=1))
+    # The worker is showing the first frame for 0.1s, the next two wait in the pending slot
+    sleep(0.02)
+    sender.submit(randomFrame(100, seed=2))
+    latest = randomFrame(100, seed=3)
+    sender.submit(latest)
+    sender.close()
+    assert (sender.shownFrames, sender.coalescedFrames, strip.showCount) == (2, 1, 2)
+    np.testing.assert_array_equal(strip.shown, (latest[0].astype(np.uint32) << 16) | (latest[1].astype(np.uint32) << 8) | latest[2])
@@ -0,0 +1,22 @@
+"""
+Title              : Chromatizer Pipeline Tests
+Description        : LED output of the float32 pipeline against float64
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import pytest
+from benchmark import checkDtypeParity, SIGNALS
+
+# Largest difference in output levels from the float64 pipeline
+TOLERANCE = 1
+
+@pytest.mark.parametrize('signal', list(SIGNALS))
+@pytest.mark.parametrize('display', ['scrollDisplay', 'energyDisplay', 'spectrumDisplay'])
+def test_dtypeParity(display, signal):
+    for result in checkDtypeParity(signals=(signal,), displays=(display,), seconds=5.0):
+        assert result['maxDiff'] <= TOLERANCE, '{dtype} output differs from float64 by {maxDiff} levels'.format(**result)
@@ -0,0 +1,34 @@
+"""
+Title              : Chromatizer Show Tests
+Description        : Show file round trip and rejection of broken headers
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import pytest, numpy as np
+from shows import showFile, showWriter, SHOW_HEADER, SHOW_MAGIC, SHOW_VERSION
+
+def test_showRoundTrip(tmp_path):
+    frames = np.random.default_rng(0).integers(0, 256, (5, 3, 20), dtype=np.uint8)
+    with showWriter(tmp_path / 'test.show', 20, 40.0, 'GRB') as writer:
+        for pixels in frames:
+            writer.write(pixels)
+    show = showFile(tmp_path / 'test.show')
+    assert (show.noPixels, show.fps, show.noFrames, show.colorOrder) == (20, 40.0, 5, 'GRB')
+    np.testing.assert_array_equal(show.frames[:, show.rgbChannels], frames)
+    assert show.frameAt(5 / 40.0) == 0
+
+@pytest.mark.parametrize('content', [b'', SHOW_HEADER.pack(SHOW_MAGIC, SHOW_VERSION, 20, 40.0, b'RGB')[:20],
+                                     SHOW_HEADER.pack(b'WAVE', SHOW_VERSION, 20, 40.0, b'RGB'),
+                                     SHOW_HEADER.pack(SHOW_MAGIC, SHOW_VERSION, 0, 40.0, b'RGB') + bytes(60),
+                                     SHOW_HEADER.pack(SHOW_MAGIC, SHOW_VERSION, 20, 0.0, b'RGB') + bytes(60),
+                                     SHOW_HEADER.pack(SHOW_MAGIC, SHOW_VERSION, 20, float('inf'), b'RGB') + bytes(60),
+                                     SHOW_HEADER.pack(SHOW_MAGIC, SHOW_VERSION, 20, 40.0, b'RGX') + bytes(60)])
+def test_showRejectsBrokenHeaders(tmp_path, content):
+    (tmp_path / 'broken.show').write_bytes(content)
+    with pytest.raises(ValueError):
+        showFile(tmp_path / 'broken.show')
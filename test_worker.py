@@ -0,0 +1,41 @@
+"""
+Title              : Chromatizer Worker Tests
+Description        : Sequence count of the shared memory frame rings
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import numpy as np
+from worker import frameRing
+
+def test_ringRoundTrip():
+    writer = frameRing((3, 10), dtype=np.float32)
+    reader = frameRing((3, 10), name=writer.name, dtype=np.float32)
+    try:
+        assert reader.read() is None
+        for value in range(6):
+            writer.write(np.full((3, 10), value))
+        np.testing.assert_array_equal(reader.read(), np.full((3, 10), 5))
+        assert reader.read() is None
+    finally:
+        reader.close()
+        writer.close()
+
+def test_ringSkipsRecordBeingWritten():
+    writer = frameRing((4,))
+    reader = frameRing((4,), name=writer.name)
+    try:
+        writer.write(np.ones(4))
+        record = writer.slot()
+        record[:2] = 2
+        assert reader.read() is None
+        record[2:] = 2
+        writer.commit()
+        np.testing.assert_array_equal(reader.read(), np.full(4, 2))
+    finally:
+        reader.close()
+        writer.close()
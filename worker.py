@@ -0,0 +1,236 @@
+"""
+Title              : Chromatizer DSP Worker
+Description        : Audio capture, analysis and LED output in a separate process, frames shared with the GUI
+Author             : Kondapi Prasanth
+Created            : 17-Oct-2026
+Modified           : 17-Oct-2026
+Version            : 0
+Revision History   : 0
+
+"""
+
+import queue, multiprocessing, numpy as np
+from time import time
+from threading import Thread
+from multiprocessing import shared_memory
+from engine import chromaEngine, expFilter, preferenceDict, debugPrint
+
+class frameRing():
+    """Fixed size records in shared memory, written by one process and read by another
+
+    The header is a sequence count, odd while the writer fills a slot and
+    even once the record is complete, so count // 2 records are published.
+    A reader copies the newest slot and keeps the copy only if the count was
+    even and unchanged from before the copy to after it.
+    """
+    headerSize = 8
+
+    def __init__(self, shape, slots=4, name=None, dtype=np.float64):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        self.owner = name is None
+        recordSize = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=self.headerSize + slots * recordSize)
+        self.name = self.shm.name
+        self.count = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        self.records = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf, offset=self.headerSize)
+        if self.owner:
+            self.count[0] = 0
+        self.latest = np.zeros(self.shape, dtype=self.dtype)
+        self.seen = 0
+
+    def slot(self):
+        """The record the next commit() publishes, filled in place by the writer"""
+        count = int(self.count[0])
+        if count % 2 == 0:
+            self.count[0] = count + 1
+        return self.records[(count // 2) % self.slots]
+
+    def commit(self):
+        self.count[0] += 1
+
+    def write(self, record):
+        np.copyto(self.slot(), record)
+        self.commit()
+
+    def read(self):
+        """Copy of the newest record, None if there is nothing new since the last read"""
+        count = int(self.count[0])
+        if count % 2 or count == self.seen:
+            # Odd while a record is being written, the next read gets it
+            return None
+        np.copyto(self.latest, self.records[(count // 2 - 1) % self.slots])
+        if int(self.count[0]) != count:
+            return None
+        self.seen = count
+        return self.latest
+
+    def close(self):
+        # The views have to go before the mapping can be closed
+        self.count = self.records = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def melRecordShape(noFFT):
+    """melMax, fps, leftIndex and rightIndex, then melFrq, the smoothed mel values and the gain"""
+    return (4 + 3 * noFFT,)
+
+class dspEngine(chromaEngine):
+    """chromaEngine of the worker process, publishes every frame it renders to the GUI"""
+    statusInterval = 0.5
+
+    def __init__(self, preferences, prefFile, events):
+        self.events = events
+        self.pixelRing = self.melRing = None
+        self.statusTime = time()
+        chromaEngine.__init__(self, preferences, prefFile)
+        self.refreshDeviceList()
+
+    def refreshDeviceList(self):
+        self.getAudioDevices()
+        self.events.put(('audioDevices', list(self.audioDevices.keys()), self.preferences['audioDevice']))
+
+    def loopActions(self):
+        chromaEngine.loopActions(self)
+        self.publish()
+
+    def publish(self):
+        debugPrint('inPublish')
+        noFFT = len(self.melFrq)
+        levels = self.frame.levels
+        if self.pixelRing is None or self.pixelRing.shape != levels.shape or self.pixelRing.dtype != levels.dtype or self.melRing.shape != melRecordShape(noFFT):
+            # Strip length, band count or dtype changed, the GUI attaches to the new rings when it sees them
+            self.closeRings()
+            self.pixelRing = frameRing(levels.shape, dtype=levels.dtype)
+            self.melRing = frameRing(melRecordShape(noFFT))
+            self.events.put(('rings', self.pixelRing.name, self.pixelRing.shape, self.melRing.name, self.melRing.shape, self.pixelRing.dtype.str))
+        self.pixelRing.write(levels)
+        record = self.melRing.slot()
+        record[:4] = self.melData[0], self.fps.value, self.leftIndex, self.rightIndex
+        record[4:4 + noFFT] = self.melFrq
+        record[4 + noFFT:4 + 2 * noFFT] = self.melSmooth.value
+        record[4 + 2 * noFFT:] = self.melGain.value
+        self.melRing.commit()
+        if time() - self.statusTime > self.statusInterval:
+            self.statusTime = time()
+            self.events.put(('metrics', self.metrics.summary(), self.metrics.table()))
+
+    def closeRings(self):
+        for ring in (self.pixelRing, self.melRing):
+            if ring is not None:
+                ring.close()
+        self.pixelRing = self.melRing = None
+
+def workerMain(preferences, prefFile, commands, events):
+    """Entry point of the worker process, renders until the GUI sends stop"""
+    ce = dspEngine(preferences, prefFile, events)
+
+    def forwardCommands():
+        while True:
+            action, args = commands.get()
+            if action == 'stop':
+                ce.renderStop.set()
+                return
+            ce.post(getattr(ce, action) if action is not None else None, *args)
+
+    Thread(target=forwardCommands, name='commands', daemon=True).start()
+    ce.post()
+    try:
+        ce.renderLoop()
+    finally:
+        ce.closeActions()
+        ce.closeRings()
+
+class dspWorker():
+    """GUI side of the worker process
+
+    Configuration goes down a queue as the preferences that changed plus the
+    engine method to run. Pixel and mel frames come back through shared
+    memory rings, status messages (ring names, audio devices, latencies)
+    through a second queue. The worker starts with spawn, which imports the
+    main script again in the child, so that script must only start its GUI
+    under its __name__ == "__main__" guard.
+    """
+    def __init__(self, preferences, prefFile=None):
+        context = multiprocessing.get_context('spawn')
+        self.commands = context.Queue()
+        self.events = context.Queue()
+        self.sentPreferences = preferenceDict(preferences)
+        self.pixelRing = self.melRing = None
+        self.latency = ('', '')
+        self.process = context.Process(target=workerMain, args=(dict(self.sentPreferences), prefFile, self.commands, self.events), name='chromatizerDSP', daemon=True)
+        self.process.start()
+
+    def post(self, action, args, preferences):
+        """Send the preferences changed since the last post, then the engine method to run by name"""
+        changes = {key: value for key, value in preferenceDict(preferences).items() if key not in self.sentPreferences or self.sentPreferences[key] != value}
+        if changes:
+            self.sentPreferences.update(changes)
+            self.commands.put(('setPreferences', (changes,)))
+        self.commands.put((action, args))
+
+    def poll(self, engine):
+        """Copy the newest frames from the worker into engine, True when the audio device list changed"""
+        devicesChanged = False
+        while True:
+            try:
+                message = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == 'rings':
+                self.closeRings()
+                try:
+                    self.pixelRing = frameRing(message[2], name=message[1], dtype=message[5])
+                    self.melRing = frameRing(message[4], name=message[3])
+                except FileNotFoundError:
+                    # Replaced again already, the next message has the current ones
+                    self.closeRings()
+            elif message[0] == 'audioDevices':
+                engine.audioDevices = dict.fromkeys(message[1])
+                engine.preferences['audioDevice'] = self.sentPreferences['audioDevice'] = message[2]
+                devicesChanged = True
+            elif message[0] == 'metrics':
+                self.latency = message[1:]
+        if self.pixelRing is None:
+            return devicesChanged
+
+        pixels = self.pixelRing.read()
+        if pixels is not None:
+            if engine.frame.levels.shape != pixels.shape:
+                engine.frame.resize(pixels.shape[1])
+                engine.currPixels = engine.frame.levels
+            np.copyto(engine.frame.levels, pixels, casting='unsafe')
+        record = self.melRing.read()
+        if record is not None:
+            noFFT = (record.size - 4) // 3
+            leftIndex, rightIndex = int(record[2]), int(record[3])
+            engine.fps.value = record[1]
+            engine.melFrq = record[4:4 + noFFT].copy()
+            melValues = record[4 + noFFT:4 + 2 * noFFT].copy()
+            engine.melData = (record[0], melValues[0 : leftIndex + 1], melValues[leftIndex : rightIndex + 1], melValues[rightIndex : noFFT])
+            if getattr(engine, 'melGain', None) is None or engine.melGain.value.shape != (noFFT,):
+                engine.melGain = expFilter(np.zeros(noFFT))
+            np.copyto(engine.melGain.value, record[4 + 2 * noFFT:])
+        return devicesChanged
+
+    def summary(self):
+        """The worker's stageMetrics summary() as of its last status message"""
+        return self.latency[0]
+
+    def table(self):
+        return self.latency[1]
+
+    def closeRings(self):
+        for ring in (self.pixelRing, self.melRing):
+            if ring is not None:
+                ring.close()
+        self.pixelRing = self.melRing = None
+
+    def close(self, timeout=5.0):
+        self.commands.put(('stop', ()))
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.closeRings()